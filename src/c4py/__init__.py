@@ -1,16 +1,79 @@
 # src/c4/__init__.py
-from .id import ID, Digest, Encoder, encode, identify, NIL_ID, VOID_ID, MAX_ID
+from __future__ import annotations
+
+from .id import (
+    ID,
+    Digest,
+    Encoder,
+    encode,
+    encode_many,
+    identify,
+    identify_path,
+    parse_many,
+    NIL_ID,
+    VOID_ID,
+    MAX_ID,
+)
 from .errors import ErrBadChar, ErrBadLength, ErrNil, ErrInvalidTree
 
+__version__ = "0.1.0"
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any
+
+    from .idarray import IDArray
+    from .batch import identify_many, identify_packed
+    from .index import IDIndex
+    from .parallel import identify_paths
+    from .tree import Tree
+
+# Names whose modules pull in heavier dependencies (concurrent.futures,
+# sqlite3) are imported on first access instead of with the package
+_LAZY = {
+    "IDArray": "idarray",
+    "IDIndex": "index",
+    "identify_many": "batch",
+    "identify_packed": "batch",
+    "identify_paths": "parallel",
+    "Tree": "tree",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(_LAZY))
+
+
 __all__ = [
+    "__version__",
     "ID",
+    "IDArray",
+    "IDIndex",
     "Digest",
     "Encoder",
     "encode",
+    "encode_many",
+    "parse_many",
     "identify",
+    "identify_path",
+    "identify_paths",
+    "identify_many",
+    "identify_packed",
     "NIL_ID",
     "VOID_ID",
     "MAX_ID",
+    "Tree",
     "ErrBadChar",
     "ErrBadLength",
     "ErrNil",
@@ -1,5 +1,19 @@
 # src/c4py/__main__.py
-from .cli import main
+import sys
+
+
+def run() -> None:
+    """Console entry point; answers --version without loading click"""
+    if sys.argv[1:] == ["--version"]:
+        from . import __version__
+
+        print(f"c4py, version {__version__}")
+        return
+
+    from .cli import main
 
-if __name__ == "__main__":  # pragma: no cover
     main()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    run()
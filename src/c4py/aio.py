@@ -0,0 +1,136 @@
+import asyncio
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, AsyncIterable, Callable, Optional, TypeVar, Union
+
+from .id import DEFAULT_CHUNK_SIZE, ID, Digest, Encoder
+
+T = TypeVar("T")
+
+# Writes are batched until at least this many bytes are pending, then hashed
+# on the pool; smaller digests are cheaper to compute on the event loop.
+OFFLOAD_THRESHOLD = 64 * 1024
+
+Buffer = Union[bytes, bytearray, memoryview]
+if TYPE_CHECKING:
+    LoopSemaphores = weakref.WeakKeyDictionary[
+        asyncio.AbstractEventLoop, asyncio.Semaphore
+    ]
+
+
+class HashingPool:
+    """Fixed pool of hashing threads shared by many concurrent encoders.
+
+    At most ``max_pending`` updates may be queued or running at once; further
+    callers wait on the event loop instead of piling work (and buffers) onto
+    the executor.
+    """
+
+    def __init__(
+        self, max_workers: Optional[int] = None, max_pending: Optional[int] = None
+    ) -> None:
+        self.max_workers = max_workers or min(32, os.cpu_count() or 1)
+        self.max_pending = max_pending or self.max_workers * 2
+        self._executor = ThreadPoolExecutor(
+            self.max_workers, thread_name_prefix="c4py-hash"
+        )
+        # Semaphores are bound to the loop they are first used on
+        self._semaphores: "LoopSemaphores" = weakref.WeakKeyDictionary()
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn(*args)`` on the pool once a slot is free"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_pending)
+        async with semaphore:
+            return await loop.run_in_executor(self._executor, fn, *args)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+_default_pool: Optional[HashingPool] = None
+
+
+def default_pool() -> HashingPool:
+    """Process-wide pool used when no pool is given"""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = HashingPool()
+    return _default_pool
+
+
+class AsyncEncoder:
+    """Encoder whose large updates run on a HashingPool, off the event loop"""
+
+    def __init__(
+        self,
+        pool: Optional[HashingPool] = None,
+        threshold: int = OFFLOAD_THRESHOLD,
+    ) -> None:
+        self._pool = pool
+        self._threshold = threshold
+        self._encoder = Encoder()
+        self._pending = bytearray()
+
+    async def write(self, data: Buffer) -> int:
+        size = len(data)
+        if not self._pending and size >= self._threshold:
+            await self._offload(bytes(data))
+            return size
+
+        self._pending += data
+        if len(self._pending) >= self._threshold:
+            pending, self._pending = self._pending, bytearray()
+            await self._offload(bytes(pending))
+        return size
+
+    async def _offload(self, data: bytes) -> None:
+        pool = self._pool or default_pool()
+        await pool.run(self._encoder.write, data)
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._encoder.write(self._pending)
+            self._pending = bytearray()
+
+    def id(self) -> ID:
+        self._flush()
+        return self._encoder.id()
+
+    def digest(self) -> Digest:
+        self._flush()
+        return self._encoder.digest()
+
+    def reset(self) -> None:
+        self._encoder.reset()
+        self._pending = bytearray()
+
+
+async def identify_async(
+    src: Union[asyncio.StreamReader, AsyncIterable[Buffer]],
+    pool: Optional[HashingPool] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Optional[ID]:
+    """Identify an asyncio stream or async iterator of byte chunks.
+
+    Hashing of large chunks runs on ``pool`` (a shared default pool if
+    omitted), so the event loop stays responsive during long uploads.
+    """
+    enc = AsyncEncoder(pool)
+    if isinstance(src, asyncio.StreamReader):
+        while True:
+            chunk = await src.read(chunk_size)
+            if not chunk:
+                break
+            await enc.write(chunk)
+    elif hasattr(src, "__aiter__"):
+        async for chunk in src:
+            await enc.write(chunk)
+    else:
+        raise TypeError(
+            "identify_async expects an asyncio.StreamReader or async iterable"
+        )
+    return enc.id()
@@ -0,0 +1,250 @@
+"""Interchangeable SHA-512 implementations.
+
+Every hash c4py computes (``Encoder``, ``Digest.sum``, tree levels, batch
+records, block trees) goes through one SHA-512 constructor, ``hashlib``'s by
+default.  This module can swap in another implementation:
+
+``hashlib``
+    The OpenSSL build Python was linked against.
+``libcrypto``
+    The system's libcrypto through ctypes.  This can be a newer OpenSSL,
+    with faster SHA-NI/AVX2/AVX-512 code paths, than the one ``hashlib``
+    uses.  Each call pays ctypes overhead, so it only wins on large reads.
+``pycryptodome``
+    ``Crypto.Hash.SHA512`` from the optional pycryptodome package.
+``python``
+    Pure Python, for reference only; about 0.5 MB/s.
+
+OpenSSL chooses its own vector code at run time, so picking a backend means
+picking a library, not an instruction set.  A backend is only used after it
+reproduces a set of known-answer digests, so IDs stay bit-identical
+whichever one is active.  Set ``C4PY_HASH_BACKEND`` (or pass
+``--hash-backend``) to choose one.  The name ``auto`` times every available
+backend on a mix of large reads and 128-byte pair sums, then uses the
+fastest.
+"""
+
+import hashlib
+import os
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from . import id as _id
+
+# A constructor like hashlib.sha512: new(data=b"") -> object with
+# update(data) and digest()
+Constructor = Callable[..., Any]
+
+# (message, SHA-512 hex digest): FIPS 180-2 vectors, plus a multi-block
+# message that is also hashed in uneven pieces to check partial-block buffering
+KNOWN_ANSWERS = [
+    (
+        b"",
+        "cf83e1357eefb8bdf1542850d66d8007d620e4050b5715dc83f4a921d36ce9ce"
+        "47d0d13c5d85f2b0ff8318d2877eec2f63b931bd47417a81a538327af927da3e",
+    ),
+    (
+        b"abc",
+        "ddaf35a193617abacc417349ae20413112e6fa4e89a97ea20a9eeee64b55d39a"
+        "2192992a274fc1a836ba3c23a3feebbd454d4423643ce80e2a9ac94fa54ca49f",
+    ),
+    (
+        b"abcdefghbcdefghicdefghijdefghijkefghijklfghijklmghijklmnhijklmno"
+        b"ijklmnopjklmnopqklmnopqrlmnopqrsmnopqrstnopqrstu",
+        "8e959b75dae313da8cf4f72814fc143f8f7779c6eb9f7fa17299aeadb6889018"
+        "501d289e4900f7e4331b99dec4b5433ac7d329eeb6dd26545e96e55b874be909",
+    ),
+    (
+        (bytes(range(256)) * 4)[:1000],
+        "6cd2eda9bf9c0597129029b0054b81e433f6b8b7b499a75eb705efd74bac1941"
+        "49835b1d1a14c48be696e4d588456d512a22eae7aa1b57be2b56eae7d35e08cb",
+    ),
+]
+_PIECES = (1, 127, 128, 744)
+
+# Work used to rank backends for "auto"
+STREAM_SIZE = 4 * 1024 * 1024
+STREAM_CHUNK = 64 * 1024
+SUM_COUNT = 4096
+
+
+def _hashlib() -> Optional[Constructor]:
+    return hashlib.sha512
+
+
+def _state_class(cls: Any) -> Constructor:
+    def new(data: Any = b"") -> Any:
+        hasher = cls()
+        if len(data):
+            hasher.update(data)
+        return hasher
+
+    return new
+
+
+def _libcrypto() -> Optional[Constructor]:
+    from .resumable import LibcryptoSha512, _load_libcrypto
+
+    if _load_libcrypto() is None:
+        return None
+    return _state_class(LibcryptoSha512)
+
+
+def _pycryptodome() -> Optional[Constructor]:
+    try:
+        from Crypto.Hash import SHA512  # ty: ignore[unresolved-import]
+    except ImportError:
+        return None
+
+    def new(data: Any = b"") -> Any:
+        return SHA512.new(data)
+
+    return new
+
+
+def _python() -> Optional[Constructor]:
+    from .resumable import PythonSha512
+
+    return _state_class(PythonSha512)
+
+
+# Name -> loader returning the constructor, or None when not installed
+LOADERS: Dict[str, Callable[[], Optional[Constructor]]] = {
+    "hashlib": _hashlib,
+    "libcrypto": _libcrypto,
+    "pycryptodome": _pycryptodome,
+    "python": _python,
+}
+
+# Backends that are never picked by "auto"
+_REFERENCE_ONLY = {"python"}
+
+_loaded: Dict[str, Optional[Constructor]] = {}
+_status: Dict[str, str] = {}
+
+
+def verify(new: Constructor) -> bool:
+    """Whether ``new`` reproduces every known answer, whole and in pieces"""
+    try:
+        for message, expected in KNOWN_ANSWERS:
+            if new(message).digest().hex() != expected:
+                return False
+        message, expected = KNOWN_ANSWERS[-1]
+        hasher = new()
+        start = 0
+        for size in _PIECES:
+            hasher.update(memoryview(message)[start : start + size])
+            start += size
+        return hasher.digest().hex() == expected
+    except Exception:
+        return False
+
+
+def load(name: str) -> Constructor:
+    """The verified constructor of a backend, raising ValueError if unusable"""
+    if name not in LOADERS:
+        raise ValueError(
+            f"unknown hash backend {name!r} (choose from {', '.join(LOADERS)}, auto)"
+        )
+    if name not in _loaded:
+        new = LOADERS[name]()
+        if new is None:
+            _status[name] = "not installed"
+        elif not verify(new):
+            _status[name] = "failed known-answer test"
+            new = None
+        else:
+            _status[name] = "ok"
+        _loaded[name] = new
+    new = _loaded[name]
+    if new is None:
+        raise ValueError(f"hash backend {name!r} is {_status[name]}")
+    return new
+
+
+def status(name: str) -> str:
+    """``ok``, ``not installed`` or ``failed known-answer test``"""
+    try:
+        load(name)
+    except ValueError:
+        pass
+    return _status[name]
+
+
+def available() -> List[str]:
+    """Names of the backends that load and pass their known-answer test"""
+    return [name for name in LOADERS if status(name) == "ok"]
+
+
+def active() -> str:
+    """Name of the backend in use"""
+    return _id._backend
+
+
+def use(name: str) -> str:
+    """Hash with the named backend from now on, returning its name.
+
+    ``auto`` benchmarks the available backends and uses the fastest.
+    """
+    if name == "auto":
+        name = fastest()
+    _id._sha512 = load(name)
+    _id._backend = name
+    return name
+
+
+class Timing(NamedTuple):
+    # Bytes per second hashing STREAM_SIZE bytes in STREAM_CHUNK updates
+    stream: float
+    # 128-byte messages per second, as in Digest.sum and tree levels
+    sums: float
+    # Best time for the mixed workload used to rank backends
+    seconds: float
+
+
+def _time(new: Constructor, repeat: int) -> Timing:
+    chunk = memoryview(os.urandom(STREAM_CHUNK))
+    pair = os.urandom(128)
+    best_stream = best_sums = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hasher = new()
+        for _ in range(STREAM_SIZE // STREAM_CHUNK):
+            hasher.update(chunk)
+        hasher.digest()
+        middle = time.perf_counter()
+        for _ in range(SUM_COUNT):
+            new(pair).digest()
+        end = time.perf_counter()
+        best_stream = min(best_stream, middle - start)
+        best_sums = min(best_sums, end - middle)
+    return Timing(
+        STREAM_SIZE / best_stream, SUM_COUNT / best_sums, best_stream + best_sums
+    )
+
+
+def benchmark(names: Optional[List[str]] = None, repeat: int = 3) -> Dict[str, Timing]:
+    """Time backends (by default every available one but ``python``)"""
+    if names is None:
+        names = [name for name in available() if name not in _REFERENCE_ONLY]
+    return {name: _time(load(name), repeat) for name in names}
+
+
+def fastest(timings: Optional[Dict[str, Timing]] = None) -> str:
+    """Name of the backend with the shortest mixed-workload time"""
+    measured = benchmark() if timings is None else timings
+    return min(measured, key=lambda name: measured[name].seconds)
+
+
+def cpu_features() -> List[str]:
+    """SHA and vector extensions this CPU reports (Linux only)"""
+    wanted = {"sha_ni", "avx2", "avx512f", "sha512", "sha2"}
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key.strip() in ("flags", "Features"):
+                    return sorted(wanted.intersection(value.split()))
+    except OSError:
+        pass
+    return []
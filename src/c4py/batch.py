@@ -0,0 +1,109 @@
+"""Batch identification of many small in-memory records.
+
+Building an ``Encoder``, an ``ID`` and a string per record costs far more
+than hashing a few kilobytes.  These functions hash records straight into
+one flat buffer of 64-byte digests and wrap it in an ``IDArray``; IDs and
+strings are only built for the records that are looked at.
+"""
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Deque, Iterable, Iterator, List, Sequence, Union
+
+from .id import get_sha512
+from .idarray import IDArray
+from .parallel import default_jobs
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# Records hashed per task when a thread pool is used
+BATCH_SIZE = 4096
+
+
+def digest_many(buffers: Iterable[Buffer]) -> bytearray:
+    """Concatenated SHA-512 digests of ``buffers``, in order"""
+    sha512 = get_sha512()
+    out = bytearray()
+    for buf in buffers:
+        out += sha512(buf).digest()
+    return out
+
+
+def _batches(items: Iterable[Buffer], size: int) -> Iterator[List[Buffer]]:
+    it = iter(items)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _digest_batches(
+    batches: Iterable[Sequence[Buffer]], jobs: int
+) -> Iterator[bytearray]:
+    if jobs == 1:
+        yield from map(digest_many, batches)
+        return
+    # SHA-512 releases the GIL for buffers of 2 KiB and up, so records of a
+    # few kilobytes hash in parallel; smaller ones mostly save call overhead
+    # Submit a few batches per thread at a time so a lazy input stays lazy
+    pending: Deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for batch in batches:
+            pending.append(executor.submit(digest_many, batch))
+            if len(pending) > 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def identify_many(
+    buffers: Iterable[Buffer], jobs: int = 1, batch_size: int = BATCH_SIZE
+) -> IDArray:
+    """IDs of many in-memory records, in input order.
+
+    ``jobs`` threads each hash ``batch_size`` records at a time (0 means
+    one per CPU).
+    """
+    if jobs <= 0:
+        jobs = default_jobs()
+    out = bytearray()
+    for digests in _digest_batches(_batches(buffers, batch_size), jobs):
+        out += digests
+    return IDArray.from_bytearray(out)
+
+
+def identify_packed(
+    buffer: Buffer,
+    offsets: Sequence[int],
+    jobs: int = 1,
+    batch_size: int = BATCH_SIZE,
+) -> IDArray:
+    """IDs of records packed back to back in one buffer.
+
+    Record ``i`` is ``buffer[offsets[i]:offsets[i + 1]]``, so ``offsets``
+    holds one more entry than there are records.  Records are hashed from
+    views of ``buffer`` without being copied.  Raises ValueError unless the
+    offsets are non-decreasing and within ``buffer``.
+    """
+    if jobs <= 0:
+        jobs = default_jobs()
+    view = memoryview(buffer).cast("B")
+    count = max(0, len(offsets) - 1)
+    if count and (
+        offsets[0] < 0
+        or offsets[count] > len(view)
+        or any(b < a for a, b in zip(offsets, islice(offsets, 1, None)))
+    ):
+        raise ValueError("offsets must be non-decreasing and within the buffer")
+
+    def batch(start: int) -> List[Buffer]:
+        stop = min(start + batch_size, count)
+        return [view[offsets[i] : offsets[i + 1]] for i in range(start, stop)]
+
+    batches = map(batch, range(0, count, batch_size))
+    out = bytearray()
+    for digests in _digest_batches(batches, jobs):
+        out += digests
+    return IDArray.from_bytearray(out)
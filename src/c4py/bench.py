@@ -0,0 +1,508 @@
+"""Benchmark suite for c4py.
+
+Run with ``c4py bench`` (or ``python -m c4py.bench``).  Each group returns a
+list of cases; every case is timed best-of-N without tracing, then run once
+under ``tracemalloc`` to record its peak Python memory.  Results can be saved
+as JSON and compared against an earlier run.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from . import __version__
+from .errors import ErrBadChar
+from .id import (
+    BASE,
+    CHARSET,
+    ID,
+    ID_LEN,
+    Digest,
+    Encoder,
+    _lut,
+    encode_many,
+    identify,
+    identify_path,
+    parse_many,
+)
+
+MB = 1_000_000
+
+
+def _legacy_encode(value: int) -> str:
+    """The original digit-at-a-time Base58 encoder, kept for comparison"""
+    encoded = []
+    while value > 0:
+        value, mod = divmod(value, BASE)
+        encoded.append(CHARSET[mod])
+
+    result = ["c", "4"]
+    result.extend(["1"] * (ID_LEN - 2 - len(encoded)))
+    result.extend(reversed(encoded))
+    return "".join(result)
+
+
+def _legacy_decode(src: str) -> int:
+    """The original multiply-add Base58 decoder, kept for comparison"""
+    value = 0
+    for i, c in enumerate(src[2:], 2):
+        digit = _lut[ord(c)]
+        if digit == 0xFF:
+            raise ErrBadChar(i)
+        value = value * BASE + digit
+    return value
+
+
+def _legacy_sum(a: Digest, b: Digest) -> Digest:
+    """The original concatenating Digest.sum, kept for comparison"""
+    if a == b:
+        return a
+    data = a + b if a < b else b + a
+    return Digest(hashlib.sha512(data).digest())
+
+
+def _legacy_id(digest: bytes) -> ID:
+    """The original integer-backed Digest.id, kept for comparison"""
+    return ID(int.from_bytes(digest, "big"))
+
+
+def _legacy_digest(id_obj: ID) -> Digest:
+    """The original ID.digest via to_bytes, kept for comparison"""
+    return Digest(id_obj._value.to_bytes(64, "big"))
+
+
+def sample_ids(count: int) -> List[ID]:
+    return [
+        ID(int.from_bytes(hashlib.sha512(i.to_bytes(8, "big")).digest(), "big"))
+        for i in range(count)
+    ]
+
+
+class Case(NamedTuple):
+    name: str
+    fn: Callable[[], object]
+    # Units of work done by one call of fn (IDs, megabytes, files, ...)
+    work: float
+    unit: str
+
+
+def best_rate(fn: Callable[[], object], items: float, repeat: int = 5) -> float:
+    """Best-of-``repeat`` throughput of ``fn`` in items per second"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return items / best if best > 0 else float("inf")
+
+
+def peak_memory(fn: Callable[[], object]) -> int:
+    """Peak bytes allocated by Python while ``fn`` runs"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def write_file(path: str, size: int) -> None:
+    block = hashlib.sha512(path.encode()).digest() * 1024
+    with open(path, "wb") as f:
+        for start in range(0, size, len(block)):
+            f.write(block[: size - start])
+
+
+def bench_codec(workdir: str, quick: bool) -> List[Case]:
+    """Base58 encoding and parsing, new versus legacy"""
+    count = 2000 if quick else 20000
+    ids = sample_ids(count)
+    strs = [str(i) for i in ids]
+    values = [i._value for i in ids]
+    return [
+        Case(
+            "encode_legacy", lambda: [_legacy_encode(v) for v in values], count, "IDs/s"
+        ),
+        Case("encode", lambda: [str(i) for i in ids], count, "IDs/s"),
+        Case("encode_many", lambda: encode_many(ids), count, "IDs/s"),
+        Case("parse_legacy", lambda: [_legacy_decode(s) for s in strs], count, "IDs/s"),
+        Case("parse", lambda: [ID.parse(s) for s in strs], count, "IDs/s"),
+        Case("parse_many", lambda: parse_many(strs), count, "IDs/s"),
+    ]
+
+
+def bench_digest(workdir: str, quick: bool) -> List[Case]:
+    """Digest/ID conversions and Digest.sum, new versus legacy.
+
+    The conversion cases keep every result alive, so their peak memory is
+    what holding that many IDs costs.
+    """
+    count = 2000 if quick else 20000
+    digests = [i.digest() for i in sample_ids(count + 1)]
+    records = [bytes(d) * 16 for d in digests[:count]]
+
+    def sums() -> None:
+        for a, b in zip(digests, digests[1:]):
+            a.sum(b)
+
+    def legacy_sums() -> None:
+        for a, b in zip(digests, digests[1:]):
+            _legacy_sum(a, b)
+
+    def small_records() -> None:
+        for record in records:
+            enc = Encoder()
+            enc.write(record)
+            enc.id()
+
+    return [
+        Case("to_id_legacy", lambda: [_legacy_id(d) for d in digests], count, "IDs/s"),
+        Case("to_id", lambda: [d.id() for d in digests], count, "IDs/s"),
+        Case(
+            "round_trip_legacy",
+            lambda: [_legacy_digest(_legacy_id(d)) for d in digests],
+            count,
+            "IDs/s",
+        ),
+        Case("round_trip", lambda: [d.id().digest() for d in digests], count, "IDs/s"),
+        Case("digest_sum_legacy", legacy_sums, count, "sums/s"),
+        Case("digest_sum", sums, count, "sums/s"),
+        Case("encode_1k_records", small_records, count, "records/s"),
+    ]
+
+
+def bench_hashing(workdir: str, quick: bool) -> List[Case]:
+    """identify_path by file size, identify by read chunk size, block trees"""
+    sizes = [4 * 1024, 1024 * 1024] + ([] if quick else [64 * 1024 * 1024])
+    cases = []
+    for size in sizes:
+        path = os.path.join(workdir, f"hash-{size}.bin")
+        write_file(path, size)
+        cases.append(
+            Case(
+                f"identify_path_{size // 1024}k",
+                lambda path=path: identify_path(path),
+                size / MB,
+                "MB/s",
+            )
+        )
+
+    largest = os.path.join(workdir, f"hash-{sizes[-1]}.bin")
+
+    def read_with(chunk_size: int) -> Callable[[], object]:
+        def run() -> object:
+            with open(largest, "rb") as f:
+                return identify(f, chunk_size)
+
+        return run
+
+    for chunk_size in (8 * 1024, 64 * 1024, 1024 * 1024):
+        cases.append(
+            Case(
+                f"identify_chunk_{chunk_size // 1024}k",
+                read_with(chunk_size),
+                sizes[-1] / MB,
+                "MB/s",
+            )
+        )
+
+    # Block-tree IDs of the largest file, serial and one thread per CPU
+    from .chunked import identify_chunked
+
+    block_size = max(sizes[-1] // 16, 64 * 1024)
+    for jobs in (1, 0):
+        cases.append(
+            Case(
+                f"identify_chunked_j{jobs}",
+                lambda jobs=jobs: identify_chunked(largest, block_size, jobs),
+                sizes[-1] / MB,
+                "MB/s",
+            )
+        )
+    return cases
+
+
+def _make_tree(root: str, count: int, size: int) -> None:
+    os.makedirs(root)
+    for i in range(count):
+        subdir = os.path.join(root, f"d{i % 16:02d}")
+        os.makedirs(subdir, exist_ok=True)
+        write_file(os.path.join(subdir, f"f{i:06d}.bin"), size)
+
+
+def _make_deep_tree(root: str, levels: int, width: int) -> None:
+    os.makedirs(root)
+    with open(os.path.join(root, "top.txt"), "w") as f:
+        f.write("top")
+    if levels:
+        for i in range(width):
+            _make_deep_tree(os.path.join(root, f"d{i}"), levels - 1, width)
+
+
+def bench_walk(workdir: str, quick: bool) -> List[Case]:
+    """Recursive identification of small versus huge files, and shallow walks"""
+    from .cli import walk_files
+    from .parallel import default_jobs, identify_paths
+    from .walk import walk
+
+    trees = {
+        "small_files": (500 if quick else 5000, 4 * 1024),
+        "large_files": (2 if quick else 4, (4 if quick else 64) * 1024 * 1024),
+    }
+    cases = []
+    for name, (count, size) in trees.items():
+        root = os.path.join(workdir, name)
+        _make_tree(root, count, size)
+        for jobs in sorted({1, default_jobs()}):
+
+            def run(root: str = root, jobs: int = jobs) -> None:
+                for _ in identify_paths(walk_files(root, False, 0, False), jobs=jobs):
+                    pass
+
+            cases.append(Case(f"{name}_jobs{jobs}", run, count, "files/s"))
+
+    # A shallow (depth 1) listing of a deep tree: os.walk visits everything
+    deep = os.path.join(workdir, "deep")
+    _make_deep_tree(deep, 3 if quick else 4, 4)
+
+    def os_walk_depth1() -> None:
+        for directory, _, files in os.walk(deep):
+            if len(os.path.relpath(directory, deep).split(os.sep)) > 1:
+                continue
+            for _ in files:
+                pass
+
+    def scandir_depth1() -> None:
+        for _ in walk(deep, depth=1):
+            pass
+
+    cases.append(Case("deep_depth1_os_walk", os_walk_depth1, 1, "walks/s"))
+    cases.append(Case("deep_depth1_scandir", scandir_depth1, 1, "walks/s"))
+    return cases
+
+
+def bench_batch(workdir: str, quick: bool) -> List[Case]:
+    """Many small in-memory records: Encoder per record versus batches"""
+    from .batch import identify_many, identify_packed
+    from .parallel import default_jobs
+
+    count = 5000 if quick else 100000
+    records = [hashlib.sha512(i.to_bytes(8, "big")).digest() * 32 for i in range(count)]
+    packed = b"".join(records)
+    offsets = list(range(0, len(packed) + 1, len(records[0])))
+
+    def per_record() -> None:
+        for record in records:
+            enc = Encoder()
+            enc.write(record)
+            str(enc.id())
+
+    cases = [
+        Case("encoder_per_record", per_record, count, "records/s"),
+        Case("identify_many", lambda: identify_many(records), count, "records/s"),
+        Case(
+            "identify_packed",
+            lambda: identify_packed(packed, offsets),
+            count,
+            "records/s",
+        ),
+    ]
+    jobs = default_jobs()
+    if jobs > 1:
+        cases.append(
+            Case(
+                f"identify_many_jobs{jobs}",
+                lambda: identify_many(records, jobs),
+                count,
+                "records/s",
+            )
+        )
+    return cases
+
+
+def bench_backends(workdir: str, quick: bool) -> List[Case]:
+    """SHA-512 backends: large updates and 128-byte pair sums"""
+    from . import backends
+
+    size = (4 if quick else 64) * 1024 * 1024
+    count = 10000 if quick else 200000
+    chunk = memoryview(os.urandom(64 * 1024))
+    pair = os.urandom(128)
+    cases = []
+    for name in backends.available():
+        if name == "python":
+            continue
+        new = backends.load(name)
+
+        def stream(new: Callable[..., Any] = new) -> None:
+            hasher = new()
+            for _ in range(size // len(chunk)):
+                hasher.update(chunk)
+            hasher.digest()
+
+        def sums(new: Callable[..., Any] = new) -> None:
+            for _ in range(count):
+                new(pair).digest()
+
+        cases.append(Case(f"{name}_stream", stream, size / MB, "MB/s"))
+        cases.append(Case(f"{name}_sum", sums, count, "sums/s"))
+    return cases
+
+
+def bench_tree(workdir: str, quick: bool) -> List[Case]:
+    """Tree ID reduction"""
+    from .tree import Tree
+
+    count = 10000 if quick else 200000
+    leaves = b"".join(
+        hashlib.sha512(i.to_bytes(8, "big")).digest() for i in range(count)
+    )
+    return [
+        Case("tree_reduce", lambda: Tree.from_buffer(leaves).id(), count, "leaves/s")
+    ]
+
+
+def bench_startup(workdir: str, quick: bool) -> List[Case]:
+    """Fresh interpreter starts: bare, ``import c4py`` and ``c4py --version``"""
+    count = 5 if quick else 20
+    env = dict(os.environ)
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [package_root, env.get("PYTHONPATH")])
+    )
+
+    def spawn(*args: str) -> Callable[[], None]:
+        def run() -> None:
+            for _ in range(count):
+                subprocess.run(
+                    [sys.executable, *args], env=env, check=True, capture_output=True
+                )
+
+        return run
+
+    return [
+        Case("bare_interpreter", spawn("-c", "pass"), count, "starts/s"),
+        Case("import_c4py", spawn("-c", "import c4py"), count, "starts/s"),
+        Case("version", spawn("-m", "c4py", "--version"), count, "starts/s"),
+        Case("id_file", spawn("-m", "c4py", os.devnull), count, "starts/s"),
+    ]
+
+
+BENCHMARKS: Dict[str, Callable[[str, bool], List[Case]]] = {
+    "codec": bench_codec,
+    "digest": bench_digest,
+    "hashing": bench_hashing,
+    "batch": bench_batch,
+    "backends": bench_backends,
+    "walk": bench_walk,
+    "tree": bench_tree,
+    "startup": bench_startup,
+}
+
+
+def _max_rss_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - not available on Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def run(
+    groups: Optional[Iterable[str]] = None,
+    quick: bool = False,
+    repeat: int = 3,
+    report: Optional[Callable[[str, str, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Run benchmark groups and return a JSON-serialisable result document"""
+    selected = list(groups) if groups else list(BENCHMARKS)
+    results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    with tempfile.TemporaryDirectory(prefix="c4py-bench-") as workdir:
+        for group in selected:
+            groupdir = os.path.join(workdir, group)
+            os.mkdir(groupdir)
+            results[group] = {}
+            for case in BENCHMARKS[group](groupdir, quick):
+                entry = {
+                    "rate": best_rate(case.fn, case.work, repeat),
+                    "unit": case.unit,
+                    "peak_bytes": peak_memory(case.fn),
+                }
+                results[group][case.name] = entry
+                if report is not None:
+                    report(group, case.name, entry)
+
+    return {
+        "c4py": __version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "quick": quick,
+        "max_rss_bytes": _max_rss_bytes(),
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, float]:
+    """Ratio of current to baseline rate for every case present in both"""
+    ratios = {}
+    for group, cases in current["results"].items():
+        for name, entry in cases.items():
+            old = baseline.get("results", {}).get(group, {}).get(name)
+            if old and old["rate"]:
+                ratios[f"{group}.{name}"] = entry["rate"] / old["rate"]
+    return ratios
+
+
+def format_entry(group: str, name: str, entry: Dict[str, Any]) -> str:
+    label = f"{group}.{name}"
+    return (
+        f"{label:<32} {entry['rate']:>14,.1f} {entry['unit']:<10}"
+        f" peak {entry['peak_bytes'] / MB:>8.2f} MB"
+    )
+
+
+def save(doc: Dict[str, Any], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(doc, f, indent=2)
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m c4py.bench")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("groups", nargs="*", help=", ".join(BENCHMARKS))
+    args = parser.parse_args(argv)
+    unknown = [g for g in args.groups if g not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark group: {', '.join(unknown)}")
+    doc = run(
+        args.groups,
+        args.quick,
+        report=lambda g, n, e: print(format_entry(g, n, e), flush=True),
+    )
+    if args.output:
+        save(doc, args.output)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
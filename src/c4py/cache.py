@@ -0,0 +1,134 @@
+import os
+import sqlite3
+import time
+from types import TracebackType
+from typing import Optional, Type
+
+from .id import ID, Digest
+
+# Files modified this recently are not cached: on filesystems with coarse
+# timestamps a later write could land in the same mtime tick.
+RACY_WINDOW_NS = 2 * 10**9
+
+# Number of stores between commits
+COMMIT_INTERVAL = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ids (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    PRIMARY KEY (dev, ino)
+)
+"""
+
+
+class IDCache:
+    """Persistent cache of file IDs keyed on (device, inode, size, mtime_ns).
+
+    A stored ID is reused only when all four stat fields still match, so an
+    unchanged file is identified with a single ``stat`` call.  The cache is
+    a SQLite database and is not shared between threads; the parallel engine
+    consults it from the calling thread only.  Pass ``check_same_thread=False``
+    to use one cache from several threads behind a lock of your own.
+    """
+
+    def __init__(self, path: str, check_same_thread: bool = True) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=check_same_thread)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._pending = 0
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, st: os.stat_result) -> Optional[ID]:
+        """Return the cached ID for a stat result, or None"""
+        row = self._conn.execute(
+            "SELECT digest FROM ids WHERE dev = ? AND ino = ? AND size = ? "
+            "AND mtime_ns = ?",
+            (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return Digest(row[0]).id()
+
+    def store(self, path: str, st: os.stat_result, id_obj: ID) -> None:
+        """Record the ID of a file hashed with the given stat result"""
+        if time.time_ns() - st.st_mtime_ns < RACY_WINDOW_NS:
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO ids VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                st.st_dev,
+                st.st_ino,
+                st.st_size,
+                st.st_mtime_ns,
+                os.path.abspath(path),
+                bytes(id_obj.digest()),
+            ),
+        )
+        self._pending += 1
+        if self._pending >= COMMIT_INTERVAL:
+            self.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM ids").fetchone()[0]
+
+    def prune(self) -> int:
+        """Evict entries whose file is gone or has changed, returning the count"""
+        stale = []
+        for dev, ino, size, mtime_ns, path in self._conn.execute(
+            "SELECT dev, ino, size, mtime_ns, path FROM ids"
+        ):
+            try:
+                st = os.stat(path)
+            except OSError:
+                stale.append((dev, ino))
+                continue
+            if (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns) != (
+                dev,
+                ino,
+                size,
+                mtime_ns,
+            ):
+                stale.append((dev, ino))
+
+        self._conn.executemany("DELETE FROM ids WHERE dev = ? AND ino = ?", stale)
+        self.commit()
+        return len(stale)
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        self._conn.execute("DELETE FROM ids")
+        self.commit()
+
+    def compact(self) -> None:
+        """Reclaim space left by deleted entries"""
+        self.commit()
+        self._conn.execute("VACUUM")
+
+    def commit(self) -> None:
+        self._conn.commit()
+        self._pending = 0
+
+    def close(self) -> None:
+        self.commit()
+        self._conn.close()
+
+    def __enter__(self) -> "IDCache":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
@@ -0,0 +1,186 @@
+"""Chunked (block-tree) IDs for very large files.
+
+A block-tree ID is *not* a standard C4 ID and never equals the C4 ID of the
+same content.  The file is split into fixed-size blocks; each leaf is the
+SHA-512 of the block's 8-byte big-endian offset followed by its bytes, so
+the leaves are bound to their positions.  The leaves are then combined in
+file order, pairwise with ``Digest.sum`` semantics (see
+``tree.reduce_level``), into one root.  Blocks hash independently, so a
+single file is hashed on many cores, and a stored tree lets byte ranges be
+re-verified without reading the rest of the file.
+"""
+
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, List, Optional, Union
+
+from .id import ID, Digest, get_sha512
+from .parallel import default_jobs
+from .tree import DIGEST_SIZE, reduce_level
+
+DEFAULT_BLOCK_SIZE = 16 * 1024 * 1024
+
+TREE_MAGIC = b"C4BT"
+TREE_VERSION = 1
+# magic, version, block size, file size
+TREE_HEADER = struct.Struct("<4sHQQ")
+
+
+def hash_block(data: Union[bytes, bytearray, memoryview], offset: int) -> bytes:
+    """Leaf digest of the block starting at ``offset``"""
+    h = get_sha512()(offset.to_bytes(8, "big"))
+    h.update(data)
+    return h.digest()
+
+
+def _read_block(fd: int, offset: int, size: int) -> bytes:
+    if hasattr(os, "pread"):
+        return os.pread(fd, size, offset)
+    with os.fdopen(os.dup(fd), "rb") as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+class BlockTree:
+    """Leaves and reduced levels of a file's block tree"""
+
+    def __init__(self, block_size: int, size: int, leaves: bytes) -> None:
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        if len(leaves) != block_count(size, block_size) * DIGEST_SIZE:
+            raise ValueError("leaf count does not match the file size")
+        self.block_size = block_size
+        self.size = size
+        self._levels: List[bytes] = [leaves]
+        while len(self._levels[-1]) > DIGEST_SIZE:
+            self._levels.append(reduce_level(self._levels[-1]))
+
+    def __len__(self) -> int:
+        return len(self._levels[0]) // DIGEST_SIZE
+
+    def leaf(self, index: int) -> bytes:
+        start = index * DIGEST_SIZE
+        return self._levels[0][start : start + DIGEST_SIZE]
+
+    def levels(self) -> List[bytes]:
+        """All levels from the leaves up to the root"""
+        return list(self._levels)
+
+    def digest(self) -> Digest:
+        return Digest(self._levels[-1])
+
+    def id(self) -> ID:
+        """The block-tree ID (not comparable with standard C4 IDs)"""
+        return self.digest().id()
+
+    def tobytes(self) -> bytes:
+        """Serialize the header and leaves; upper levels are recomputed on load"""
+        header = TREE_HEADER.pack(TREE_MAGIC, TREE_VERSION, self.block_size, self.size)
+        return header + self._levels[0]
+
+    @classmethod
+    def frombytes(cls, data: bytes) -> "BlockTree":
+        if len(data) < TREE_HEADER.size:
+            raise ValueError("not a c4py block tree")
+        magic, version, block_size, size = TREE_HEADER.unpack_from(data)
+        if magic != TREE_MAGIC or version != TREE_VERSION:
+            raise ValueError("not a c4py block tree")
+        return cls(block_size, size, bytes(data[TREE_HEADER.size :]))
+
+
+def block_count(size: int, block_size: int) -> int:
+    # An empty file still has one (empty) block
+    return max(1, -(-size // block_size))
+
+
+def _hash_blocks(
+    fd: int, offsets: List[int], block_size: int, jobs: int
+) -> List[bytes]:
+    def leaf(offset: int) -> bytes:
+        return hash_block(_read_block(fd, offset, block_size), offset)
+
+    if jobs == 1 or len(offsets) == 1:
+        return [leaf(offset) for offset in offsets]
+    # SHA-512 releases the GIL on large buffers, so threads use every core
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(leaf, offsets))
+
+
+def identify_chunked(
+    path: str, block_size: int = DEFAULT_BLOCK_SIZE, jobs: int = 0
+) -> BlockTree:
+    """Build the block tree of a file, hashing blocks on ``jobs`` threads.
+
+    ``jobs`` of 0 means one per CPU.  At most ``jobs`` blocks are held in
+    memory at once.
+    """
+    if block_size <= 0:
+        raise ValueError("block_size must be positive")
+    if jobs <= 0:
+        jobs = default_jobs()
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        offsets = [i * block_size for i in range(block_count(size, block_size))]
+        leaves = _hash_blocks(f.fileno(), offsets, block_size, jobs)
+    return BlockTree(block_size, size, b"".join(leaves))
+
+
+def identify_chunked_stream(
+    src: BinaryIO, block_size: int = DEFAULT_BLOCK_SIZE
+) -> BlockTree:
+    """Build the block tree of a stream, one block at a time"""
+    leaves = []
+    offset = 0
+    while True:
+        block = src.read(block_size)
+        # Pipes and sockets may return less than asked before the end
+        while 0 < len(block) < block_size:
+            more = src.read(block_size - len(block))
+            if not more:
+                break
+            block += more
+        if not block and leaves:
+            break
+        leaves.append(hash_block(block, offset))
+        offset += len(block)
+        if len(block) < block_size:
+            break
+    return BlockTree(block_size, offset, b"".join(leaves))
+
+
+def verify_range(
+    path: str,
+    tree: BlockTree,
+    start: int = 0,
+    end: Optional[int] = None,
+    jobs: int = 0,
+) -> List[int]:
+    """Rehash only the blocks overlapping ``[start, end)`` of a file.
+
+    Returns the indexes of blocks that no longer match ``tree``; blocks
+    outside the range are not read.  A file whose size changed fails every
+    block past the shorter of the two lengths.  Raises ValueError if
+    ``start`` is past the end of the tree or ``end`` is not after ``start``;
+    an ``end`` past the tree is clamped to it.
+    """
+    if start < 0 or (start and start >= tree.size):
+        raise ValueError(f"range start {start} is outside the {tree.size}-byte file")
+    if end is not None and end <= start:
+        raise ValueError(f"range end {end} is not after start {start}")
+    if end is None:
+        end = tree.size
+    if jobs <= 0:
+        jobs = default_jobs()
+    first = start // tree.block_size
+    last = min(len(tree), -(-end // tree.block_size))
+    indexes = list(range(first, max(first + 1, last)))
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        offsets = [i * tree.block_size for i in indexes]
+        leaves = _hash_blocks(f.fileno(), offsets, tree.block_size, jobs)
+    bad = [i for i, leaf in zip(indexes, leaves) if leaf != tree.leaf(i)]
+    if size != tree.size:
+        changed_from = min(size, tree.size) // tree.block_size
+        bad = sorted(set(bad) | {i for i in indexes if i >= changed_from})
+    return bad
@@ -1,15 +1,37 @@
 # src/c4py/cli.py
 import os
-import datetime
 import sys
-from typing import Optional, List, Tuple
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterator,
+    Optional,
+    List,
+    Tuple,
+)
 import click
-from . import identify, ID
+from . import __version__, identify, ID
 
+# Names of the writers in c4py.formats, which is only imported when used
+OUTPUT_FORMATS = ["text", "bin", "c4m", "csv", "jsonl"]
 
-def get_file_metadata(path: str) -> dict:
-    """Get metadata for a file"""
-    stat = os.stat(path)
+# Engine, cache and tree modules are imported where they are used, so each
+# command only pays for the modules it needs
+if TYPE_CHECKING:
+    from .cache import IDCache
+    from .diff import Change, ManifestIndex
+    from .formats import ManifestWriter
+    from .parallel import FileResult
+    from .walk import PathFilter
+
+
+def get_file_metadata(path: str, stat: Optional[os.stat_result] = None) -> dict:
+    """Get metadata for a file, reusing a stat result when one is given"""
+    import datetime
+
+    if stat is None:
+        stat = os.stat(path)
     return {
         "size": stat.st_size,
         "modified": datetime.datetime.fromtimestamp(stat.st_mtime).isoformat(),
@@ -19,7 +41,12 @@ def get_file_metadata(path: str) -> dict:
 
 
 def format_output(
-    path: str, id_obj: ID, verbose: bool, path_first: bool, metadata: bool = False
+    path: str,
+    id_obj: ID,
+    verbose: bool,
+    path_first: bool,
+    metadata: bool = False,
+    stat: Optional[os.stat_result] = None,
 ) -> str:
     """Format the output according to CLI options"""
     if not verbose and not metadata:
@@ -28,7 +55,7 @@ def format_output(
     parts = []
 
     if metadata:
-        meta = get_file_metadata(path)
+        meta = get_file_metadata(path, stat)
         if path_first:
             parts.extend(
                 [
@@ -57,69 +84,327 @@ def format_output(
     return f"{str(id_obj)}: {path}"
 
 
-def identify_file(path: str) -> Optional[ID]:
-    """Identify a single file"""
+def report_error(path: str, error: Exception) -> None:
+    """Report a per-file error without aborting the run"""
+    click.echo(f"Error processing {path}: {error}", err=True)
+
+
+SIZE_SUFFIXES = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+def byte_count(value: str) -> int:
+    """Parse a byte count with an optional K, M or G suffix"""
+    text = value.strip().upper().rstrip("B")
+    suffix = text[-1:] if text[-1:] in SIZE_SUFFIXES else ""
     try:
-        with open(path, "rb") as f:
-            return identify(f)
-    except Exception as e:
-        click.echo(f"Error processing {path}: {e}", err=True)
+        size = int(text[: len(text) - len(suffix)]) * SIZE_SUFFIXES[suffix]
+    except ValueError:
+        raise click.BadParameter(f"{value!r} is not a size") from None
+    if size < 0:
+        raise click.BadParameter(f"{value!r} is negative")
+    return size
+
+
+def parse_size(ctx: click.Context, param: click.Parameter, value: str) -> int:
+    size = byte_count(value)
+    if size == 0:
+        raise click.BadParameter("size must be positive")
+    return size
+
+
+def parse_range(
+    ctx: click.Context, param: click.Parameter, value: Optional[str]
+) -> Optional[Tuple[int, Optional[int]]]:
+    """Parse START:END into byte offsets; either side may be left empty"""
+    if value is None:
         return None
+    start, sep, end = value.partition(":")
+    if not sep:
+        raise click.BadParameter("expected START:END")
+    return byte_count(start) if start else 0, byte_count(end) if end else None
+
+
+def open_cache(path: str) -> "IDCache":
+    """Open an ID cache, reporting failures as usage errors"""
+    import sqlite3
+
+    from .cache import IDCache
+
+    try:
+        return IDCache(path)
+    except (sqlite3.Error, OSError) as e:
+        raise click.ClickException(f"cannot open cache {path}: {e}") from None
+
+
+def identify_file(path: str, cache: Optional["IDCache"] = None) -> Optional[ID]:
+    """Identify a single file"""
+    from .parallel import identify_paths
+
+    for _, file_id in identify_paths([path], on_error=report_error, cache=cache):
+        return file_id
+    return None
+
+
+def walk_files(
+    path: str,
+    follow_links: bool,
+    depth: int,
+    absolute: bool,
+    path_filter: Optional["PathFilter"] = None,
+) -> Iterator[str]:
+    """Yield file paths under a directory in walk order"""
+    from .walk import walk
+
+    for entry in walk(path, follow_links, depth, path_filter, report_error):
+        yield os.path.abspath(entry.path) if absolute else entry.path
 
 
 def process_directory(
-    path: str, follow_links: bool, depth: int, absolute: bool
-) -> List[Tuple[str, ID]]:
-    """Process a directory recursively"""
-    results = []
+    path: str,
+    follow_links: bool,
+    depth: int,
+    absolute: bool,
+    jobs: int = 1,
+    processes: bool = False,
+    cache: Optional["IDCache"] = None,
+    stat: bool = False,
+    path_filter: Optional["PathFilter"] = None,
+) -> Iterator["FileResult"]:
+    """Process a directory recursively, yielding results as they are hashed
+
+    Each inode is hashed once: hard links (and, with follow_links, files
+    reached through several symlinks) reuse the first path's ID.
+    """
+    from .parallel import InodeIndex, identify_files
 
     try:
-        for root, dirs, files in os.walk(path, followlinks=follow_links):
-            # Check depth limit
-            if depth > 0:
-                rel_depth = len(os.path.relpath(root, path).split(os.sep))
-                if rel_depth > depth:
-                    continue
-
-            for file in files:
-                file_path = os.path.join(root, file)
-                if absolute:
-                    file_path = os.path.abspath(file_path)
-
-                file_id = identify_file(file_path)
-                if file_id is not None:
-                    results.append((file_path, file_id))
+        files = walk_files(path, follow_links, depth, absolute, path_filter)
+        yield from identify_files(
+            files,
+            jobs=jobs,
+            processes=processes,
+            on_error=report_error,
+            cache=cache,
+            stat=stat,
+            inodes=InodeIndex(all_files=follow_links),
+        )
     except Exception as e:
         click.echo(f"Error processing directory {path}: {e}", err=True)
 
-    return results
 
+class DefaultGroup(click.Group):
+    """Group that falls back to a default command.
+
+    ``c4py FILE...`` keeps working alongside subcommands: anything that is
+    not a subcommand name or one of the group's own options is passed to
+    the default command.  Use ``c4py id NAME`` (or ``c4py -- NAME``) to
+    identify a file that shares a subcommand's name.
+    """
+
+    def __init__(self, *args: Any, default_command: str, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx: click.Context, args: List[str]) -> List[str]:
+        # Skip the group's own leading options (and their values); eager ones
+        # such as --help and --version exit before the default is invoked
+        takes_value = {
+            opt: not getattr(param, "is_flag", False)
+            for param in self.get_params(ctx)
+            for opt in param.opts
+        }
+        i = 0
+        while i < len(args):
+            name, eq, _ = args[i].partition("=")
+            if name not in takes_value:
+                break
+            i += 2 if takes_value[name] and not eq else 1
+        if i >= len(args) or args[i] not in self.commands:
+            args = args[:i] + [self.default_command] + args[i:]
+        return super().parse_args(ctx, args)
 
-@click.command()
-@click.version_option(version="0.1.0", prog_name="c4py")
+    def format_options(self, ctx: click.Context, formatter: Any) -> None:
+        # Show the default command's options in the top-level help
+        click.Command.format_options(self, ctx, formatter)
+        default = self.commands[self.default_command]
+        records = [
+            record
+            for param in default.get_params(ctx)
+            if "--help" not in param.opts
+            for record in [param.get_help_record(ctx)]
+            if record is not None
+        ]
+        with formatter.section(f"Options for '{self.default_command}'"):
+            formatter.write_dl(records)
+        self.format_commands(ctx, formatter)
+
+
+@click.group(cls=DefaultGroup, default_command="id")
+@click.version_option(version=__version__, prog_name="c4py")
+@click.option(
+    "--hash-backend",
+    metavar="NAME",
+    help="SHA-512 implementation: hashlib, libcrypto, pycryptodome, python, "
+    "or auto for the fastest (env: C4PY_HASH_BACKEND)",
+)
+def main(hash_backend: Optional[str]) -> None:
+    """Generate C4 IDs for files and data.
+
+    With no command, FILES are identified as by 'c4py id'.
+    """
+    if hash_backend:
+        from .backends import use
+
+        try:
+            name = use(hash_backend)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="'--hash-backend'")
+        # Worker processes started with spawn pick the backend up from here
+        os.environ["C4PY_HASH_BACKEND"] = name
+
+
+@main.command("id")
 @click.option("--recursive", "-R", is_flag=True, help="Recursively identify all files")
 @click.option("--absolute", "-a", is_flag=True, help="Output absolute paths")
 @click.option("--links", "-L", is_flag=True, help="Follow symbolic links")
 @click.option("--depth", "-d", type=int, default=0, help="Directory depth limit")
+@click.option(
+    "--include",
+    multiple=True,
+    metavar="GLOB",
+    help="With -R, only identify files matching GLOB (repeatable)",
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    metavar="GLOB",
+    help="With -R, skip files and directories matching GLOB (repeatable)",
+)
 @click.option("--metadata", "-m", is_flag=True, help="Include metadata")
 @click.option("--verbose", "-V", is_flag=True, help="Include filenames in output")
 @click.option("--path-first", "-p", is_flag=True, help="Show path before ID in output")
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=0),
+    default=1,
+    help="Number of hashing workers for -R (0 = one per CPU)",
+)
+@click.option(
+    "--processes",
+    is_flag=True,
+    help="Use a process pool instead of threads for --jobs",
+)
+@click.option(
+    "--workers",
+    "-w",
+    type=click.IntRange(min=0),
+    help="Split the -R walk itself across N processes (0 = one per CPU); "
+    "output is unordered unless --sort, and the cache is not used",
+)
+@click.option(
+    "--cache",
+    "cache_path",
+    type=click.Path(dir_okay=False),
+    envvar="C4PY_CACHE",
+    help="ID cache database reused across runs (env: C4PY_CACHE)",
+)
+@click.option("--no-cache", is_flag=True, help="Ignore the ID cache")
+@click.option(
+    "--server",
+    "server_socket",
+    type=click.Path(dir_okay=False),
+    help="Send files to the 'c4py serve' listening on this socket instead of "
+    "hashing them here",
+)
+@click.option(
+    "--tree", "-t", is_flag=True, help="Output one tree ID for all identified files"
+)
+@click.option(
+    "--format",
+    "-f",
+    "output_format",
+    type=click.Choice(OUTPUT_FORMATS),
+    default="text",
+    help="Output format: text, or a jsonl/csv/c4m/bin manifest",
+)
+@click.option(
+    "--sort",
+    "sort_output",
+    is_flag=True,
+    help="Sort output by path (spills to temporary files on large trees)",
+)
+@click.option(
+    "--stats",
+    "show_stats",
+    is_flag=True,
+    help="Print throughput, time per phase and the slowest files to stderr",
+)
+@click.option(
+    "--progress", is_flag=True, help="Show a live files/bytes counter on stderr"
+)
+@click.option(
+    "--checkpoint",
+    "checkpoint_path",
+    type=click.Path(dir_okay=False),
+    help="Save hashing progress of stdin or one FILE here as it runs",
+)
+@click.option(
+    "--checkpoint-every",
+    default="1G",
+    callback=parse_size,
+    help="Bytes between checkpoints, with an optional K/M/G suffix (default: 1G)",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Continue from --checkpoint if it exists (a piped stdin must "
+    "restart at the checkpoint's offset; a file may only have grown)",
+)
 @click.argument(
     "files", nargs=-1, type=click.Path(exists=False)
 )  # Changed to exists=False to handle our own errors
-def main(
+def identify_command(
     recursive: bool,
     absolute: bool,
     links: bool,
     depth: int,
+    include: Tuple[str, ...],
+    exclude: Tuple[str, ...],
     metadata: bool,
     verbose: bool,
     path_first: bool,
+    jobs: int,
+    processes: bool,
+    workers: Optional[int],
+    cache_path: Optional[str],
+    no_cache: bool,
+    server_socket: Optional[str],
+    tree: bool,
+    output_format: str,
+    sort_output: bool,
+    show_stats: bool,
+    progress: bool,
+    checkpoint_path: Optional[str],
+    checkpoint_every: int,
+    resume: bool,
     files: Tuple[str, ...],
 ) -> None:
     """Generate C4 IDs for files and data."""
+    if checkpoint_path:
+        identify_checkpointed(
+            files, recursive, checkpoint_path, checkpoint_every, resume
+        )
+        return
+    if resume:
+        raise click.UsageError("--resume needs --checkpoint")
+    if show_stats or progress:
+        start_stats(show_stats, progress)
+
     # Handle stdin when no files provided
     if not files:
+        if output_format != "text":
+            raise click.UsageError(f"--format {output_format} needs FILE arguments")
         if not sys.stdin.isatty():
             try:
                 id_obj = identify(sys.stdin.buffer)
@@ -130,7 +415,170 @@ def main(
                 sys.exit(1)
         return
 
-    # Process each file
+    from operator import itemgetter
+    from .extsort import ExternalSorter
+    from .formats import MAX_DELAY, WRITERS, TextWriter
+    from .idarray import IDArray
+    from .parallel import FileResult
+    from .walk import PathFilter
+
+    cache = None
+    if cache_path and not no_cache and not server_socket:
+        cache = open_cache(cache_path)
+
+    leaves = IDArray()
+    sorter: Optional[ExternalSorter[FileResult]] = None
+    if sort_output and not tree:
+        sorter = ExternalSorter[FileResult](key=itemgetter(0))
+    need_stat = metadata or output_format != "text"
+    stdout = sys.stdout.buffer
+    # Results are written as they arrive, so don't let them wait in a batch
+    max_delay = None if tree or sort_output else MAX_DELAY
+    writer: "ManifestWriter"
+    if output_format == "text":
+        writer = TextWriter(
+            stdout,
+            lambda path, id_obj, st: format_output(
+                path, id_obj, verbose, path_first, metadata, st
+            ),
+            max_delay=max_delay,
+        )
+    else:
+        writer = WRITERS[output_format](stdout, max_delay=max_delay)
+
+    write = writer.write
+    if show_stats:
+        from . import stats
+
+        def write(*record: Any) -> None:
+            start = stats.clock()
+            writer.write(*record)
+            stats.phase(stats.FORMAT, stats.clock() - start)
+
+    def emit(result: FileResult) -> None:
+        if tree:
+            leaves.append(result.id)
+        elif sorter is not None:
+            sorter.add(result)
+        else:
+            write(*result)
+
+    try:
+        if server_socket:
+            exit_status = identify_remote(
+                server_socket,
+                files,
+                recursive,
+                absolute,
+                links,
+                depth,
+                need_stat,
+                emit,
+                PathFilter(include, exclude),
+            )
+        else:
+            exit_status = identify_all(
+                files,
+                recursive,
+                absolute,
+                links,
+                depth,
+                jobs,
+                processes,
+                cache,
+                need_stat,
+                emit,
+                workers,
+                PathFilter(include, exclude),
+            )
+    finally:
+        if cache is not None:
+            cache.close()
+
+    if tree:
+        from .parallel import default_jobs
+        from .tree import Tree
+
+        tree_id = Tree.from_buffer(leaves.buffer).compute(jobs or default_jobs()).id()
+        if tree_id is not None:
+            click.echo(str(tree_id))
+    else:
+        if sorter is not None:
+            for result in sorter:
+                write(*result)
+        writer.close()
+
+    if exit_status != 0:
+        sys.exit(exit_status)
+
+
+def start_stats(show_stats: bool, progress: bool) -> None:
+    """Register stats hooks for this command, reporting when it finishes"""
+    from . import stats
+
+    hooks: List[stats.Hook] = []
+    if progress:
+        hooks.append(stats.Progress(sys.stderr))
+    if show_stats:
+        run = stats.RunStats()
+        hooks.append(run)
+    for hook in hooks:
+        hook.__enter__()
+
+    def finish() -> None:
+        for hook in hooks:
+            hook.__exit__(None, None, None)
+        if show_stats:
+            click.echo(run.report(), err=True)
+
+    click.get_current_context().call_on_close(finish)
+
+
+def identify_checkpointed(
+    files: Tuple[str, ...],
+    recursive: bool,
+    checkpoint_path: str,
+    every: int,
+    resume: bool,
+) -> None:
+    """Identify stdin or one file, checkpointing so a crash can resume"""
+    from .resumable import identify_resumable
+
+    if len(files) > 1 or recursive:
+        raise click.UsageError("--checkpoint takes stdin or a single FILE")
+    try:
+        if files:
+            with open(files[0], "rb") as f:
+                file_id = identify_resumable(f, checkpoint_path, every, resume)
+        else:
+            file_id = identify_resumable(
+                sys.stdin.buffer, checkpoint_path, every, resume
+            )
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--checkpoint") from None
+    except OSError as e:
+        report_error(files[0] if files else "stdin", e)
+        sys.exit(1)
+    click.echo(str(file_id))
+
+
+def identify_all(
+    files: Tuple[str, ...],
+    recursive: bool,
+    absolute: bool,
+    links: bool,
+    depth: int,
+    jobs: int,
+    processes: bool,
+    cache: Optional["IDCache"],
+    stat: bool,
+    emit: Callable[["FileResult"], None],
+    workers: Optional[int] = None,
+    path_filter: Optional["PathFilter"] = None,
+) -> int:
+    """Identify each path argument, passing results to emit; returns exit status"""
+    from .parallel import FileResult
+
     exit_status = 0
     for path in files:
         if not os.path.exists(path):
@@ -140,22 +588,613 @@ def main(
 
         try:
             if os.path.isdir(path) and recursive:
-                results = process_directory(path, links, depth, absolute)
-                for file_path, file_id in results:
-                    click.echo(
-                        format_output(file_path, file_id, verbose, path_first, metadata)
+                if workers is not None:
+                    from .manifest import build_manifest
+
+                    results = build_manifest(
+                        path,
+                        workers,
+                        links,
+                        depth,
+                        absolute,
+                        report_error,
+                        path_filter=path_filter,
                     )
+                else:
+                    results = process_directory(
+                        path,
+                        links,
+                        depth,
+                        absolute,
+                        jobs,
+                        processes,
+                        cache,
+                        stat,
+                        path_filter,
+                    )
+                for result in results:
+                    emit(result)
             else:
-                single_file_id = identify_file(path)
+                single_file_id = identify_file(path, cache)
                 if single_file_id is not None:
-                    click.echo(
-                        format_output(
-                            path, single_file_id, verbose, path_first, metadata
-                        )
-                    )
+                    st = os.stat(path) if stat else None
+                    emit(FileResult(path, single_file_id, st))
         except Exception as e:
             click.echo(f"Error processing {path}: {e}", err=True)
             exit_status = 1
 
+    return exit_status
+
+
+def identify_remote(
+    socket_path: str,
+    files: Tuple[str, ...],
+    recursive: bool,
+    absolute: bool,
+    links: bool,
+    depth: int,
+    stat: bool,
+    emit: Callable[["FileResult"], None],
+    path_filter: Optional["PathFilter"] = None,
+) -> int:
+    """identify_all through a running server; directories are walked here"""
+    from .parallel import FileResult
+    from .server import Client
+
+    try:
+        client = Client(socket_path)
+    except OSError as e:
+        raise click.ClickException(f"cannot connect to server at {socket_path}: {e}")
+
+    exit_status = 0
+
+    def paths() -> Iterator[str]:
+        nonlocal exit_status
+        for path in files:
+            if not os.path.exists(path):
+                click.echo(f"Error: Path '{path}' does not exist.", err=True)
+                exit_status = 1
+            elif os.path.isdir(path) and recursive:
+                yield from walk_files(path, links, depth, absolute, path_filter)
+            else:
+                yield path
+
+    with client:
+        for path, file_id in client.identify_paths(paths(), on_error=report_error):
+            emit(FileResult(path, file_id, os.stat(path) if stat else None))
+    return exit_status
+
+
+@main.command("dupes")
+@click.option("--links", "-L", is_flag=True, help="Follow symbolic links")
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=0),
+    default=1,
+    help="Number of hashing workers (0 = one per CPU)",
+)
+@click.option(
+    "--min-size",
+    type=click.IntRange(min=0),
+    default=1,
+    help="Ignore files smaller than this many bytes",
+)
+@click.option(
+    "--format",
+    "-f",
+    "output_format",
+    type=click.Choice(["text", "jsonl"]),
+    default="text",
+    help="Output format",
+)
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+def dupes_command(
+    links: bool,
+    jobs: int,
+    min_size: int,
+    output_format: str,
+    paths: Tuple[str, ...],
+) -> None:
+    """Find files with identical content under PATHS.
+
+    Files are compared by size, then by a hash of their first and last
+    blocks; only the remaining candidates are read in full.
+    """
+    import json
+    from .dupes import DupeStats, find_duplicates
+
+    def files() -> Iterator[str]:
+        for path in paths:
+            if os.path.isdir(path):
+                yield from walk_files(path, links, 0, False)
+            else:
+                yield path
+
+    stats = DupeStats()
+    groups = find_duplicates(
+        files(), jobs, min_size, on_error=report_error, stats=stats
+    )
+    for group in groups:
+        if output_format == "jsonl":
+            record = {"id": str(group.id), "size": group.size, "paths": group.paths}
+            click.echo(json.dumps(record))
+        else:
+            click.echo(f"{group.id} {group.size} bytes x {len(group.paths)}")
+            for path in group.paths:
+                click.echo(f"  {path}")
+    click.echo(
+        f"{len(groups)} duplicate groups in {stats.files} files; "
+        f"read {stats.bytes_hashed} of {stats.bytes_total} bytes in full",
+        err=True,
+    )
+
+
+@main.command("chunked")
+@click.option(
+    "--block-size",
+    "-b",
+    default="16M",
+    callback=parse_size,
+    help="Block size, with an optional K/M/G suffix (default: 16M)",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=0),
+    default=0,
+    help="Number of threads hashing blocks (0 = one per CPU)",
+)
+@click.option(
+    "--save",
+    "save_path",
+    type=click.Path(dir_okay=False),
+    help="Write the block tree of FILE here for later --check runs",
+)
+@click.option(
+    "--check",
+    "check_path",
+    type=click.File("rb"),
+    help="Rehash FILE against a tree saved with --save",
+)
+@click.option(
+    "--range",
+    "byte_range",
+    callback=parse_range,
+    help="With --check, only rehash blocks overlapping START:END",
+)
+@click.argument("files", nargs=-1, required=True, type=click.Path(dir_okay=False))
+def chunked_command(
+    block_size: int,
+    jobs: int,
+    save_path: Optional[str],
+    check_path: Any,
+    byte_range: Optional[Tuple[int, Optional[int]]],
+    files: Tuple[str, ...],
+) -> None:
+    """Block-tree IDs for large files, hashed across cores.
+
+    A block-tree ID is NOT a C4 ID: it depends on the block size and never
+    matches 'c4py id' for the same content.  Use it to split the hashing of
+    one huge file across cores and to re-verify parts of it later.
+    """
+    from .chunked import BlockTree, identify_chunked, verify_range
+
+    if (save_path or check_path) and len(files) != 1:
+        raise click.UsageError("--save and --check take exactly one FILE")
+    if byte_range is not None and check_path is None:
+        raise click.UsageError("--range needs --check")
+
+    if check_path is not None:
+        try:
+            tree = BlockTree.frombytes(check_path.read())
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--check") from None
+        start, end = byte_range or (0, None)
+        try:
+            bad = verify_range(files[0], tree, start, end, jobs)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--range") from None
+        except OSError as e:
+            report_error(files[0], e)
+            sys.exit(1)
+        for index in bad:
+            offset = index * tree.block_size
+            click.echo(f"block {index} at {offset} differs: {files[0]}")
+        if bad:
+            sys.exit(1)
+        return
+
+    exit_status = 0
+    for path in files:
+        try:
+            tree = identify_chunked(path, block_size, jobs)
+        except OSError as e:
+            report_error(path, e)
+            exit_status = 1
+            continue
+        click.echo(f"{tree.id()}: {path}" if len(files) > 1 else str(tree.id()))
+        if save_path:
+            with open(save_path, "wb") as f:
+                f.write(tree.tobytes())
     if exit_status != 0:
         sys.exit(exit_status)
+
+
+MANIFEST_FORMATS = ["text", "jsonl", "csv", "c4m", "bin"]
+
+CHANGE_MARKS = {"added": "A", "removed": "D", "modified": "M", "moved": "R"}
+
+
+def report_changes(changes: List["Change"]) -> None:
+    """Print changes one per line, git-style; exits 1 if there are any"""
+    for change in changes:
+        mark = CHANGE_MARKS[change.status]
+        if change.old_path is not None:
+            click.echo(f"{mark} {change.old_path} -> {change.path}")
+        else:
+            click.echo(f"{mark} {change.path}")
+    if changes:
+        sys.exit(1)
+
+
+def load_manifest(stream: Any, fmt: Optional[str]) -> "ManifestIndex":
+    from .diff import load_index
+    from .errors import ErrBadChar, ErrBadLength
+    from .formats import read_manifest
+
+    try:
+        return load_index(read_manifest(stream, fmt))
+    except (ValueError, KeyError, ErrBadChar, ErrBadLength) as e:
+        raise click.BadParameter(
+            f"cannot read {stream.name}: {e}", param_hint="MANIFEST"
+        ) from None
+
+
+@main.command("verify")
+@click.option("--absolute", "-a", is_flag=True, help="Walk with absolute paths")
+@click.option("--links", "-L", is_flag=True, help="Follow symbolic links")
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=0),
+    default=1,
+    help="Number of hashing workers (0 = one per CPU)",
+)
+@click.option(
+    "--format",
+    "-f",
+    "manifest_format",
+    type=click.Choice(MANIFEST_FORMATS),
+    help="Manifest format (detected by default)",
+)
+@click.argument("manifest", type=click.File("rb"))
+@click.argument("directories", nargs=-1, type=click.Path(exists=True, file_okay=False))
+def verify_command(
+    absolute: bool,
+    links: bool,
+    jobs: int,
+    manifest_format: Optional[str],
+    manifest: Any,
+    directories: Tuple[str, ...],
+) -> None:
+    """Check files against MANIFEST.
+
+    Files whose size and modification time match the manifest are trusted;
+    only the others are rehashed. With DIRECTORIES, files found there but
+    not in the manifest are reported as added (or moved). Prints one line
+    per change (A, D, M or R) and exits with status 1 if there are any.
+    """
+    from .diff import VerifyStats, verify_tree
+
+    index = load_manifest(manifest, manifest_format)
+    tree = None
+    if directories:
+        tree = [
+            path
+            for directory in directories
+            for path in walk_files(directory, links, 0, absolute)
+        ]
+    stats = VerifyStats()
+    changes = verify_tree(index, tree, jobs, report_error, stats)
+    click.echo(
+        f"{stats.checked} entries checked, {stats.rehashed} files rehashed",
+        err=True,
+    )
+    report_changes(changes)
+
+
+@main.command("diff")
+@click.option(
+    "--format",
+    "-f",
+    "manifest_format",
+    type=click.Choice(MANIFEST_FORMATS),
+    help="Manifest format (detected by default)",
+)
+@click.argument("old", type=click.File("rb"))
+@click.argument("new", type=click.File("rb"))
+def diff_command(manifest_format: Optional[str], old: Any, new: Any) -> None:
+    """Compare two manifests.
+
+    Prints one line per added (A), removed (D), modified (M) or moved (R)
+    path and exits with status 1 if they differ.
+    """
+    from .diff import diff_manifests
+
+    changes = diff_manifests(
+        load_manifest(old, manifest_format), load_manifest(new, manifest_format)
+    )
+    report_changes(changes)
+
+
+@main.command("watch")
+@click.option(
+    "--include",
+    multiple=True,
+    help="Only watch files matching this glob (repeatable)",
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    help="Skip files and directories matching this glob (repeatable)",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=0),
+    default=1,
+    help="Number of hashing workers (0 = one per CPU)",
+)
+@click.option(
+    "--cache",
+    "cache_path",
+    type=click.Path(dir_okay=False),
+    envvar="C4PY_CACHE",
+    help="ID cache database for the initial scan (env: C4PY_CACHE)",
+)
+@click.option(
+    "--debounce",
+    type=click.FloatRange(min=0),
+    default=0.2,
+    help="Seconds a file must be left alone before it is hashed (default: 0.2)",
+)
+@click.option("--poll", "polling", is_flag=True, help="Poll instead of using inotify")
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0),
+    default=1.0,
+    help="Seconds between passes when polling (default: 1)",
+)
+@click.option(
+    "--initial", is_flag=True, help="Report every existing file as added first"
+)
+@click.option(
+    "--tree", "-t", is_flag=True, help="Print the tree ID after each batch of changes"
+)
+@click.argument("directory", type=click.Path(exists=True, file_okay=False))
+def watch_command(
+    include: Tuple[str, ...],
+    exclude: Tuple[str, ...],
+    jobs: int,
+    cache_path: Optional[str],
+    debounce: float,
+    polling: bool,
+    interval: float,
+    initial: bool,
+    tree: bool,
+    directory: str,
+) -> None:
+    """Print files under DIRECTORY as they are added, changed or removed.
+
+    Prints one line per change: A, M or D, the file's ID (the old ID for
+    D), and its path; moves print R, the ID and OLD -> NEW. With --tree, a
+    T line with the directory's tree ID follows each batch. Runs until
+    interrupted.
+    """
+    from .walk import PathFilter
+    from .watch import Watcher
+
+    cache = open_cache(cache_path) if cache_path else None
+    watcher = Watcher(
+        directory,
+        PathFilter(include, exclude),
+        debounce,
+        interval,
+        polling,
+        jobs,
+        cache,
+        report_error,
+    )
+
+    def report(changes: List["Change"]) -> None:
+        for change in changes:
+            mark = CHANGE_MARKS[change.status]
+            file_id = change.id or change.old_id
+            if change.old_path is not None:
+                click.echo(f"{mark} {file_id} {change.old_path} -> {change.path}")
+            else:
+                click.echo(f"{mark} {file_id} {change.path}")
+        if tree:
+            tree_id = watcher.tree_id()
+            if tree_id is not None:
+                click.echo(f"T {tree_id} {directory}")
+
+    try:
+        with watcher:
+            changes = watcher.scan()
+            if cache is not None:
+                cache.close()
+                cache = watcher.cache = None
+            if initial:
+                report(changes)
+            for changes in watcher:
+                report(changes)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+@main.command("serve")
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    envvar="C4PY_SOCKET",
+    help="Socket to listen on (env: C4PY_SOCKET; default: c4py.sock in "
+    "$XDG_RUNTIME_DIR, else the temp directory)",
+)
+@click.option(
+    "--cache",
+    "cache_path",
+    type=click.Path(dir_okay=False),
+    envvar="C4PY_CACHE",
+    help="ID cache database to keep warm (env: C4PY_CACHE; default: in memory)",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=0),
+    default=0,
+    help="Hashing threads (0 = one per CPU)",
+)
+def serve_command(
+    socket_path: Optional[str], cache_path: Optional[str], jobs: int
+) -> None:
+    """Identify files for clients on a Unix socket until interrupted"""
+    import signal
+    import sqlite3
+
+    from .server import Server, default_socket_path
+
+    socket_path = socket_path or default_socket_path()
+    try:
+        server = Server(socket_path, cache_path, jobs)
+    except sqlite3.Error as e:
+        raise click.ClickException(f"cannot open cache {cache_path}: {e}")
+    except OSError as e:
+        raise click.ClickException(f"cannot listen on {socket_path}: {e}")
+
+    def stop(signum: int, frame: Any) -> None:
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    click.echo(f"listening on {socket_path}", err=True)
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+@main.command("backends")
+@click.option("--repeat", type=click.IntRange(min=1), default=3, help="Timing runs")
+def backends_command(repeat: int) -> None:
+    """Check and time the SHA-512 backends, and show which is fastest"""
+    from . import backends
+
+    features = backends.cpu_features()
+    click.echo(f"cpu      {' '.join(features) or 'no SHA/AVX flags reported'}")
+    timings = backends.benchmark(repeat=repeat)
+    for name in backends.LOADERS:
+        timing = timings.get(name)
+        if timing is not None:
+            detail = (
+                f"{timing.stream / 1e6:8.1f} MB/s  {timing.sums / 1e3:8.1f}k sums/s"
+            )
+        else:
+            status = backends.status(name)
+            detail = "reference only, not timed" if status == "ok" else status
+        active = "*" if name == backends.active() else " "
+        click.echo(f"{active} {name:<13} {detail}")
+    if timings:
+        click.echo(f"fastest  {backends.fastest(timings)}")
+
+
+@main.group("cache")
+def cache_group() -> None:
+    """Maintain the ID cache."""
+
+
+@cache_group.command("prune")
+@click.option(
+    "--cache",
+    "cache_path",
+    type=click.Path(exists=True, dir_okay=False),
+    envvar="C4PY_CACHE",
+    required=True,
+    help="ID cache database (env: C4PY_CACHE)",
+)
+def cache_prune(cache_path: str) -> None:
+    """Evict stale entries and compact the cache."""
+    with open_cache(cache_path) as cache:
+        removed = cache.prune()
+        cache.compact()
+        click.echo(f"Removed {removed} stale entries, {len(cache)} remaining")
+
+
+@cache_group.command("clear")
+@click.option(
+    "--cache",
+    "cache_path",
+    type=click.Path(exists=True, dir_okay=False),
+    envvar="C4PY_CACHE",
+    required=True,
+    help="ID cache database (env: C4PY_CACHE)",
+)
+def cache_clear(cache_path: str) -> None:
+    """Remove every entry from the cache."""
+    with open_cache(cache_path) as cache:
+        cache.clear()
+        cache.compact()
+
+
+@main.command("bench")
+@click.option("--quick", is_flag=True, help="Use small inputs for a fast run")
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write results as JSON",
+)
+@click.option(
+    "--compare",
+    "baseline_path",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Show speedups against an earlier JSON result",
+)
+@click.argument("groups", nargs=-1)
+def bench_command(
+    quick: bool,
+    output: Optional[str],
+    baseline_path: Optional[str],
+    groups: Tuple[str, ...],
+) -> None:
+    """Run the benchmark suite.
+
+    GROUPS selects codec, digest, hashing, batch, backends, walk, tree or startup
+    (default: all).
+    """
+    from . import bench
+
+    for group in groups:
+        if group not in bench.BENCHMARKS:
+            raise click.BadParameter(
+                f"unknown benchmark group {group!r}", param_hint="GROUPS"
+            )
+    doc = bench.run(
+        groups,
+        quick,
+        report=lambda group, name, entry: click.echo(
+            bench.format_entry(group, name, entry)
+        ),
+    )
+    if doc["max_rss_bytes"] is not None:
+        click.echo(f"max RSS {doc['max_rss_bytes'] / bench.MB:.1f} MB")
+    if output:
+        bench.save(doc, output)
+    if baseline_path:
+        for name, ratio in bench.compare(doc, bench.load(baseline_path)).items():
+            click.echo(f"{name:<32} {ratio:>6.2f}x")
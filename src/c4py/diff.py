@@ -0,0 +1,137 @@
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from .formats import ManifestEntry
+from .id import ID
+from .parallel import ErrorHandler, identify_files
+
+ADDED = "added"
+REMOVED = "removed"
+MODIFIED = "modified"
+MOVED = "moved"
+
+ManifestIndex = Dict[str, ManifestEntry]
+
+
+class Change(NamedTuple):
+    status: str
+    path: str
+    # The ID the path has now; None for removed files
+    id: Optional[ID]
+    # For modified and removed files the old ID, for moves the old path too
+    old_id: Optional[ID] = None
+    old_path: Optional[str] = None
+
+
+class VerifyStats:
+    """Counts of how much work a verification needed"""
+
+    def __init__(self) -> None:
+        self.checked = 0
+        self.rehashed = 0
+
+
+def load_index(entries: Iterable[ManifestEntry]) -> ManifestIndex:
+    """Index manifest entries by path (later entries win)"""
+    return {entry.path: entry for entry in entries}
+
+
+def diff_manifests(old: ManifestIndex, new: ManifestIndex) -> List[Change]:
+    """Changes that turn ``old`` into ``new``, sorted by path.
+
+    A removed path whose ID reappears at an added path is reported once, as
+    a move.
+    """
+    changes = []
+    added: Dict[ID, List[str]] = defaultdict(list)
+    for path, entry in new.items():
+        before = old.get(path)
+        if before is None:
+            added[entry.id].append(path)
+        elif before.id != entry.id:
+            changes.append(Change(MODIFIED, path, entry.id, before.id))
+
+    for path, entry in old.items():
+        if path in new:
+            continue
+        targets = added.get(entry.id)
+        if targets:
+            changes.append(Change(MOVED, targets.pop(0), entry.id, entry.id, path))
+        else:
+            changes.append(Change(REMOVED, path, None, entry.id))
+
+    for file_id, paths in added.items():
+        changes.extend(Change(ADDED, path, file_id) for path in paths)
+    changes.sort(key=lambda c: (c.path, c.status))
+    return changes
+
+
+def _unchanged(entry: ManifestEntry, st: os.stat_result) -> bool:
+    return (
+        entry.size is not None
+        and entry.mtime_ns is not None
+        and entry.size == st.st_size
+        and entry.mtime_ns == st.st_mtime_ns
+    )
+
+
+def verify_tree(
+    manifest: ManifestIndex,
+    tree: Optional[Iterable[str]] = None,
+    jobs: int = 1,
+    on_error: Optional[ErrorHandler] = None,
+    stats: Optional[VerifyStats] = None,
+) -> List[Change]:
+    """Compare the files on disk with a manifest.
+
+    Entries whose size and mtime still match the manifest are trusted
+    without reading them; only the rest are rehashed, on ``jobs`` workers.
+    When ``tree`` lists the paths now on disk, paths missing from the
+    manifest are hashed too and reported as added (or as moves).  Paths that
+    cannot be read are reported to ``on_error`` and left out of the result.
+    """
+    if stats is None:
+        stats = VerifyStats()
+    current: ManifestIndex = {}
+    rehash: List[str] = []
+    for path, entry in manifest.items():
+        stats.checked += 1
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            if on_error is not None:
+                on_error(path, e)
+            current[path] = entry
+            continue
+        if _unchanged(entry, st):
+            current[path] = entry
+        else:
+            rehash.append(path)
+
+    if tree is not None:
+        rehash.extend(path for path in tree if path not in manifest)
+
+    failed = set()
+
+    def report(path: str, error: Exception) -> None:
+        failed.add(path)
+        if on_error is not None:
+            on_error(path, error)
+
+    for result in identify_files(rehash, jobs=jobs, on_error=report, stat=True):
+        stats.rehashed += 1
+        st = result.stat
+        current[result.path] = ManifestEntry(
+            result.path,
+            result.id,
+            st.st_size if st else None,
+            st.st_mtime_ns if st else None,
+        )
+    for path in failed:
+        if path in manifest:
+            current[path] = manifest[path]
+
+    return diff_manifests(manifest, current)
@@ -0,0 +1,158 @@
+import hashlib
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+
+from .id import ID
+from .parallel import ErrorHandler, InodeKey, default_jobs, identify_files
+
+# Bytes read from each end of a file for the prefilter hash
+SAMPLE_SIZE = 16 * 1024
+
+
+class DuplicateGroup(NamedTuple):
+    id: ID
+    size: int
+    # Every path with this content, sorted
+    paths: List[str]
+
+
+class DupeStats:
+    """Counts of the work each stage of a duplicate search did"""
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.bytes_total = 0
+        self.sampled = 0
+        self.hashed = 0
+        self.bytes_hashed = 0
+
+
+def sample_digest(path: str, size: int, sample_size: int = SAMPLE_SIZE) -> bytes:
+    """Cheap digest of the first and last ``sample_size`` bytes of a file"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        h.update(f.read(sample_size))
+        if size > sample_size:
+            f.seek(max(sample_size, size - sample_size))
+            h.update(f.read(sample_size))
+    return h.digest()
+
+
+def _refine(
+    groups: Iterable[List[str]],
+    key: Callable[[str], bytes],
+    jobs: int,
+    on_error: Optional[ErrorHandler],
+) -> List[List[str]]:
+    """Split each group by ``key``, keeping subgroups of two or more paths"""
+    groups = list(groups)
+    paths = [path for group in groups for path in group]
+
+    def safe_key(path: str) -> Optional[bytes]:
+        try:
+            return key(path)
+        except OSError as e:
+            if on_error is not None:
+                on_error(path, e)
+            return None
+
+    if jobs == 1:
+        keys = list(map(safe_key, paths))
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            keys = list(executor.map(safe_key, paths))
+
+    refined = []
+    offset = 0
+    for group in groups:
+        buckets: Dict[bytes, List[str]] = defaultdict(list)
+        for path, k in zip(group, keys[offset : offset + len(group)]):
+            if k is not None:
+                buckets[k].append(path)
+        offset += len(group)
+        refined.extend(b for b in buckets.values() if len(b) > 1)
+    return refined
+
+
+def find_duplicates(
+    paths: Iterable[str],
+    jobs: int = 1,
+    min_size: int = 1,
+    sample_size: int = SAMPLE_SIZE,
+    on_error: Optional[ErrorHandler] = None,
+    stats: Optional[DupeStats] = None,
+) -> List[DuplicateGroup]:
+    """Group files with identical content, reading as few bytes as possible.
+
+    Files are grouped by size first; groups of larger files are then split
+    by a hash of their first and last ``sample_size`` bytes, and only the
+    files that still have a candidate twin get a full C4 ID.  Paths that
+    share an inode are hashed once.  A path reached twice is counted once.
+    Files smaller than ``min_size`` are ignored.  Groups are returned
+    largest files first.
+    """
+    if jobs <= 0:
+        jobs = default_jobs()
+    by_size: Dict[int, List[str]] = defaultdict(list)
+    first_path: Dict[InodeKey, str] = {}
+    aliases: Dict[str, List[str]] = defaultdict(list)
+    # Overlapping roots reach the same path twice; that is not a duplicate
+    seen: Set[str] = set()
+    if stats is None:
+        stats = DupeStats()
+
+    for path in paths:
+        spelling = os.path.abspath(path)
+        if spelling in seen:
+            continue
+        seen.add(spelling)
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            if on_error is not None:
+                on_error(path, e)
+            continue
+        if st.st_size < min_size:
+            continue
+        stats.files += 1
+        key = (st.st_dev, st.st_ino)
+        if key in first_path:
+            # Another path to an inode already queued is a duplicate for free
+            aliases[first_path[key]].append(path)
+            continue
+        first_path[key] = path
+        stats.bytes_total += st.st_size
+        by_size[st.st_size].append(path)
+
+    sizes = {path: size for size, group in by_size.items() for path in group}
+    small = [g for s, g in by_size.items() if s <= 2 * sample_size and len(g) > 1]
+    large = [g for s, g in by_size.items() if s > 2 * sample_size and len(g) > 1]
+    stats.sampled = sum(len(g) for g in large)
+    survivors = _refine(
+        large,
+        lambda p: sample_digest(p, sizes[p], sample_size),
+        jobs,
+        on_error,
+    )
+
+    # Hard-linked paths are duplicates of each other whatever the samples say
+    to_hash = [p for group in small + survivors for p in group]
+    queued = set(to_hash)
+    to_hash.extend(p for p in aliases if p not in queued)
+
+    by_id: Dict[ID, List[str]] = defaultdict(list)
+    for result in identify_files(to_hash, jobs=jobs, on_error=on_error):
+        stats.hashed += 1
+        stats.bytes_hashed += sizes[result.path]
+        by_id[result.id].append(result.path)
+        by_id[result.id].extend(aliases.get(result.path, ()))
+
+    groups = [
+        DuplicateGroup(file_id, sizes[members[0]], sorted(members))
+        for file_id, members in by_id.items()
+        if len(members) > 1
+    ]
+    groups.sort(key=lambda g: (-g.size, g.paths))
+    return groups
@@ -0,0 +1,99 @@
+import heapq
+import pickle
+import tempfile
+from typing import IO, Any, Callable, Generic, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Records held in memory before a sorted run is spilled to disk
+DEFAULT_RUN_SIZE = 100_000
+
+
+def _identity(record: Any) -> Any:
+    return record
+
+
+def _read_run(f: IO[bytes]) -> Iterator[Any]:
+    f.seek(0)
+    while True:
+        try:
+            yield pickle.load(f)
+        except EOFError:
+            return
+
+
+class ExternalSorter(Generic[T]):
+    """Sort an unbounded stream of records in bounded memory.
+
+    Records are buffered up to ``run_size`` at a time; each full buffer is
+    sorted and spilled to a temporary file, and iteration merges the runs.
+    Inputs that fit in one run never touch the disk.
+    """
+
+    def __init__(
+        self,
+        key: Optional[Callable[[T], Any]] = None,
+        run_size: Optional[int] = None,
+        tmp_dir: Optional[str] = None,
+    ) -> None:
+        # Without a key records compare directly; an identity key keeps
+        # sort() and merge() on one code path
+        self._key: Callable[[T], Any] = key if key is not None else _identity
+        self._run_size = run_size or DEFAULT_RUN_SIZE
+        self._tmp_dir = tmp_dir
+        self._buffer: List[T] = []
+        self._runs: List[IO[bytes]] = []
+
+    def add(self, record: T) -> None:
+        self._buffer.append(record)
+        if len(self._buffer) >= self._run_size:
+            self._spill()
+
+    def _spill(self) -> None:
+        self._buffer.sort(key=self._key)
+        run = tempfile.TemporaryFile(dir=self._tmp_dir)
+        pickler = pickle.Pickler(run, pickle.HIGHEST_PROTOCOL)
+        for record in self._buffer:
+            pickler.dump(record)
+            # Records are independent; don't let the memo grow with the run
+            pickler.clear_memo()
+        self._runs.append(run)
+        self._buffer = []
+
+    def __iter__(self) -> Iterator[T]:
+        """Yield every record added so far in sorted order"""
+        try:
+            if not self._runs:
+                self._buffer.sort(key=self._key)
+                yield from self._buffer
+                return
+            if self._buffer:
+                self._spill()
+            yield from heapq.merge(
+                *(_read_run(run) for run in self._runs), key=self._key
+            )
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._buffer = []
+
+    @property
+    def spilled(self) -> int:
+        """Number of runs written to disk"""
+        return len(self._runs)
+
+
+def external_sort(
+    records: Iterator[T],
+    key: Optional[Callable[[T], Any]] = None,
+    run_size: Optional[int] = None,
+) -> Iterator[T]:
+    """Sorted iterator over ``records`` using bounded memory"""
+    sorter: ExternalSorter[T] = ExternalSorter(key, run_size)
+    for record in records:
+        sorter.add(record)
+    return iter(sorter)
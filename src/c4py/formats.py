@@ -0,0 +1,399 @@
+"""Bulk manifest output formats.
+
+Every writer takes ``(path, ID, stat)`` records and buffers its encoded
+output, writing to the underlying binary stream in batches.  With
+``max_delay`` set, a background thread also writes any batch that has been
+waiting that long, so output keeps streaming while the input stalls.
+
+* ``text``  - human-readable lines from a formatting callback (CLI default)
+* ``jsonl`` - one JSON object per line with path, id, size, mtime_ns and mode
+* ``csv``   - the same fields with a header row
+* ``c4m``   - an ``@c4m`` header, then ``mode mtime size path id`` lines
+* ``bin``   - a ``C4MB`` header, then fixed records (64-byte digest, size,
+  mtime_ns, mode, path length) each followed by the raw path bytes
+
+``read_manifest`` reads any of these back (text only in the ``ID: path`` or
+``path: ID`` forms printed by ``-V``), detecting the format from the
+first bytes of the stream.
+"""
+
+import csv
+import datetime
+import io
+import json
+import os
+import stat as stat_module
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Type,
+    cast,
+)
+
+from .id import ID, ID_LEN
+
+# Records buffered before a write to the output stream
+BATCH_SIZE = 512
+# Seconds a partial batch may wait when a writer is asked to stream
+MAX_DELAY = 0.5
+
+BIN_MAGIC = b"C4MB"
+BIN_VERSION = 1
+BIN_HEADER = struct.Struct("<4sH")
+# digest, size, mtime_ns, mode, path length
+BIN_RECORD = struct.Struct("<64sQqII")
+
+C4M_HEADER = "@c4m 1.0"
+
+FIELDS = ["path", "id", "size", "mtime_ns", "mode"]
+
+
+class ManifestWriter(ABC):
+    """Base class for buffered bulk writers"""
+
+    name = ""
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        batch_size: int = BATCH_SIZE,
+        max_delay: Optional[float] = None,
+    ) -> None:
+        self._stream = stream
+        self._batch_size = batch_size
+        self._batch: List[bytes] = []
+        # When the oldest record in the batch was added
+        self._since = 0.0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.start()
+        if max_delay is not None:
+            flusher = threading.Thread(
+                target=self._flush_stale, args=(max_delay,), daemon=True
+            )
+            flusher.start()
+            self._flusher = flusher
+
+    def start(self) -> None:
+        """Emit any header"""
+
+    @abstractmethod
+    def encode(self, path: str, id_obj: ID, st: Optional[os.stat_result]) -> bytes:
+        """Encode one record"""
+
+    def write(self, path: str, id_obj: ID, st: Optional[os.stat_result]) -> None:
+        data = self.encode(path, id_obj, st)
+        with self._lock:
+            self._append(data)
+            if len(self._batch) >= self._batch_size:
+                self._write_batch()
+
+    def write_raw(self, data: bytes) -> None:
+        with self._lock:
+            self._append(data)
+
+    def _append(self, data: bytes) -> None:
+        if not self._batch:
+            self._since = time.monotonic()
+        self._batch.append(data)
+
+    def _write_batch(self) -> None:
+        if self._batch:
+            self._stream.write(b"".join(self._batch))
+            self._batch = []
+        self._stream.flush()
+
+    def _flush_stale(self, max_delay: float) -> None:
+        while not self._closed.wait(max_delay / 2):
+            with self._lock:
+                if self._batch and time.monotonic() - self._since >= max_delay:
+                    try:
+                        self._write_batch()
+                    except OSError:
+                        # Left for the next write or close() to report
+                        return
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write_batch()
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+
+class TextWriter(ManifestWriter):
+    """Human-readable lines produced by a formatting callback"""
+
+    name = "text"
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        formatter: Callable[[str, ID, Optional[os.stat_result]], str],
+        batch_size: int = BATCH_SIZE,
+        max_delay: Optional[float] = None,
+    ) -> None:
+        self._formatter = formatter
+        super().__init__(stream, batch_size, max_delay)
+
+    def encode(self, path: str, id_obj: ID, st: Optional[os.stat_result]) -> bytes:
+        line = self._formatter(path, id_obj, st) + "\n"
+        return line.encode("utf-8", "surrogateescape")
+
+
+class JSONLinesWriter(ManifestWriter):
+    name = "jsonl"
+
+    def encode(self, path: str, id_obj: ID, st: Optional[os.stat_result]) -> bytes:
+        record = {
+            "path": path,
+            "id": str(id_obj),
+            "size": st.st_size if st else None,
+            "mtime_ns": st.st_mtime_ns if st else None,
+            "mode": st.st_mode if st else None,
+        }
+        return json.dumps(record).encode() + b"\n"
+
+
+class CSVWriter(ManifestWriter):
+    name = "csv"
+
+    def start(self) -> None:
+        self._text = io.StringIO()
+        self._csv = csv.writer(self._text, lineterminator="\n")
+        self._csv.writerow(FIELDS)
+        self.write_raw(self._take())
+
+    def _take(self) -> bytes:
+        data = self._text.getvalue().encode("utf-8", "surrogateescape")
+        self._text.seek(0)
+        self._text.truncate()
+        return data
+
+    def encode(self, path: str, id_obj: ID, st: Optional[os.stat_result]) -> bytes:
+        if st is None:
+            self._csv.writerow([path, str(id_obj), "", "", ""])
+        else:
+            self._csv.writerow(
+                [path, str(id_obj), st.st_size, st.st_mtime_ns, st.st_mode]
+            )
+        return self._take()
+
+
+def quote_c4m_path(path: str) -> str:
+    """Quote a path as a JSON string if it would not survive splitting"""
+    if not path or any(c.isspace() or c in '"\\' for c in path):
+        return json.dumps(path)
+    return path
+
+
+def format_c4m_time(mtime_ns: int) -> str:
+    seconds, nanos = divmod(mtime_ns, 10**9)
+    stamp = datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc)
+    return stamp.strftime("%Y-%m-%dT%H:%M:%S") + f".{nanos:09d}Z"
+
+
+class C4MWriter(ManifestWriter):
+    name = "c4m"
+
+    def start(self) -> None:
+        self.write_raw(C4M_HEADER.encode() + b"\n")
+
+    def encode(self, path: str, id_obj: ID, st: Optional[os.stat_result]) -> bytes:
+        if st is None:
+            mode, mtime, size = "-" * 10, "-", "-"
+        else:
+            mode = stat_module.filemode(st.st_mode)
+            mtime = format_c4m_time(st.st_mtime_ns)
+            size = str(st.st_size)
+        line = f"{mode} {mtime} {size} {quote_c4m_path(path)} {id_obj}\n"
+        return line.encode("utf-8", "surrogateescape")
+
+
+class BinaryWriter(ManifestWriter):
+    name = "bin"
+
+    def start(self) -> None:
+        self.write_raw(BIN_HEADER.pack(BIN_MAGIC, BIN_VERSION))
+
+    def encode(self, path: str, id_obj: ID, st: Optional[os.stat_result]) -> bytes:
+        raw_path = os.fsencode(path)
+        return (
+            BIN_RECORD.pack(
+                bytes(id_obj),
+                st.st_size if st else 0,
+                st.st_mtime_ns if st else 0,
+                st.st_mode if st else 0,
+                len(raw_path),
+            )
+            + raw_path
+        )
+
+
+WRITERS: Dict[str, Type[ManifestWriter]] = {
+    cls.name: cls for cls in (JSONLinesWriter, CSVWriter, C4MWriter, BinaryWriter)
+}
+
+
+def get_writer(name: str, stream: BinaryIO) -> ManifestWriter:
+    """Create the writer for a format name"""
+    try:
+        return WRITERS[name](stream)
+    except KeyError:
+        raise ValueError(f"unknown output format: {name}") from None
+
+
+class ManifestEntry(NamedTuple):
+    path: str
+    id: ID
+    # None when the manifest format does not record them
+    size: Optional[int]
+    mtime_ns: Optional[int]
+
+
+def _lines(stream: BinaryIO) -> Iterator[str]:
+    for raw in stream:
+        line = raw.decode("utf-8", "surrogateescape").rstrip("\r\n")
+        if line:
+            yield line
+
+
+def _optional_int(value: Optional[str]) -> Optional[int]:
+    return int(value) if value not in (None, "") else None
+
+
+def read_jsonl(stream: BinaryIO) -> Iterator[ManifestEntry]:
+    for line in _lines(stream):
+        record = json.loads(line)
+        yield ManifestEntry(
+            record["path"],
+            ID.parse(record["id"]),
+            record.get("size"),
+            record.get("mtime_ns"),
+        )
+
+
+def read_csv(stream: BinaryIO) -> Iterator[ManifestEntry]:
+    for record in csv.DictReader(_lines(stream)):
+        yield ManifestEntry(
+            record["path"],
+            ID.parse(record["id"]),
+            _optional_int(record.get("size")),
+            _optional_int(record.get("mtime_ns")),
+        )
+
+
+def parse_c4m_time(stamp: str) -> int:
+    """Inverse of ``format_c4m_time``"""
+    seconds, _, fraction = stamp.rstrip("Z").partition(".")
+    parsed = datetime.datetime.strptime(seconds, "%Y-%m-%dT%H:%M:%S")
+    whole = int(parsed.replace(tzinfo=datetime.timezone.utc).timestamp())
+    return whole * 10**9 + int(fraction.ljust(9, "0")[:9] or 0)
+
+
+def read_c4m(stream: BinaryIO) -> Iterator[ManifestEntry]:
+    lines = _lines(stream)
+    header = next(lines, "")
+    if not header.startswith("@c4m"):
+        raise ValueError("not a c4m manifest")
+    for line in lines:
+        _, mtime, size, rest = line.split(" ", 3)
+        id_str = rest[-ID_LEN:]
+        path = rest[: -ID_LEN - 1]
+        if path.startswith('"'):
+            path = json.loads(path)
+        yield ManifestEntry(
+            path,
+            ID.parse(id_str),
+            None if size == "-" else int(size),
+            None if mtime == "-" else parse_c4m_time(mtime),
+        )
+
+
+def read_bin(stream: BinaryIO) -> Iterator[ManifestEntry]:
+    magic, version = BIN_HEADER.unpack(stream.read(BIN_HEADER.size))
+    if magic != BIN_MAGIC or version != BIN_VERSION:
+        raise ValueError("not a c4py binary manifest")
+    while True:
+        record = stream.read(BIN_RECORD.size)
+        if not record:
+            return
+        if len(record) < BIN_RECORD.size:
+            raise ValueError("truncated binary manifest")
+        digest, size, mtime_ns, mode, length = BIN_RECORD.unpack(record)
+        raw = stream.read(length)
+        if len(raw) < length:
+            raise ValueError("truncated binary manifest")
+        path = os.fsdecode(raw)
+        # Writers store zeros when a record had no stat
+        known = mode != 0
+        yield ManifestEntry(
+            path,
+            ID.from_digest(digest),
+            size if known else None,
+            mtime_ns if known else None,
+        )
+
+
+def read_text(stream: BinaryIO) -> Iterator[ManifestEntry]:
+    for line in _lines(stream):
+        if line[ID_LEN : ID_LEN + 2] == ": ":
+            id_str, path = line[:ID_LEN], line[ID_LEN + 2 :]
+        elif line[-ID_LEN - 2 : -ID_LEN] == ": ":
+            path, id_str = line[: -ID_LEN - 2], line[-ID_LEN:]
+        else:
+            raise ValueError(f"expected 'ID: path' or 'path: ID', got {line!r}")
+        yield ManifestEntry(path, ID.parse(id_str), None, None)
+
+
+READERS: Dict[str, Callable[[BinaryIO], Iterator[ManifestEntry]]] = {
+    "text": read_text,
+    "jsonl": read_jsonl,
+    "csv": read_csv,
+    "c4m": read_c4m,
+    "bin": read_bin,
+}
+
+
+def detect_format(head: bytes) -> str:
+    """Guess a manifest's format from its first bytes"""
+    if head.startswith(BIN_MAGIC):
+        return "bin"
+    if head.startswith(b"@c4m"):
+        return "c4m"
+    if head.startswith(b"{"):
+        return "jsonl"
+    if head.startswith(",".join(FIELDS).encode()):
+        return "csv"
+    return "text"
+
+
+def read_manifest(
+    stream: BinaryIO, fmt: Optional[str] = None
+) -> Iterator[ManifestEntry]:
+    """Read entries from a manifest, detecting its format unless given"""
+    if fmt is None:
+        if hasattr(stream, "peek"):
+            buffered = cast(io.BufferedReader, stream)
+        else:
+            buffered = io.BufferedReader(cast(io.RawIOBase, stream))
+        fmt = detect_format(buffered.peek(64))
+        stream = buffered
+    try:
+        reader = READERS[fmt]
+    except KeyError:
+        raise ValueError(f"unknown manifest format: {fmt}") from None
+    return reader(stream)
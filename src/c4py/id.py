@@ -1,136 +1,367 @@
 # src/c4/id.py
+from __future__ import annotations
+
 import hashlib
-from typing import Optional, BinaryIO
+import os
+import stat
+from operator import getitem
+
+from . import stats as _stats
 from .errors import ErrBadChar, ErrBadLength
 
+# typing is only needed by type checkers; skipping it keeps "import c4py" fast
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, BinaryIO, Callable, Iterable, List, Optional, Union
+
 CHARSET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
 BASE = 58
 PREFIX = b"c4"
 ID_LEN = 90
 
+# Stream read size for identify(); regular files use larger adaptive sizes
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+
+# SHA-512 constructor behind all hashing; c4py.backends can swap it
+_sha512: Callable[..., Any] = hashlib.sha512
+_backend: str = "hashlib"
+
+
+def get_sha512() -> Callable[..., Any]:
+    """The SHA-512 constructor in use, called like ``hashlib.sha512``"""
+    return _sha512
+
+
+# ID hashes use the low 64 bits of the digest, which are already uniform
+_HASH_MASK = (1 << 64) - 1
+
 # Build lookup tables
 _lut = [0xFF] * 256
 for i, c in enumerate(CHARSET):
     _lut[ord(c)] = i
 
+# Encoding emits two characters per divmod, using every pair of digits
+_PAIR_BASE = BASE * BASE
+_pairs = [a + b for a in CHARSET for b in CHARSET]
+
+# Decoding translates characters to digit values in one call, then sums
+# digit * 58**position from a per-position table, all at C speed.  The table
+# is built on first use so importing the module stays cheap.
+_digits = bytes(_lut)
+_place_values: List[List[int]] = []
+
+
+def _build_place_values() -> List[List[int]]:
+    _place_values[:] = [
+        list(range(0, BASE ** (power + 1), BASE**power))
+        for power in range(ID_LEN - 3, -1, -1)
+    ]
+    return _place_values
+
+
+def _decode(src: str) -> int:
+    """Decode the 88 Base58 characters of a validated-length ID string"""
+    if not src.startswith("c4"):
+        raise ErrBadChar(0)
+    try:
+        digits = src[2:].encode("ascii").translate(_digits)
+    except UnicodeEncodeError as e:
+        raise ErrBadChar(e.start + 2)
+    bad = digits.find(0xFF)
+    if bad >= 0:
+        raise ErrBadChar(bad + 2)
+    return sum(map(getitem, _place_values or _build_place_values(), digits))
+
+
+def _encode(value: int) -> str:
+    if value == 0:
+        return ""
+    encoded = []
+    for _ in range((ID_LEN - 2) // 2):
+        value, pair = divmod(value, _PAIR_BASE)
+        encoded.append(_pairs[pair])
+    encoded.append("c4")
+    encoded.reverse()
+    return "".join(encoded)
+
 
 class ID:
+    """A C4 ID.
+
+    An ID holds its 64-byte digest, its integer value, or both: whichever
+    one it was built from, with the other computed on first use and kept.
+    IDs made from digests (hashing, manifests, ID arrays) compare, hash and
+    convert back to digests without ever building the 512-bit integer.
+    """
+
+    __slots__ = ("_int", "_digest")
+
     def __init__(self, value: int):
-        self._value = value
+        self._int: Optional[int] = value
+        self._digest: Optional[Digest] = None
+
+    @classmethod
+    def from_digest(cls, digest: Union[bytes, bytearray, memoryview]) -> "ID":
+        """ID backed by a 64-byte digest; a ``Digest`` is kept, not copied"""
+        obj = cls.__new__(cls)
+        obj._int = None
+        obj._digest = Digest(digest)
+        return obj
 
     @classmethod
     def parse(cls, src: str) -> "ID":
         if len(src) != ID_LEN:
             raise ErrBadLength(len(src))
+        return cls(_decode(src))
 
-        if not src.startswith("c4"):
-            raise ErrBadChar(0)
-
-        value = 0
-        for i, c in enumerate(src[2:], 2):
-            digit = _lut[ord(c)]
-            if digit == 0xFF:
-                raise ErrBadChar(i)
-            value = value * BASE + digit
-
-        return cls(value)
+    @property
+    def _value(self) -> int:
+        value = self._int
+        if value is None:
+            value = self._int = int.from_bytes(self._digest, "big")  # type: ignore
+        return value
 
     def __str__(self) -> str:
-        if self._value == 0:
-            return ""
-
-        value = self._value
-        encoded = []
-        while value > 0:
-            value, mod = divmod(value, BASE)
-            encoded.append(CHARSET[mod])
-
-        padding = ID_LEN - 2 - len(encoded)
-        result = ["c", "4"]
-        result.extend(["1"] * padding)
-        result.extend(reversed(encoded))
-
-        return "".join(result)
+        return _encode(self._value)
 
     def digest(self) -> "Digest":
-        raw_bytes = self._value.to_bytes(64, "big")
-        return Digest(raw_bytes)
+        digest = self._digest
+        if digest is None:
+            digest = self._digest = Digest(self._int.to_bytes(64, "big"))  # type: ignore
+        return digest
+
+    def __bytes__(self) -> bytes:
+        return self.digest()
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, ID):
             return NotImplemented
+        if self._digest is not None and other._digest is not None:
+            return self._digest == other._digest
         return self._value == other._value
 
+    def __ne__(self, other: object) -> bool:
+        if not isinstance(other, ID):
+            return NotImplemented
+        return not self == other
+
+    def __hash__(self) -> int:
+        if self._int is not None:
+            return hash(self._int & _HASH_MASK)
+        return hash(int.from_bytes(self._digest[56:], "big"))  # type: ignore
+
+    # The big-endian digests order exactly as the integers do; None sorts
+    # before every ID, and other types are left to Python to reject
     def __lt__(self, other: Optional["ID"]) -> bool:
         if other is None:
             return False
+        if not isinstance(other, ID):
+            return NotImplemented
+        if self._digest is not None and other._digest is not None:
+            return self._digest < other._digest
         return self._value < other._value
 
+    def __le__(self, other: Optional["ID"]) -> bool:
+        if other is None:
+            return False
+        if not isinstance(other, ID):
+            return NotImplemented
+        return not other < self
+
+    def __gt__(self, other: Optional["ID"]) -> bool:
+        if other is None:
+            return True
+        if not isinstance(other, ID):
+            return NotImplemented
+        return other < self
+
+    def __ge__(self, other: Optional["ID"]) -> bool:
+        if other is None:
+            return True
+        if not isinstance(other, ID):
+            return NotImplemented
+        return not self < other
+
 
 class Digest(bytes):
-    def __new__(cls, data: bytes) -> "Digest":
-        if len(data) > 64:
+    def __new__(cls, data: Union[bytes, bytearray, memoryview]) -> "Digest":
+        # Digests are immutable, so an existing one is reused as is
+        if type(data) is cls:
+            return data  # type: ignore[return-value]
+        size = len(data)
+        if size > 64:
             raise ValueError("Data too long for digest")
-        if len(data) < 64:
+        if size < 64:
             # Pad with zeros
-            data = bytes(64 - len(data)) + data
+            data = bytes(64 - size) + bytes(data)
         return super().__new__(cls, data)
 
     def id(self) -> ID:
-        value = int.from_bytes(self, "big")
-        return ID(value)
+        return ID.from_digest(self)
 
     def sum(self, other: "Digest") -> "Digest":
         if self == other:
             return self
 
+        # Two updates hash the sorted pair without building a 128-byte copy
         if self < other:
-            data = self + other
+            hasher = _sha512(self)
+            hasher.update(other)
         else:
-            data = other + self
-
-        hasher = hashlib.sha512()
-        hasher.update(data)
+            hasher = _sha512(other)
+            hasher.update(self)
         return Digest(hasher.digest())
 
 
 class Encoder:
     def __init__(self) -> None:
-        self._hasher = hashlib.sha512()
+        self._hasher = _sha512()
 
-    def write(self, data: bytes) -> int:
+    def write(self, data: Union[bytes, bytearray, memoryview]) -> int:
         self._hasher.update(data)
         return len(data)
 
     def id(self) -> ID:
-        value = int.from_bytes(self._hasher.digest(), "big")
-        return ID(value)
+        return ID.from_digest(self._hasher.digest())
 
     def digest(self) -> Digest:
         return Digest(self._hasher.digest())
 
     def reset(self) -> None:
-        self._hasher = hashlib.sha512()
+        self._hasher = _sha512()
 
 
-def identify(src: BinaryIO) -> Optional[ID]:
+def identify(src: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Optional[ID]:
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if _stats.enabled:
+        return _identify_timed(src, chunk_size)
     enc = Encoder()
+    readinto = getattr(src, "readinto", None)
+    if readinto is None:
+        while True:
+            chunk = src.read(chunk_size)
+            if not chunk:
+                break
+            enc.write(chunk)
+        return enc.id()
+
+    # Reuse one buffer instead of allocating a bytes object per read
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
     while True:
-        chunk = src.read(8192)
-        if not chunk:
+        n = readinto(view)
+        if not n:
             break
-        enc.write(chunk)
+        enc.write(view[:n])
     return enc.id()
 
 
+def _identify_timed(src: BinaryIO, chunk_size: int) -> ID:
+    """identify() with read and hash time reported to the stats hooks"""
+    clock = _stats.clock
+    hasher = _sha512()
+    io_time = hash_time = 0.0
+    readinto = getattr(src, "readinto", None)
+    view = memoryview(bytearray(chunk_size))
+    while True:
+        start = clock()
+        if readinto is None:
+            chunk = src.read(chunk_size)
+            n = len(chunk)
+        else:
+            n = readinto(view)
+            chunk = view[:n]
+        io_time += clock() - start
+        if not n:
+            break
+        start = clock()
+        hasher.update(chunk)
+        hash_time += clock() - start
+    _stats.phase(_stats.IO, io_time)
+    _stats.phase(_stats.HASH, hash_time)
+    return ID.from_digest(hasher.digest())
+
+
+def _chunk_size_for(size: int) -> int:
+    """Pick a read size proportional to the file size"""
+    chunk = DEFAULT_CHUNK_SIZE
+    while chunk < size and chunk < MAX_CHUNK_SIZE:
+        chunk *= 2
+    return chunk
+
+
+def identify_path(path: str, chunk_size: Optional[int] = None) -> Optional[ID]:
+    """Identify a file by path.
+
+    Regular files are read into a reusable buffer sized to the file (up to
+    MAX_CHUNK_SIZE).  Reads rather than mmap mean a file truncated while it
+    is hashed gives a short read instead of SIGBUS.  Pipes, devices and other
+    non-regular files fall back to the stream loop.
+    """
+    if _stats.enabled:
+        return _identify_path_timed(path, chunk_size)
+    with open(path, "rb", buffering=0) as f:
+        st = os.fstat(f.fileno())
+        if not stat.S_ISREG(st.st_mode):
+            return identify(f, chunk_size or DEFAULT_CHUNK_SIZE)
+        return identify(f, chunk_size or _chunk_size_for(st.st_size))
+
+
+def _identify_path_timed(path: str, chunk_size: Optional[int]) -> Optional[ID]:
+    start = _stats.clock()
+    with open(path, "rb", buffering=0) as f:
+        stat_start = _stats.clock()
+        st = os.fstat(f.fileno())
+        _stats.phase(_stats.STAT, _stats.clock() - stat_start)
+        if chunk_size is None:
+            if stat.S_ISREG(st.st_mode):
+                chunk_size = _chunk_size_for(st.st_size)
+            else:
+                chunk_size = DEFAULT_CHUNK_SIZE
+        file_id = _identify_timed(f, chunk_size)
+    _stats.file_done(path, st.st_size, _stats.clock() - start)
+    return file_id
+
+
 def encode(src: BinaryIO) -> Optional[ID]:
     return identify(src)
 
 
-# Initialize constants
-with open("/dev/null", "rb") as f:
-    NIL_ID = identify(f)
-void_bytes = bytes(64)
-VOID_ID = Digest(void_bytes).id()
-max_bytes = bytes([0xFF] * 64)
-MAX_ID = Digest(max_bytes).id()
+def encode_many(ids: Iterable[ID]) -> List[str]:
+    """Format many IDs as strings"""
+    return [_encode(id_obj._value) for id_obj in ids]
+
+
+def parse_many(srcs: Iterable[str]) -> List[ID]:
+    """Parse many ID strings, raising on the first invalid one"""
+    result = []
+    for src in srcs:
+        if len(src) != ID_LEN:
+            raise ErrBadLength(len(src))
+        result.append(ID(_decode(src)))
+    return result
+
+
+# Constants are literals so importing the module does no I/O or hashing.
+# NIL_ID is the ID of empty content: the SHA-512 of zero bytes.
+NIL_ID = ID(
+    int(
+        "cf83e1357eefb8bdf1542850d66d8007d620e4050b5715dc83f4a921d36ce9ce"
+        "47d0d13c5d85f2b0ff8318d2877eec2f63b931bd47417a81a538327af927da3e",
+        16,
+    )
+)
+VOID_ID = ID(0)
+MAX_ID = ID((1 << 512) - 1)
+
+if os.environ.get("C4PY_HASH_BACKEND"):
+    from .backends import use as _use
+
+    try:
+        _use(os.environ["C4PY_HASH_BACKEND"])
+    except ValueError as e:
+        import warnings
+
+        warnings.warn(f"C4PY_HASH_BACKEND ignored: {e}", RuntimeWarning, stacklevel=2)
@@ -0,0 +1,194 @@
+from typing import Any, Iterable, Iterator, Union, overload
+
+from .id import ID, Digest
+
+DIGEST_SIZE = 64
+
+IDLike = Union[ID, Digest, bytes, bytearray, memoryview]
+
+
+def _digest_bytes(item: IDLike) -> bytes:
+    if isinstance(item, ID):
+        return bytes(item)
+    data = bytes(item)
+    if len(data) != DIGEST_SIZE:
+        raise ValueError(f"digests must be {DIGEST_SIZE} bytes, got {len(data)}")
+    return data
+
+
+def _numpy() -> Any:
+    try:
+        import numpy  # ty: ignore[unresolved-import]
+    except ImportError:
+        return None
+    return numpy
+
+
+class IDArray:
+    """Compact array of C4 IDs stored as contiguous 64-byte digests.
+
+    Indexing returns ``ID`` objects built on demand, so holding millions of
+    IDs costs 64 bytes each instead of a Python object per ID.  Slices with a
+    step of 1 are zero-copy views of the parent's buffer; while a view is
+    alive the parent cannot grow.  Sorting uses NumPy when it is installed.
+    """
+
+    __slots__ = ("_buf",)
+
+    def __init__(self, items: Iterable[IDLike] = ()) -> None:
+        self._buf: Union[bytearray, memoryview] = bytearray()
+        self.extend(items)
+
+    @classmethod
+    def from_buffer(cls, buf: Union[bytes, bytearray, memoryview]) -> "IDArray":
+        """Wrap a flat buffer of 64-byte digests without copying it"""
+        view = memoryview(buf).cast("B")
+        if len(view) % DIGEST_SIZE:
+            raise ValueError(f"buffer length must be a multiple of {DIGEST_SIZE}")
+        arr = cls.__new__(cls)
+        arr._buf = view
+        return arr
+
+    @classmethod
+    def from_bytearray(cls, buf: bytearray) -> "IDArray":
+        """Take over a bytearray of 64-byte digests without copying it.
+
+        Unlike ``from_buffer`` the array owns ``buf`` and can still grow.
+        """
+        if len(buf) % DIGEST_SIZE:
+            raise ValueError(f"buffer length must be a multiple of {DIGEST_SIZE}")
+        arr = cls.__new__(cls)
+        arr._buf = buf
+        return arr
+
+    @property
+    def buffer(self) -> memoryview:
+        """Read-only view of the underlying digest buffer"""
+        return memoryview(self._buf).toreadonly()
+
+    def tobytes(self) -> bytes:
+        return bytes(self._buf)
+
+    def __len__(self) -> int:
+        return len(self._buf) // DIGEST_SIZE
+
+    def digest(self, index: int) -> Digest:
+        """Digest at ``index`` without building an ID"""
+        return Digest(self._record(index))
+
+    def _record(self, index: int) -> memoryview:
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("IDArray index out of range")
+        start = index * DIGEST_SIZE
+        return memoryview(self._buf)[start : start + DIGEST_SIZE]
+
+    @overload
+    def __getitem__(self, index: int) -> ID: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "IDArray": ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[ID, "IDArray"]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                view = memoryview(self._buf)
+                return IDArray.from_buffer(
+                    view[start * DIGEST_SIZE : max(start, stop) * DIGEST_SIZE]
+                )
+            return IDArray(self._record(i) for i in range(start, stop, step))
+        return ID.from_digest(self._record(index))
+
+    def __iter__(self) -> Iterator[ID]:
+        buf = memoryview(self._buf)
+        for start in range(0, len(buf), DIGEST_SIZE):
+            yield ID.from_digest(buf[start : start + DIGEST_SIZE])
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, IDArray):
+            return NotImplemented
+        return self._buf == other._buf
+
+    def __repr__(self) -> str:
+        return f"<IDArray of {len(self)} IDs>"
+
+    def _owned(self) -> bytearray:
+        if not isinstance(self._buf, bytearray):
+            raise TypeError("IDArray views are read-only")
+        return self._buf
+
+    def append(self, item: IDLike) -> None:
+        self._owned().extend(_digest_bytes(item))
+
+    def extend(self, items: Iterable[IDLike]) -> None:
+        if isinstance(items, IDArray):
+            self._owned().extend(items._buf)
+            return
+        buf = self._owned()
+        for item in items:
+            buf.extend(_digest_bytes(item))
+
+    def _records(self) -> Iterator[bytes]:
+        buf = self._buf
+        for start in range(0, len(buf), DIGEST_SIZE):
+            yield bytes(buf[start : start + DIGEST_SIZE])
+
+    def sorted(self, unique: bool = False) -> "IDArray":
+        """Sorted copy, optionally without duplicates"""
+        np = _numpy()
+        if np is not None:
+            records = np.frombuffer(self._buf, dtype=f"S{DIGEST_SIZE}")
+            records = np.unique(records) if unique else np.sort(records)
+            data = records.tobytes()
+        else:
+            records = set(self._records()) if unique else self._records()
+            data = b"".join(sorted(records))
+        return IDArray.from_bytearray(bytearray(data))
+
+    def sort(self) -> None:
+        """Sort in place"""
+        self._owned()[:] = self.sorted()._buf
+
+    def searchsorted(self, item: IDLike) -> int:
+        """Leftmost insertion point of ``item``; the array must be sorted"""
+        key = _digest_bytes(item)
+        buf = self._buf
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mid * DIGEST_SIZE
+            if bytes(buf[start : start + DIGEST_SIZE]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def contains_sorted(self, item: IDLike) -> bool:
+        """Binary-search membership test; the array must be sorted"""
+        index = self.searchsorted(item)
+        return index < len(self) and self._record(index) == _digest_bytes(item)
+
+    def __contains__(self, item: object) -> bool:
+        if not isinstance(item, (ID, bytes, bytearray, memoryview)):
+            return False
+        try:
+            key = _digest_bytes(item)
+        except ValueError:
+            return False
+        buf = self._buf if isinstance(self._buf, bytearray) else bytes(self._buf)
+        pos = buf.find(key)
+        while pos >= 0:
+            if pos % DIGEST_SIZE == 0:
+                return True
+            pos = buf.find(key, pos + 1)
+        return False
+
+    def to_numpy(self) -> Any:
+        """Zero-copy NumPy view with one ``S64`` element per digest"""
+        np = _numpy()
+        if np is None:
+            raise ImportError("IDArray.to_numpy requires numpy")
+        return np.frombuffer(self._buf, dtype=f"S{DIGEST_SIZE}")
@@ -0,0 +1,74 @@
+from typing import Dict, Iterable, Iterator, MutableMapping, Tuple, TypeVar, Union
+
+from .errors import ErrBadChar, ErrBadLength
+from .id import ID, Digest
+from .idarray import DIGEST_SIZE, IDArray
+
+V = TypeVar("V")
+
+KeyLike = Union[ID, Digest, bytes, str]
+
+
+def _key(item: KeyLike) -> bytes:
+    if isinstance(item, ID):
+        return bytes(item)
+    if isinstance(item, str):
+        try:
+            return bytes(ID.parse(item))
+        except (ErrBadChar, ErrBadLength):
+            raise KeyError(item) from None
+    if len(item) != DIGEST_SIZE:
+        raise KeyError(item)
+    return bytes(item)
+
+
+class IDIndex(MutableMapping[ID, V]):
+    """Mapping from C4 ID to payload, keyed on the raw 64-byte digest.
+
+    Keys may be given as ``ID`` objects, digests, raw bytes or ID strings;
+    lookups never build an ``ID`` or format a string.  Iteration yields
+    ``ID`` objects.
+    """
+
+    def __init__(self, items: Iterable[Tuple[KeyLike, V]] = ()) -> None:
+        self._data: Dict[bytes, V] = {}
+        for key, value in items:
+            self[key] = value
+
+    @classmethod
+    def from_array(cls, ids: IDArray, payloads: Iterable[V]) -> "IDIndex[V]":
+        """Index an IDArray, pairing each ID with the matching payload"""
+        index: IDIndex[V] = cls()
+        buf = ids.buffer
+        data = index._data
+        for start, value in zip(range(0, len(buf), DIGEST_SIZE), payloads):
+            data[buf[start : start + DIGEST_SIZE].tobytes()] = value
+        return index
+
+    def __getitem__(self, key: KeyLike) -> V:
+        return self._data[_key(key)]
+
+    def __setitem__(self, key: KeyLike, value: V) -> None:
+        self._data[_key(key)] = value
+
+    def __delitem__(self, key: KeyLike) -> None:
+        del self._data[_key(key)]
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, (ID, bytes, str)):
+            return False
+        try:
+            return _key(key) in self._data
+        except KeyError:
+            return False
+
+    def __iter__(self) -> Iterator[ID]:
+        for key in self._data:
+            yield ID.from_digest(key)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def ids(self) -> IDArray:
+        """All keys as a compact IDArray"""
+        return IDArray.from_buffer(b"".join(self._data))
@@ -0,0 +1,281 @@
+"""Multi-process manifest builder for very large trees.
+
+The walk itself is split across worker processes.  Each worker keeps a local
+stack of directories and works through it depth-first, hashing the files it
+finds.  When other workers are idle it moves the oldest (shallowest, usually
+largest) half of its stack onto a shared queue for them to take.  Results
+come back to the parent as packed binary records in batches, so the parent
+only decodes and merges.
+"""
+
+import multiprocessing
+import os
+import queue
+import struct
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from .id import ID, identify_path
+from .parallel import ErrorHandler, FileResult, InodeKey, default_jobs
+from .walk import PathFilter
+
+# digest, size, mtime_ns, ctime_ns, mode, path length; followed by the path
+RECORD = struct.Struct("<64sQqqII")
+
+# Records a worker buffers before sending a batch to the parent
+BATCH_RECORDS = 256
+
+# Seconds the parent waits for results before checking its workers are alive
+POLL_INTERVAL = 1.0
+
+_RECORDS = 0
+_ERROR = 1
+_DONE = 2
+
+
+def pack_record(path: str, file_id: ID, st: os.stat_result) -> bytes:
+    raw_path = os.fsencode(path)
+    return (
+        RECORD.pack(
+            bytes(file_id),
+            st.st_size,
+            st.st_mtime_ns,
+            st.st_ctime_ns,
+            st.st_mode,
+            len(raw_path),
+        )
+        + raw_path
+    )
+
+
+def unpack_records(data: bytes) -> Iterator[FileResult]:
+    """Decode a batch of packed records"""
+    offset = 0
+    while offset < len(data):
+        digest, size, mtime_ns, ctime_ns, mode, length = RECORD.unpack_from(
+            data, offset
+        )
+        offset += RECORD.size
+        path = os.fsdecode(data[offset : offset + length])
+        offset += length
+        st = os.stat_result(
+            (mode, 0, 0, 0, 0, 0, size, 0, mtime_ns / 1e9, ctime_ns / 1e9),
+            {"st_mtime_ns": mtime_ns, "st_ctime_ns": ctime_ns},
+        )
+        yield FileResult(path, ID.from_digest(digest), st)
+
+
+class _Shared:
+    """Queues and counters shared by the parent and every worker"""
+
+    def __init__(self, ctx: Any, jobs: int) -> None:
+        self.jobs = jobs
+        self.tasks = ctx.Queue()
+        self.results = ctx.Queue()
+        # Workers blocked waiting for a directory
+        self.idle = ctx.Value("i", 0)
+        # Directories discovered but not yet fully scanned
+        self.outstanding = ctx.Value("q", 1)
+
+
+# Directory, level below the root, and (when following links) the inodes
+# of the directories leading to it
+Task = Tuple[str, int, FrozenSet[InodeKey]]
+
+
+class _Scanner:
+    """Per-worker scan state: pending output and the worker's inode index"""
+
+    def __init__(
+        self,
+        follow_links: bool,
+        depth: int,
+        absolute: bool,
+        path_filter: Optional[PathFilter] = None,
+        prefix: int = 0,
+    ) -> None:
+        self.follow_links = follow_links
+        self.depth = depth
+        self.absolute = absolute
+        self.path_filter = path_filter
+        # Length of the root path plus separator, to slice off relative paths
+        self.prefix = prefix
+        self.records: List[bytes] = []
+        self.errors: List[Tuple[str, str]] = []
+        # Hard-linked (or, when following links, all) files hashed so far
+        self.inodes: Dict[InodeKey, ID] = {}
+
+    def scan(self, task: Task) -> List[Task]:
+        """Hash the files in one directory, returning its subdirectories"""
+        directory, level, chain = task
+        subdirs: List[Task] = []
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            self.errors.append((directory, str(e)))
+            return subdirs
+        path_filter = self.path_filter
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=self.follow_links):
+                    if (self.depth <= 0 or level < self.depth) and (
+                        not path_filter
+                        or path_filter.wants_dir(entry.name, entry.path[self.prefix :])
+                    ):
+                        subdirs.extend(self._subdir(entry, level, chain))
+                    continue
+                if entry.is_dir():
+                    # A symlink to a directory that is not followed
+                    continue
+            except OSError:
+                pass
+            if not path_filter or path_filter.wants_file(
+                entry.name, entry.path[self.prefix :]
+            ):
+                self._hash(entry.path)
+        return subdirs
+
+    def _subdir(
+        self, entry: "os.DirEntry[str]", level: int, chain: FrozenSet[InodeKey]
+    ) -> List[Task]:
+        if not self.follow_links:
+            return [(entry.path, level + 1, chain)]
+        st = entry.stat()
+        key = (st.st_dev, st.st_ino)
+        # Ancestors only, as in walk: a directory reached twice without a
+        # cycle is listed under both paths
+        if key in chain:
+            self.errors.append((entry.path, "filesystem loop"))
+            return []
+        return [(entry.path, level + 1, chain | {key})]
+
+    def _hash(self, path: str) -> None:
+        if self.absolute:
+            path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+            key = (st.st_dev, st.st_ino)
+            file_id = self.inodes.get(key)
+            if file_id is None:
+                file_id = identify_path(path)
+                assert file_id is not None
+                if self.follow_links or st.st_nlink > 1:
+                    self.inodes[key] = file_id
+            self.records.append(pack_record(path, file_id, st))
+        except Exception as e:
+            self.errors.append((path, str(e)))
+
+
+def _worker(shared: _Shared, scanner: _Scanner) -> None:
+    local: List[Task] = []
+
+    def send() -> None:
+        if scanner.records:
+            shared.results.put((_RECORDS, b"".join(scanner.records)))
+            scanner.records.clear()
+        for path, message in scanner.errors:
+            shared.results.put((_ERROR, path, message))
+        scanner.errors.clear()
+
+    while True:
+        if not local:
+            send()
+            with shared.idle.get_lock():
+                shared.idle.value += 1
+            task = shared.tasks.get()
+            with shared.idle.get_lock():
+                shared.idle.value -= 1
+            if task is None:
+                break
+            local.append(task)
+
+        subdirs = scanner.scan(local.pop())
+        if subdirs:
+            with shared.outstanding.get_lock():
+                shared.outstanding.value += len(subdirs)
+            local.extend(subdirs)
+        if shared.idle.value and len(local) > 1:
+            share = len(local) // 2
+            for task in local[:share]:
+                shared.tasks.put(task)
+            del local[:share]
+        if len(scanner.records) >= BATCH_RECORDS:
+            send()
+
+        with shared.outstanding.get_lock():
+            shared.outstanding.value -= 1
+            finished = shared.outstanding.value == 0
+        if finished:
+            send()
+            for _ in range(shared.jobs):
+                shared.tasks.put(None)
+
+    shared.results.put((_DONE,))
+
+
+def build_manifest(
+    root: str,
+    jobs: int = 0,
+    follow_links: bool = False,
+    depth: int = 0,
+    absolute: bool = False,
+    on_error: Optional[ErrorHandler] = None,
+    mp_context: Optional[Any] = None,
+    path_filter: Optional[PathFilter] = None,
+) -> Iterator[FileResult]:
+    """Identify every file under ``root`` using ``jobs`` worker processes.
+
+    Results arrive in no particular order and always carry a stat result
+    with the file's size, times and mode.  ``follow_links`` and ``depth``
+    match the CLI walk: a depth of N covers ``root`` and N levels of
+    subdirectories below it, and 0 means no limit.  Each worker hashes an
+    inode once and reuses its ID for further hard links it meets, and links
+    back to an ancestor directory are reported instead of followed.
+    ``path_filter`` globs are applied during the scan, as in ``walk``.
+    Files or directories that fail are reported to ``on_error`` and skipped.
+    """
+    if jobs <= 0:
+        jobs = default_jobs()
+    ctx = mp_context or multiprocessing.get_context()
+    shared = _Shared(ctx, jobs)
+    chain: FrozenSet[InodeKey] = frozenset()
+    if follow_links:
+        st = os.stat(root)
+        chain = frozenset([(st.st_dev, st.st_ino)])
+    shared.tasks.put((root, 0, chain))
+    scanner = _Scanner(
+        follow_links, depth, absolute, path_filter, len(os.path.join(root, ""))
+    )
+
+    workers = [
+        ctx.Process(
+            target=_worker,
+            args=(shared, scanner),
+            daemon=True,
+        )
+        for _ in range(jobs)
+    ]
+    for worker in workers:
+        worker.start()
+
+    running = jobs
+    try:
+        while running:
+            try:
+                message = shared.results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if any(w.exitcode not in (None, 0) for w in workers):
+                    raise RuntimeError("manifest worker exited unexpectedly")
+                continue
+            if message[0] == _RECORDS:
+                yield from unpack_records(message[1])
+            elif message[0] == _ERROR:
+                if on_error is not None:
+                    on_error(message[1], OSError(message[2]))
+            else:
+                running -= 1
+    finally:
+        if running:
+            for worker in workers:
+                worker.terminate()
+        for worker in workers:
+            worker.join()
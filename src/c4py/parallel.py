@@ -0,0 +1,219 @@
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from . import stats
+from .cache import IDCache
+from .id import ID, identify_path
+
+ErrorHandler = Callable[[str, Exception], None]
+
+
+def default_jobs() -> int:
+    """Number of workers used when jobs is 0"""
+    return os.cpu_count() or 1
+
+
+def hash_file(path: str) -> ID:
+    """Hash a single file, raising on error (runs inside pool workers)"""
+    file_id = identify_path(path)
+    assert file_id is not None
+    return file_id
+
+
+class _InlineExecutor(Executor):
+    """Executor that runs each call immediately in the calling thread"""
+
+    def submit(  # type: ignore[override]
+        self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any
+    ) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def _done(result: Optional[ID] = None, error: Optional[Exception] = None) -> Future:
+    future: Future = Future()
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+    return future
+
+
+def _same_file(a: os.stat_result, b: os.stat_result) -> bool:
+    return (a.st_dev, a.st_ino, a.st_size, a.st_mtime_ns) == (
+        b.st_dev,
+        b.st_ino,
+        b.st_size,
+        b.st_mtime_ns,
+    )
+
+
+InodeKey = Tuple[int, int]
+
+
+class InodeIndex:
+    """Inodes seen during one scan, keyed on ``(st_dev, st_ino)``.
+
+    ``identify_files`` hashes each indexed inode once and reuses its ID for
+    every other path that reaches it.  Only files with more than one hard
+    link are indexed, unless ``all_files`` is set (for scans that follow
+    symlinks, where any file may be reached twice), so memory stays
+    proportional to the number of possible duplicates.
+    """
+
+    def __init__(self, all_files: bool = False) -> None:
+        self.all_files = all_files
+        self.files: Dict[InodeKey, Future] = {}
+        # Paths that reused another path's ID instead of being hashed
+        self.reused = 0
+
+    def lookup(self, st: os.stat_result) -> Optional[Future]:
+        future = self.files.get((st.st_dev, st.st_ino))
+        if future is not None:
+            self.reused += 1
+        return future
+
+    def add(self, st: os.stat_result, future: Future) -> None:
+        if self.all_files or st.st_nlink > 1:
+            self.files[st.st_dev, st.st_ino] = future
+
+
+class FileResult(NamedTuple):
+    path: str
+    id: ID
+    # Set when the file was stat'ed (for the cache, the inode index or when
+    # requested)
+    stat: Optional[os.stat_result]
+
+
+def identify_files(
+    paths: Iterable[str],
+    jobs: int = 1,
+    processes: bool = False,
+    on_error: Optional[ErrorHandler] = None,
+    cache: Optional[IDCache] = None,
+    stat: bool = False,
+    inodes: Optional[InodeIndex] = None,
+) -> Iterator[FileResult]:
+    """Identify files on a pool of workers, yielding results in input order.
+
+    ``jobs`` is the number of workers (0 means one per CPU); ``jobs == 1``
+    hashes inline without a pool.  Thread workers are the default since
+    SHA-512 releases the GIL on large buffers; ``processes=True`` uses a
+    process pool instead.  At most a few results per worker are kept in
+    flight, so ``paths`` may be a lazy generator over a huge tree.  Files that
+    fail are reported to ``on_error`` and skipped.
+
+    With a ``cache``, each file is stat'ed first and only cache misses are
+    hashed; fresh results are stored back if the file did not change while
+    it was being read.  With ``stat=True`` every result carries the one stat
+    taken for the file, so callers need not stat it again.
+
+    With an ``inodes`` index, paths that reach an inode already scheduled
+    (hard links, or the same file seen through a symlink) reuse its ID
+    instead of reading the file again.
+    """
+    if jobs <= 0:
+        jobs = default_jobs()
+
+    executor: Executor
+    if jobs == 1:
+        executor = _InlineExecutor()
+    elif processes:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+    else:
+        executor = ThreadPoolExecutor(max_workers=jobs)
+
+    window = 0 if jobs == 1 else jobs * 4
+    pending: Deque[Tuple[str, Optional[os.stat_result], bool, Future]] = deque()
+
+    def schedule(path: str) -> Tuple[str, Optional[os.stat_result], bool, Future]:
+        if cache is None and not stat and inodes is None:
+            return path, None, False, executor.submit(hash_file, path)
+        try:
+            if stats.enabled:
+                start = stats.clock()
+                st = os.stat(path)
+                stats.phase(stats.STAT, stats.clock() - start)
+            else:
+                st = os.stat(path)
+        except OSError as e:
+            return path, None, False, _done(error=e)
+        if inodes is not None:
+            future = inodes.lookup(st)
+            if future is not None:
+                return path, st, False, future
+        fresh = False
+        future = None
+        if cache is not None:
+            cached = cache.lookup(st)
+            if cached is not None:
+                future = _done(cached)
+        if future is None:
+            fresh = cache is not None
+            future = executor.submit(hash_file, path)
+        if inodes is not None:
+            inodes.add(st, future)
+        return path, st, fresh, future
+
+    def drain(limit: int) -> Iterator[FileResult]:
+        while len(pending) > limit:
+            path, st, fresh, future = pending.popleft()
+            try:
+                file_id = future.result()
+            except Exception as e:
+                if stats.enabled:
+                    stats.error(path, e)
+                if on_error is not None:
+                    on_error(path, e)
+                continue
+            if fresh and cache is not None and st is not None:
+                try:
+                    if _same_file(st, os.stat(path)):
+                        cache.store(path, st, file_id)
+                except OSError:
+                    pass
+            yield FileResult(path, file_id, st)
+
+    try:
+        for path in paths:
+            pending.append(schedule(path))
+            yield from drain(window)
+        yield from drain(0)
+    finally:
+        for _, _, _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+        if cache is not None:
+            cache.commit()
+
+
+def identify_paths(
+    paths: Iterable[str],
+    jobs: int = 1,
+    processes: bool = False,
+    on_error: Optional[ErrorHandler] = None,
+    cache: Optional[IDCache] = None,
+) -> Iterator[Tuple[str, ID]]:
+    """Identify files on a pool of workers, yielding (path, ID) in input order.
+
+    See ``identify_files`` for the meaning of the arguments.
+    """
+    for result in identify_files(paths, jobs, processes, on_error, cache):
+        yield result.path, result.id
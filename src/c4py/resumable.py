@@ -0,0 +1,458 @@
+"""Resumable SHA-512 hashing for long-running streams.
+
+``hashlib`` objects cannot be serialized, so an interrupted ingest has to
+start again from byte zero.  ``ResumableEncoder`` computes the same C4 ID as
+``Encoder`` but can export its SHA-512 state at any point: the eight chaining
+words, the byte count and the partial block not yet compressed.  The state
+is portable between the two backends: OpenSSL's libcrypto through ctypes
+when it is available (full native speed) and a pure-Python implementation
+otherwise.
+"""
+
+import ctypes
+import ctypes.util
+import io
+import os
+import stat
+import struct
+from typing import BinaryIO, List, NamedTuple, Optional, Tuple, Union, cast
+
+from .id import ID, Digest
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+BLOCK_SIZE = 128
+
+# magic, version, bytes hashed, eight chaining words, pending length
+STATE_HEADER = struct.Struct(">4sHQ8QB")
+STATE_MAGIC = b"C4SR"
+STATE_VERSION = 2
+# After the pending bytes: source present, dev, ino, size, mtime_ns and
+# path length, then the UTF-8 path
+SOURCE_HEADER = struct.Struct(">?QQQqH")
+
+_IV = (
+    0x6A09E667F3BCC908,
+    0xBB67AE8584CAA73B,
+    0x3C6EF372FE94F82B,
+    0xA54FF53A5F1D36F1,
+    0x510E527FADE682D1,
+    0x9B05688C2B3E6C1F,
+    0x1F83D9ABFB41BD6B,
+    0x5BE0CD19137E2179,
+)
+
+_K = (
+    0x428A2F98D728AE22, 0x7137449123EF65CD, 0xB5C0FBCFEC4D3B2F, 0xE9B5DBA58189DBBC,
+    0x3956C25BF348B538, 0x59F111F1B605D019, 0x923F82A4AF194F9B, 0xAB1C5ED5DA6D8118,
+    0xD807AA98A3030242, 0x12835B0145706FBE, 0x243185BE4EE4B28C, 0x550C7DC3D5FFB4E2,
+    0x72BE5D74F27B896F, 0x80DEB1FE3B1696B1, 0x9BDC06A725C71235, 0xC19BF174CF692694,
+    0xE49B69C19EF14AD2, 0xEFBE4786384F25E3, 0x0FC19DC68B8CD5B5, 0x240CA1CC77AC9C65,
+    0x2DE92C6F592B0275, 0x4A7484AA6EA6E483, 0x5CB0A9DCBD41FBD4, 0x76F988DA831153B5,
+    0x983E5152EE66DFAB, 0xA831C66D2DB43210, 0xB00327C898FB213F, 0xBF597FC7BEEF0EE4,
+    0xC6E00BF33DA88FC2, 0xD5A79147930AA725, 0x06CA6351E003826F, 0x142929670A0E6E70,
+    0x27B70A8546D22FFC, 0x2E1B21385C26C926, 0x4D2C6DFC5AC42AED, 0x53380D139D95B3DF,
+    0x650A73548BAF63DE, 0x766A0ABB3C77B2A8, 0x81C2C92E47EDAEE6, 0x92722C851482353B,
+    0xA2BFE8A14CF10364, 0xA81A664BBC423001, 0xC24B8B70D0F89791, 0xC76C51A30654BE30,
+    0xD192E819D6EF5218, 0xD69906245565A910, 0xF40E35855771202A, 0x106AA07032BBD1B8,
+    0x19A4C116B8D2D0C8, 0x1E376C085141AB53, 0x2748774CDF8EEB99, 0x34B0BCB5E19B48A8,
+    0x391C0CB3C5C95A63, 0x4ED8AA4AE3418ACB, 0x5B9CCA4F7763E373, 0x682E6FF3D6B2B8A3,
+    0x748F82EE5DEFB2FC, 0x78A5636F43172F60, 0x84C87814A1F0AB72, 0x8CC702081A6439EC,
+    0x90BEFFFA23631E28, 0xA4506CEBDE82BDE9, 0xBEF9A3F7B2C67915, 0xC67178F2E372532B,
+    0xCA273ECEEA26619C, 0xD186B8C721C0C207, 0xEADA7DD6CDE0EB1E, 0xF57D4F7FEE6ED178,
+    0x06F067AA72176FBA, 0x0A637DC5A2C898A6, 0x113F9804BEF90DAE, 0x1B710B35131C471B,
+    0x28DB77F523047D84, 0x32CAAB7B40C72493, 0x3C9EBE0A15C9BEBC, 0x431D67C49C100D4C,
+    0x4CC5D4BECB3E42B6, 0x597F299CFC657E2A, 0x5FCB6FAB3AD6FAEC, 0x6C44198C4A475817,
+)  # fmt: skip
+
+_MASK = (1 << 64) - 1
+_WORDS = struct.Struct(">16Q")
+
+# (chaining words, bytes hashed, pending partial block)
+State = Tuple[Tuple[int, ...], int, bytes]
+
+
+def _compress(h: List[int], block: Buffer) -> None:
+    """Run the SHA-512 compression function over one 128-byte block"""
+    mask = _MASK
+    w = list(_WORDS.unpack(block))
+    for t in range(16, 80):
+        x = w[t - 15]
+        s0 = ((x >> 1 | x << 63) ^ (x >> 8 | x << 56) ^ (x >> 7)) & mask
+        x = w[t - 2]
+        s1 = ((x >> 19 | x << 45) ^ (x >> 61 | x << 3) ^ (x >> 6)) & mask
+        w.append((w[t - 16] + s0 + w[t - 7] + s1) & mask)
+
+    a, b, c, d, e, f, g, hh = h
+    for t in range(80):
+        s1 = (e >> 14 | e << 50) ^ (e >> 18 | e << 46) ^ (e >> 41 | e << 23)
+        ch = (e & f) ^ (~e & g)
+        t1 = hh + (s1 & mask) + ch + _K[t] + w[t]
+        s0 = (a >> 28 | a << 36) ^ (a >> 34 | a << 30) ^ (a >> 39 | a << 25)
+        t2 = (s0 & mask) + ((a & b) ^ (a & c) ^ (b & c))
+        hh, g, f = g, f, e
+        e = (d + t1) & mask
+        d, c, b = c, b, a
+        a = (t1 + t2) & mask
+
+    for i, v in enumerate((a, b, c, d, e, f, g, hh)):
+        h[i] = (h[i] + v) & mask
+
+
+def _padding(length: int) -> bytes:
+    pad = -(length + 17) % BLOCK_SIZE
+    return b"\x80" + bytes(pad) + (length * 8).to_bytes(16, "big")
+
+
+class PythonSha512:
+    """SHA-512 in pure Python, with its state exposed"""
+
+    name = "python"
+
+    def __init__(self, state: Optional[State] = None) -> None:
+        if state is None:
+            state = (_IV, 0, b"")
+        words, self.length, pending = state
+        self.h = list(words)
+        self.pending = bytearray(pending)
+
+    def update(self, data: Buffer) -> None:
+        view = memoryview(data).cast("B")
+        self.length += len(view)
+        if self.pending:
+            take = min(BLOCK_SIZE - len(self.pending), len(view))
+            self.pending += view[:take]
+            view = view[take:]
+            if len(self.pending) < BLOCK_SIZE:
+                return
+            _compress(self.h, self.pending)
+            self.pending.clear()
+        full = len(view) - len(view) % BLOCK_SIZE
+        for start in range(0, full, BLOCK_SIZE):
+            _compress(self.h, view[start : start + BLOCK_SIZE])
+        self.pending += view[full:]
+
+    def state(self) -> State:
+        return tuple(self.h), self.length, bytes(self.pending)
+
+    def digest(self) -> bytes:
+        h = list(self.h)
+        tail = bytes(self.pending) + _padding(self.length)
+        for start in range(0, len(tail), BLOCK_SIZE):
+            _compress(h, tail[start : start + BLOCK_SIZE])
+        return struct.pack(">8Q", *h)
+
+
+class _SHA512_CTX(ctypes.Structure):
+    # Layout of OpenSSL's SHA512_CTX (sha.h), unchanged since 0.9.8
+    _fields_ = [
+        ("h", ctypes.c_uint64 * 8),
+        ("Nl", ctypes.c_uint64),
+        ("Nh", ctypes.c_uint64),
+        ("p", ctypes.c_ubyte * BLOCK_SIZE),
+        ("num", ctypes.c_uint),
+        ("md_len", ctypes.c_uint),
+    ]
+
+
+_libcrypto: Optional[ctypes.CDLL] = None
+_libcrypto_checked = False
+
+
+def _load_libcrypto() -> Optional[ctypes.CDLL]:
+    global _libcrypto, _libcrypto_checked
+    if _libcrypto_checked:
+        return _libcrypto
+    _libcrypto_checked = True
+    name = ctypes.util.find_library("crypto")
+    if name is None:
+        return None
+    try:
+        lib = ctypes.CDLL(name)
+        for fn in (lib.SHA512_Init, lib.SHA512_Update, lib.SHA512_Final):
+            fn.restype = ctypes.c_int
+        lib.SHA512_Update.argtypes = [
+            ctypes.POINTER(_SHA512_CTX),
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+        ]
+    except (OSError, AttributeError):
+        return None
+    if not _self_test(lib):
+        return None
+    _libcrypto = lib
+    return lib
+
+
+def _self_test(lib: ctypes.CDLL) -> bool:
+    """Check the struct layout by round-tripping a state through Python"""
+    ctx = _SHA512_CTX()
+    lib.SHA512_Init(ctypes.byref(ctx))
+    data = bytes(range(200))
+    lib.SHA512_Update(ctypes.byref(ctx), data, len(data))
+    exported = LibcryptoSha512._export(ctx)
+    py = PythonSha512()
+    py.update(data)
+    return exported == py.state()
+
+
+class LibcryptoSha512:
+    """OpenSSL's SHA-512 through ctypes, with its state exposed"""
+
+    name = "libcrypto"
+
+    def __init__(self, state: Optional[State] = None) -> None:
+        lib = _load_libcrypto()
+        if lib is None:
+            raise RuntimeError("libcrypto SHA-512 is not available")
+        self._lib = lib
+        self._ctx = _SHA512_CTX()
+        lib.SHA512_Init(ctypes.byref(self._ctx))
+        if state is not None:
+            words, length, pending = state
+            self._ctx.h[:] = words
+            bits = length * 8
+            self._ctx.Nl = bits & _MASK
+            self._ctx.Nh = bits >> 64
+            ctypes.memmove(self._ctx.p, pending, len(pending))
+            self._ctx.num = len(pending)
+
+    def update(self, data: Buffer) -> None:
+        if isinstance(data, bytes):
+            self._lib.SHA512_Update(ctypes.byref(self._ctx), data, len(data))
+            return
+        view = memoryview(data).cast("B")
+        if view.readonly:
+            # ctypes cannot point into read-only buffers such as mmaps
+            self.update(bytes(view))
+            return
+        buf = (ctypes.c_char * len(view)).from_buffer(view)
+        self._lib.SHA512_Update(ctypes.byref(self._ctx), buf, len(view))
+
+    @staticmethod
+    def _export(ctx: _SHA512_CTX) -> State:
+        length = ((ctx.Nh << 64) | ctx.Nl) // 8
+        return tuple(ctx.h), length, bytes(ctx.p[: ctx.num])
+
+    def state(self) -> State:
+        return self._export(self._ctx)
+
+    def digest(self) -> bytes:
+        ctx = _SHA512_CTX.from_buffer_copy(self._ctx)
+        out = ctypes.create_string_buffer(64)
+        self._lib.SHA512_Final(out, ctypes.byref(ctx))
+        return out.raw
+
+
+class Source(NamedTuple):
+    """The regular file a checkpointed stream was read from"""
+
+    path: str
+    dev: int
+    ino: int
+    size: int
+    mtime_ns: int
+
+
+def source_of(src: BinaryIO) -> Optional[Source]:
+    """Identify the regular file behind ``src``, or None for pipes and buffers"""
+    try:
+        st = os.fstat(src.fileno())
+    except (AttributeError, OSError, ValueError):
+        # io.BytesIO and friends raise io.UnsupportedOperation (a ValueError)
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    # Names like "<stdin>" and integer descriptors are not paths
+    name = getattr(src, "name", "")
+    path = ""
+    if isinstance(name, str) and not name.startswith("<"):
+        path = os.path.abspath(name)
+    return Source(path, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def default_backend() -> str:
+    """The fastest resumable backend available here"""
+    return "libcrypto" if _load_libcrypto() is not None else "python"
+
+
+BACKENDS = {"python": PythonSha512, "libcrypto": LibcryptoSha512}
+
+
+class ResumableEncoder:
+    """An ``Encoder`` whose progress can be checkpointed and resumed.
+
+    ``checkpoint()`` returns a few hundred bytes describing everything hashed
+    so far; ``ResumableEncoder.resume(data)`` continues from there, and
+    ``offset`` says where the input must pick up.  Checkpoints are portable
+    between backends and machines.  ``source``, when set, is saved with each
+    checkpoint so a resume can check it is reading the same file.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[str] = None,
+        state: Optional[State] = None,
+        source: Optional[Source] = None,
+    ) -> None:
+        if backend is None:
+            backend = default_backend()
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}")
+        self._hasher = BACKENDS[backend](state)
+        self.backend = backend
+        self.source = source
+
+    @property
+    def offset(self) -> int:
+        """Number of bytes hashed so far"""
+        return self._hasher.state()[1]
+
+    def write(self, data: Buffer) -> int:
+        self._hasher.update(data)
+        return len(data)
+
+    def id(self) -> ID:
+        return ID.from_digest(self._hasher.digest())
+
+    def digest(self) -> Digest:
+        return Digest(self._hasher.digest())
+
+    def reset(self) -> None:
+        self._hasher = BACKENDS[self.backend]()
+
+    def checkpoint(self) -> bytes:
+        words, length, pending = self._hasher.state()
+        header = STATE_HEADER.pack(
+            STATE_MAGIC, STATE_VERSION, length, *words, len(pending)
+        )
+        source = self.source or Source("", 0, 0, 0, 0)
+        path = source.path.encode("utf-8", "surrogateescape")
+        return (
+            header
+            + pending
+            + SOURCE_HEADER.pack(self.source is not None, *source[1:], len(path))
+            + path
+        )
+
+    @classmethod
+    def resume(cls, data: bytes, backend: Optional[str] = None) -> "ResumableEncoder":
+        """Rebuild an encoder from ``checkpoint()`` output"""
+        if len(data) < STATE_HEADER.size:
+            raise ValueError("not a c4py checkpoint")
+        magic, version, length, *rest = STATE_HEADER.unpack_from(data)
+        words, pending_len = tuple(rest[:8]), rest[8]
+        start = STATE_HEADER.size + pending_len
+        if (
+            magic != STATE_MAGIC
+            or version != STATE_VERSION
+            or pending_len != length % BLOCK_SIZE
+            or len(data) < start + SOURCE_HEADER.size
+        ):
+            raise ValueError("not a c4py checkpoint")
+        pending = data[STATE_HEADER.size : start]
+        present, *fields, path_len = SOURCE_HEADER.unpack_from(data, start)
+        path = data[start + SOURCE_HEADER.size :]
+        if len(path) != path_len:
+            raise ValueError("not a c4py checkpoint")
+        source = None
+        if present:
+            source = Source(path.decode("utf-8", "surrogateescape"), *fields)
+        return cls(backend, (words, length, bytes(pending)), source)
+
+
+def _describe(source: Optional[Source]) -> str:
+    if source is None:
+        return "a stream"
+    return f"{source.path or 'a file'} ({source.size} bytes, mtime {source.mtime_ns})"
+
+
+def _can_resume(
+    saved: Optional[Source], current: Optional[Source], offset: int
+) -> bool:
+    """Whether a checkpoint taken from ``saved`` may continue on ``current``.
+
+    The file may have grown since (it is still being written), but it must
+    still hold the hashed prefix, and the same size with a new mtime means
+    it was rewritten in place.
+    """
+    if saved is None or current is None:
+        return saved == current
+    if saved[:3] != current[:3] or current.size < offset:
+        return False
+    if current.size == saved.size:
+        return current.mtime_ns == saved.mtime_ns
+    return current.size > saved.size
+
+
+def load_checkpoint(path: str, backend: Optional[str] = None) -> ResumableEncoder:
+    with open(path, "rb") as f:
+        return ResumableEncoder.resume(f.read(), backend)
+
+
+def save_checkpoint(path: str, encoder: ResumableEncoder) -> None:
+    """Write a checkpoint atomically, so a crash never leaves a torn file"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(encoder.checkpoint())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def identify_resumable(
+    src: BinaryIO,
+    checkpoint_path: str,
+    every: int = 1 << 30,
+    resume: bool = False,
+    chunk_size: int = 1 << 20,
+    backend: Optional[str] = None,
+) -> ID:
+    """Identify a stream, saving a checkpoint every ``every`` bytes.
+
+    With ``resume``, hashing continues from the checkpoint if one exists.  A
+    seekable ``src`` is positioned at the checkpoint's offset; otherwise
+    ``src`` must already start there (the producer resumes from that byte).
+    A checkpoint taken from a regular file records its path, inode, size and
+    mtime.  Resuming raises ValueError for any other source, for a file now
+    shorter than the checkpoint's offset, or for one the same size with a
+    new mtime; a file that has only grown (still being written) resumes.
+    The checkpoint is removed once the ID is known.
+    """
+    source = source_of(src)
+    encoder = None
+    if resume and os.path.exists(checkpoint_path):
+        encoder = load_checkpoint(checkpoint_path, backend)
+        if not _can_resume(encoder.source, source, encoder.offset):
+            raise ValueError(
+                f"checkpoint {checkpoint_path} was taken from "
+                f"{_describe(encoder.source)}, not {_describe(source)}"
+            )
+        encoder.source = source
+        if src.seekable():
+            src.seek(encoder.offset)
+    if encoder is None:
+        encoder = ResumableEncoder(backend, source=source)
+
+    next_checkpoint = encoder.offset + every
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    reader = cast(io.BufferedIOBase, src)
+    while True:
+        n = reader.readinto(view)
+        if not n:
+            break
+        encoder.write(view[:n])
+        if encoder.offset >= next_checkpoint:
+            if source is not None:
+                # Record the size and mtime as of this checkpoint
+                encoder.source = source_of(src)
+            save_checkpoint(checkpoint_path, encoder)
+            next_checkpoint = encoder.offset + every
+
+    file_id = encoder.id()
+    try:
+        os.remove(checkpoint_path)
+    except FileNotFoundError:
+        pass
+    return file_id
@@ -0,0 +1,335 @@
+"""A long-running identification server on a Unix socket.
+
+``c4py serve`` keeps an ID cache and a pool of hashing threads warm between
+requests, so a build system that identifies one artifact at a time pays a
+socket round trip instead of an interpreter start, and files it has already
+seen are answered from the cache after a single ``stat``.
+
+The protocol is one JSON object per line in each direction; every request
+gets exactly one reply, in order::
+
+    {"op": "ping"}                        -> {"version": "0.1.0", "cached": 12}
+    {"op": "path", "path": "/abs/file"}   -> {"id": "c4..."}
+    {"op": "bytes", "data": "<base64>"}   -> {"id": "c4..."}
+    {"op": "batch", "paths": [...]}       -> {"results": [{"id": ...}, ...]}
+
+A failed request, or a failed path within a batch, is answered with
+``{"error": "message", "errno": N}`` (``errno`` is null for errors that are
+not from the operating system).  Only regular files are identified by
+path; send anything else as bytes.  Relative paths are resolved against the
+server's working directory, so clients should send absolute paths.
+"""
+
+import base64
+import binascii
+import errno
+import json
+import os
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import TracebackType
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
+
+from . import __version__
+from .cache import IDCache
+from .id import ID, get_sha512
+from .parallel import ErrorHandler, _done, _same_file, default_jobs, hash_file
+
+# Longest request line accepted; base64 data grows by a third
+MAX_REQUEST = 64 * 1024 * 1024
+
+# Paths per request when the client sends a batch
+BATCH_PATHS = 1000
+
+Reply = Dict[str, Any]
+
+
+class ServerError(Exception):
+    """A request failed on the server for a reason other than an OS error"""
+
+
+def default_socket_path() -> str:
+    """Per-user socket in ``$XDG_RUNTIME_DIR``, or the temp directory"""
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return os.path.join(runtime, "c4py.sock")
+    return os.path.join(tempfile.gettempdir(), f"c4py-{os.getuid()}.sock")
+
+
+def _error(e: Exception) -> Reply:
+    return {"error": str(e), "errno": getattr(e, "errno", None)}
+
+
+def _remove_stale(path: str) -> None:
+    """Remove a socket left behind by a server that is no longer running"""
+    try:
+        if not stat.S_ISSOCK(os.lstat(path).st_mode):
+            return
+    except OSError:
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise OSError(errno.EADDRINUSE, "a server is already listening", path)
+    finally:
+        probe.close()
+
+
+def _check_regular(path: str, st: os.stat_result) -> None:
+    # Reading a FIFO or device could tie up a hashing thread indefinitely
+    if stat.S_ISDIR(st.st_mode):
+        raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), path)
+    if not stat.S_ISREG(st.st_mode):
+        raise OSError(errno.EINVAL, "not a regular file", path)
+
+
+def _paths(value: Any) -> List[str]:
+    if not isinstance(value, list) or not all(isinstance(p, str) for p in value):
+        raise TypeError("paths must be a list of strings")
+    return value
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "Server"
+
+    def handle(self) -> None:
+        while True:
+            line = self.rfile.readline(MAX_REQUEST + 1)
+            if not line:
+                return
+            if len(line) > MAX_REQUEST:
+                self._send({"error": "request too large", "errno": None})
+                return
+            try:
+                reply = self.server.dispatch(json.loads(line))
+            except ValueError as e:
+                reply = {"error": f"bad request: {e}", "errno": None}
+            except Exception as e:
+                reply = _error(e)
+            self._send(reply)
+
+    def _send(self, reply: Reply) -> None:
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+
+class Server(socketserver.ThreadingUnixStreamServer):
+    """Serve identification requests on a Unix socket.
+
+    Each connection is handled on its own thread; files are hashed on a
+    shared pool of ``jobs`` threads (0 means one per CPU).  IDs are cached
+    in the SQLite cache at ``cache_path``, or in memory for the life of the
+    server.  The socket is created readable and writable by its owner only.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, socket_path: str, cache_path: Optional[str] = None, jobs: int = 0
+    ) -> None:
+        self.socket_path = socket_path
+        _remove_stale(socket_path)
+        self.cache = IDCache(cache_path or ":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=jobs or default_jobs())
+        umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _Handler)
+        except BaseException:
+            self._pool.shutdown()
+            self.cache.close()
+            raise
+        finally:
+            os.umask(umask)
+
+    def identify_paths(self, paths: Iterable[str]) -> List[Union[ID, Exception]]:
+        """IDs of files, or the exception each failed one raised, in order"""
+        scheduled: List[Tuple[str, Optional[os.stat_result], Future]] = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                _check_regular(path, st)
+            except OSError as e:
+                scheduled.append((path, None, _done(error=e)))
+                continue
+            with self._lock:
+                cached = self.cache.lookup(st)
+            if cached is not None:
+                scheduled.append((path, None, _done(cached)))
+            else:
+                scheduled.append((path, st, self._pool.submit(hash_file, path)))
+
+        results: List[Union[ID, Exception]] = []
+        stored = False
+        for path, st, future in scheduled:
+            try:
+                file_id = future.result()
+            except Exception as e:
+                results.append(e)
+                continue
+            results.append(file_id)
+            if st is None:
+                continue
+            # Only cache files that did not change while they were read
+            try:
+                unchanged = _same_file(st, os.stat(path))
+            except OSError:
+                unchanged = False
+            if unchanged:
+                with self._lock:
+                    self.cache.store(path, st, file_id)
+                stored = True
+        if stored:
+            with self._lock:
+                self.cache.commit()
+        return results
+
+    def dispatch(self, request: Any) -> Reply:
+        """Reply to one decoded request"""
+        try:
+            op = request["op"]
+            if op == "ping":
+                with self._lock:
+                    cached = len(self.cache)
+                return {"version": __version__, "cached": cached}
+            if op == "path":
+                path = _paths([request["path"]])
+                return self._reply(self.identify_paths(path)[0])
+            if op == "bytes":
+                data = base64.b64decode(request["data"], validate=True)
+                digest = get_sha512()(data).digest()
+                return {"id": str(ID.from_digest(digest))}
+            if op == "batch":
+                paths = _paths(request["paths"])
+                return {"results": list(map(self._reply, self.identify_paths(paths)))}
+        except (KeyError, TypeError, binascii.Error) as e:
+            return {"error": f"bad request: {e!r}", "errno": None}
+        return {"error": f"unknown op {op!r}", "errno": None}
+
+    @staticmethod
+    def _reply(result: Union[ID, Exception]) -> Reply:
+        if isinstance(result, Exception):
+            return _error(result)
+        return {"id": str(result)}
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._pool.shutdown()
+        with self._lock:
+            self.cache.close()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+
+def serve(
+    socket_path: Optional[str] = None, cache_path: Optional[str] = None, jobs: int = 0
+) -> None:
+    """Run a server until interrupted"""
+    with Server(socket_path or default_socket_path(), cache_path, jobs) as server:
+        server.serve_forever()
+
+
+class Client:
+    """Connection to a running server; not shared between threads"""
+
+    def __init__(
+        self, socket_path: Optional[str] = None, timeout: Optional[float] = None
+    ) -> None:
+        self.socket_path = socket_path or default_socket_path()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(self.socket_path)
+        except BaseException:
+            self._sock.close()
+            raise
+        self._file = self._sock.makefile("rwb")
+
+    def request(self, request: Reply) -> Reply:
+        """Send one request and wait for its reply"""
+        self._file.write(json.dumps(request).encode() + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ServerError("server closed the connection")
+        return json.loads(line)
+
+    @staticmethod
+    def _result(reply: Reply, path: Optional[str] = None) -> ID:
+        if "error" not in reply:
+            return ID.parse(reply["id"])
+        code = reply.get("errno")
+        if code:
+            raise OSError(code, os.strerror(code), path)
+        raise ServerError(reply["error"])
+
+    def ping(self) -> Reply:
+        return self.request({"op": "ping"})
+
+    def identify_path(self, path: str) -> ID:
+        """ID of a file, raising ``OSError`` if the server cannot read it"""
+        reply = self.request({"op": "path", "path": os.path.abspath(path)})
+        return self._result(reply, path)
+
+    def identify_bytes(self, data: Union[bytes, bytearray, memoryview]) -> ID:
+        encoded = base64.b64encode(data).decode("ascii")
+        return self._result(self.request({"op": "bytes", "data": encoded}))
+
+    def identify_paths(
+        self,
+        paths: Iterable[str],
+        on_error: Optional[ErrorHandler] = None,
+        batch_size: int = BATCH_PATHS,
+    ) -> Iterator[Tuple[str, ID]]:
+        """Yield (path, ID) in input order, ``batch_size`` paths per request.
+
+        Files that fail are reported to ``on_error`` and skipped.
+        """
+        batch: List[str] = []
+        for path in paths:
+            batch.append(path)
+            if len(batch) >= batch_size:
+                yield from self._batch(batch, on_error)
+                batch = []
+        if batch:
+            yield from self._batch(batch, on_error)
+
+    def _batch(
+        self, paths: List[str], on_error: Optional[ErrorHandler]
+    ) -> Iterator[Tuple[str, ID]]:
+        reply = self.request(
+            {"op": "batch", "paths": [os.path.abspath(p) for p in paths]}
+        )
+        if "error" in reply:
+            raise ServerError(reply["error"])
+        for path, result in zip(paths, reply["results"]):
+            try:
+                file_id = self._result(result, path)
+            except (OSError, ServerError) as e:
+                if on_error is not None:
+                    on_error(path, e)
+                continue
+            yield path, file_id
+
+    def close(self) -> None:
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
@@ -0,0 +1,200 @@
+"""Instrumentation hooks for hashing runs.
+
+The hashing code reports what it does to registered hooks: time spent in
+each phase (walking directories, stat calls, reading, hashing, formatting
+output), each file it finishes and each error.  With no hooks registered
+the only cost is a check of the module-level ``enabled`` flag.  While a
+hook is active, reads and hash updates are timed separately.
+
+Hooks may be called from worker threads.  ``RunStats`` collects totals for
+a ``--stats`` report and ``Progress`` prints a live status line.
+"""
+
+from __future__ import annotations
+
+import time
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Iterable, Iterator, List, Optional, TextIO, Tuple, TypeVar
+
+    T = TypeVar("T")
+
+WALK = "walk"
+STAT = "stat"
+IO = "io"
+HASH = "hash"
+FORMAT = "format"
+PHASES = (WALK, STAT, IO, HASH, FORMAT)
+
+# True while at least one hook is registered; checked before any timing
+enabled = False
+_hooks: List[Hook] = []
+
+clock = time.perf_counter
+
+
+class Hook:
+    """Base class for instrumentation hooks; override the events you need.
+
+    A hook is registered with ``add_hook`` or by using it as a context
+    manager.
+    """
+
+    def on_phase(self, phase: str, seconds: float) -> None:
+        pass
+
+    def on_file(self, path: str, size: int, seconds: float) -> None:
+        pass
+
+    def on_error(self, path: str, error: Exception) -> None:
+        pass
+
+    def __enter__(self) -> Hook:
+        add_hook(self)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        remove_hook(self)
+
+
+def add_hook(hook: Hook) -> None:
+    global enabled
+    _hooks.append(hook)
+    enabled = True
+
+
+def remove_hook(hook: Hook) -> None:
+    global enabled
+    _hooks.remove(hook)
+    enabled = bool(_hooks)
+
+
+def phase(name: str, seconds: float) -> None:
+    for hook in _hooks:
+        hook.on_phase(name, seconds)
+
+
+def file_done(path: str, size: int, seconds: float) -> None:
+    for hook in _hooks:
+        hook.on_file(path, size, seconds)
+
+
+def error(path: str, exc: Exception) -> None:
+    for hook in _hooks:
+        hook.on_error(path, exc)
+
+
+def timed(iterable: Iterable[T], name: str) -> Iterator[T]:
+    """Yield from ``iterable``, charging the time spent producing to ``name``"""
+    it = iter(iterable)
+    total = 0.0
+    try:
+        while True:
+            start = clock()
+            try:
+                item = next(it)
+            except StopIteration:
+                total += clock() - start
+                return
+            total += clock() - start
+            yield item
+    finally:
+        phase(name, total)
+
+
+def _size(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1000 or unit == "GB":
+            return f"{n:.1f} {unit}" if unit != "B" else f"{n:.0f} B"
+        n /= 1000
+    return ""  # pragma: no cover
+
+
+class RunStats(Hook):
+    """Totals for one run: files, bytes, errors, phase times, slowest files"""
+
+    def __init__(self, slowest: int = 5) -> None:
+        import threading
+
+        self._lock = threading.Lock()
+        self.started = clock()
+        self.files = 0
+        self.bytes = 0
+        self.errors = 0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.keep = slowest
+        # (seconds, path, size), slowest first
+        self.slowest: List[Tuple[float, str, int]] = []
+
+    def on_phase(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def on_file(self, path: str, size: int, seconds: float) -> None:
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+            if len(self.slowest) < self.keep or seconds > self.slowest[-1][0]:
+                self.slowest.append((seconds, path, size))
+                self.slowest.sort(key=lambda entry: -entry[0])
+                del self.slowest[self.keep :]
+
+    def on_error(self, path: str, error: Exception) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def report(self, elapsed: Optional[float] = None) -> str:
+        """Multi-line summary; phase times are summed over all workers"""
+        if elapsed is None:
+            elapsed = clock() - self.started
+        rate = 1 / elapsed if elapsed > 0 else 0.0
+        lines = [
+            f"hashed   {self.files} files ({self.errors} errors)",
+            f"read     {_size(self.bytes)}",
+            f"elapsed  {elapsed:.3f} s, {self.files * rate:.1f} files/s, "
+            f"{_size(self.bytes * rate)}/s",
+            "time     "
+            + ", ".join(f"{name} {self.phases[name]:.3f} s" for name in self.phases),
+        ]
+        for seconds, path, size in self.slowest:
+            lines.append(f"slow     {seconds:.3f} s  {_size(size):>9}  {path}")
+        return "\n".join(lines)
+
+
+class Progress(Hook):
+    """Rewrites one status line on ``stream`` at most every ``interval`` s"""
+
+    def __init__(self, stream: TextIO, interval: float = 0.5) -> None:
+        import threading
+
+        self._lock = threading.Lock()
+        self.stream = stream
+        self.interval = interval
+        self.started = clock()
+        self._next = self.started + interval
+        self.files = 0
+        self.bytes = 0
+
+    def on_file(self, path: str, size: int, seconds: float) -> None:
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+            now = clock()
+            if now >= self._next:
+                self._next = now + self.interval
+                self._write(now)
+
+    def _write(self, now: float) -> None:
+        elapsed = max(now - self.started, 1e-9)
+        self.stream.write(
+            f"\r{self.files} files, {_size(self.bytes)}, "
+            f"{_size(self.bytes / elapsed)}/s"
+        )
+        self.stream.flush()
+
+    def __exit__(self, *exc: Any) -> None:
+        super().__exit__(*exc)
+        if self.files:
+            self._write(clock())
+            self.stream.write("\n")
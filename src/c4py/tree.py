@@ -0,0 +1,212 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Union
+
+from .errors import ErrInvalidTree
+from .id import ID, Digest, get_sha512
+from .idarray import IDArray
+
+DIGEST_SIZE = 64
+
+# Levels with fewer digests than this are always reduced in-process
+PARALLEL_THRESHOLD = 1 << 16
+
+
+def _to_digest_bytes(item: Union[ID, Digest, bytes]) -> bytes:
+    if isinstance(item, ID):
+        return item.digest()
+    if len(item) != DIGEST_SIZE:
+        raise ErrInvalidTree()
+    return bytes(item)
+
+
+def reduce_level(level: Union[bytes, bytearray]) -> bytes:
+    """Combine a flat buffer of digests pairwise into the next level up.
+
+    Each pair is hashed as in ``Digest.sum``; an odd digest at the end is
+    carried up unchanged.
+    """
+    count = len(level) // DIGEST_SIZE
+    out = bytearray()
+    sha512 = get_sha512()
+    for start in range(0, (count - 1) * DIGEST_SIZE, 2 * DIGEST_SIZE):
+        a = level[start : start + DIGEST_SIZE]
+        b = level[start + DIGEST_SIZE : start + 2 * DIGEST_SIZE]
+        if a == b:
+            out += a
+            continue
+        if a > b:
+            a, b = b, a
+        h = sha512(a)
+        h.update(b)
+        out += h.digest()
+    if count % 2:
+        out += level[(count - 1) * DIGEST_SIZE :]
+    return bytes(out)
+
+
+def _reduce_parallel(level: bytes, jobs: int) -> bytes:
+    count = len(level) // DIGEST_SIZE
+    # Split on even boundaries so every chunk reduces exactly as the whole would
+    per_chunk = max(2, -(-count // (jobs * 4)))
+    per_chunk += per_chunk % 2
+    step = per_chunk * DIGEST_SIZE
+    chunks = [level[i : i + step] for i in range(0, len(level), step)]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return b"".join(executor.map(reduce_level, chunks))
+
+
+class Tree:
+    """C4 tree of a set of IDs, reduced level by level into a single root ID.
+
+    Leaves are sorted and deduplicated, then adjacent pairs are combined
+    with SHA-512 until one digest remains.  Every level is held as one flat
+    ``bytes`` buffer of 64-byte digests, so a tree over millions of leaves
+    does not need a Python object per node.
+    """
+
+    def __init__(self, items: Iterable[Union[ID, Digest, bytes]] = ()) -> None:
+        buf = bytearray()
+        for item in items:
+            buf += _to_digest_bytes(item)
+        self._set_leaves(buf)
+
+    @classmethod
+    def from_buffer(cls, buf: Union[bytes, bytearray, memoryview]) -> "Tree":
+        """Build a tree from a flat buffer of 64-byte digests"""
+        view = memoryview(buf).cast("B")
+        if len(view) % DIGEST_SIZE:
+            raise ErrInvalidTree()
+        tree = cls.__new__(cls)
+        tree._set_leaves(view)
+        return tree
+
+    def _set_leaves(self, buf: Union[bytearray, memoryview]) -> None:
+        # Sorted and deduplicated as one buffer (by NumPy when installed)
+        leaves = IDArray.from_buffer(buf).sorted(unique=True).tobytes()
+        self._levels: List[bytes] = [leaves]
+        self._complete = len(leaves) <= DIGEST_SIZE
+
+    def __len__(self) -> int:
+        return len(self._levels[0]) // DIGEST_SIZE
+
+    def leaves(self) -> bytes:
+        """Sorted, deduplicated leaf digests as one flat buffer"""
+        return self._levels[0]
+
+    def compute(self, jobs: int = 1) -> "Tree":
+        """Reduce the tree to its root, using ``jobs`` processes for big levels"""
+        while not self._complete:
+            level = self._levels[-1]
+            if jobs > 1 and len(level) // DIGEST_SIZE >= PARALLEL_THRESHOLD:
+                level = _reduce_parallel(level, jobs)
+            else:
+                level = reduce_level(level)
+            self._levels.append(level)
+            self._complete = len(level) == DIGEST_SIZE
+        return self
+
+    def levels(self) -> List[bytes]:
+        """All levels from the leaves up to the root"""
+        return list(self.compute()._levels)
+
+    def digest(self) -> Optional[Digest]:
+        root = self.compute()._levels[-1]
+        if not root:
+            return None
+        return Digest(root)
+
+    def id(self) -> Optional[ID]:
+        digest = self.digest()
+        if digest is None:
+            return None
+        return digest.id()
+
+
+class IncrementalTree:
+    """Tree ID of a changing multiset of leaves.
+
+    Leaves can be added and removed one at a time; a leaf added more than
+    once stays in the tree until it has been removed as often.  Every level
+    of the last reduction is kept, and the next one only rehashes the pairs
+    from the first leaf position that changed, so a batch of changes costs
+    one partial reduction however many leaves it touched.
+    """
+
+    def __init__(self, items: Iterable[Union[ID, Digest, bytes]] = ()) -> None:
+        self._counts: Dict[bytes, int] = {}
+        self._levels: List[bytearray] = [bytearray()]
+        # Lowest leaf position changed since the last reduction
+        self._dirty: Optional[int] = None
+        for item in items:
+            self.add(item)
+
+    def __len__(self) -> int:
+        return len(self._levels[0]) // DIGEST_SIZE
+
+    def _position(self, digest: bytes) -> int:
+        leaves = self._levels[0]
+        lo, hi = 0, len(leaves) // DIGEST_SIZE
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if leaves[mid * DIGEST_SIZE : (mid + 1) * DIGEST_SIZE] < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _changed(self, position: int) -> None:
+        if self._dirty is None or position < self._dirty:
+            self._dirty = position
+
+    def add(self, item: Union[ID, Digest, bytes]) -> None:
+        digest = _to_digest_bytes(item)
+        count = self._counts.get(digest, 0)
+        self._counts[digest] = count + 1
+        if count == 0:
+            i = self._position(digest) * DIGEST_SIZE
+            self._levels[0][i:i] = digest
+            self._changed(i // DIGEST_SIZE)
+
+    def remove(self, item: Union[ID, Digest, bytes]) -> None:
+        """Remove one occurrence of a leaf, raising KeyError if absent"""
+        digest = _to_digest_bytes(item)
+        count = self._counts[digest]
+        if count > 1:
+            self._counts[digest] = count - 1
+            return
+        del self._counts[digest]
+        i = self._position(digest) * DIGEST_SIZE
+        del self._levels[0][i : i + DIGEST_SIZE]
+        self._changed(i // DIGEST_SIZE)
+
+    def _reduce(self) -> None:
+        first = self._dirty
+        if first is None:
+            return
+        levels = self._levels
+        k = 0
+        while len(levels[k]) > DIGEST_SIZE:
+            # Pairs before the first change reduce exactly as they did before
+            start = first // 2 * 2
+            if k + 1 == len(levels):
+                levels.append(bytearray())
+            upper = levels[k + 1]
+            del upper[start // 2 * DIGEST_SIZE :]
+            upper += reduce_level(levels[k][start * DIGEST_SIZE :])
+            first = start // 2
+            k += 1
+        del levels[k + 1 :]
+        self._dirty = None
+
+    def digest(self) -> Optional[Digest]:
+        self._reduce()
+        root = self._levels[-1]
+        if not root:
+            return None
+        return Digest(bytes(root))
+
+    def id(self) -> Optional[ID]:
+        digest = self.digest()
+        if digest is None:
+            return None
+        return digest.id()
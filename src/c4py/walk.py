@@ -0,0 +1,187 @@
+"""Directory walking built on ``os.scandir``.
+
+Unlike ``os.walk``, the walk stops descending at the depth limit, reuses
+the type (and, when following links, stat) information each ``DirEntry``
+already carries, and applies include/exclude globs as it goes, so excluded
+subtrees are never listed.  The cost of a walk is proportional to the
+directories it actually visits.
+"""
+
+import fnmatch
+import os
+import re
+from typing import Callable, Iterable, Iterator, List, Optional, Pattern, Tuple
+
+from . import stats
+from .parallel import ErrorHandler, InodeKey
+
+
+def _compile(patterns: Iterable[str]) -> Tuple[Optional[Pattern], Optional[Pattern]]:
+    """One regex for name patterns and one for patterns containing a slash"""
+    names = [fnmatch.translate(p) for p in patterns if "/" not in p]
+    paths = [fnmatch.translate(p.strip("/")) for p in patterns if "/" in p]
+    return (
+        re.compile("|".join(names)) if names else None,
+        re.compile("|".join(paths)) if paths else None,
+    )
+
+
+class PathFilter:
+    """Include/exclude globs, matched during a walk.
+
+    A pattern without a slash matches an entry's name; one with a slash
+    matches its path relative to the walk root.  Excludes apply to files and
+    directories (an excluded directory is not entered); includes apply to
+    files only, and when there are none every file is included.
+    """
+
+    def __init__(
+        self, include: Iterable[str] = (), exclude: Iterable[str] = ()
+    ) -> None:
+        self.include = tuple(include)
+        self.exclude = tuple(exclude)
+        self._include = _compile(self.include)
+        self._exclude = _compile(self.exclude)
+
+    def __bool__(self) -> bool:
+        return bool(self.include or self.exclude)
+
+    @staticmethod
+    def _match(
+        patterns: Tuple[Optional[Pattern], Optional[Pattern]], name: str, rel: str
+    ) -> bool:
+        by_name, by_path = patterns
+        return bool(
+            (by_name is not None and by_name.match(name))
+            or (by_path is not None and by_path.match(rel.replace(os.sep, "/")))
+        )
+
+    def wants_dir(self, name: str, rel: str) -> bool:
+        return not self._match(self._exclude, name, rel)
+
+    def wants_file(self, name: str, rel: str) -> bool:
+        if self._match(self._exclude, name, rel):
+            return False
+        return not self.include or self._match(self._include, name, rel)
+
+
+# Directory, level below the root, and (when following links) the inodes of
+# the directories leading to it.  Only a link back into this chain is a loop:
+# a directory reached again along another path (two links to one target) is
+# still listed there, so a scan-wide visited set like InodeIndex won't do.
+_Frame = Tuple[str, int, frozenset]
+
+
+def walk(
+    root: str,
+    follow_links: bool = False,
+    depth: int = 0,
+    path_filter: Optional[PathFilter] = None,
+    on_error: Optional[ErrorHandler] = None,
+    on_dir: Optional[Callable[[str], None]] = None,
+    base: Optional[str] = None,
+) -> Iterator["os.DirEntry[str]"]:
+    """Yield a ``DirEntry`` for every file under ``root``.
+
+    Files come in ``os.walk`` order: a directory's files in listing order,
+    then each of its subdirectories in turn.  A depth of N covers ``root``
+    and N levels of subdirectories below it (0 means no limit); deeper
+    directories are never opened.  Symlinks to directories are only entered
+    with ``follow_links``, and then links back to an ancestor are reported
+    to ``on_error`` as a filesystem loop instead of followed.  Directories
+    that cannot be listed are reported to ``on_error`` and skipped.
+    ``on_dir`` is called with each directory once it has been listed.
+    Filter paths are relative to ``base`` (default ``root``), so a walk of
+    part of a tree can apply the tree's globs.
+    """
+    if stats.enabled:
+        return stats.timed(
+            _walk(
+                root,
+                follow_links,
+                depth,
+                path_filter,
+                _counting(on_error),
+                on_dir,
+                base,
+            ),
+            stats.WALK,
+        )
+    return _walk(root, follow_links, depth, path_filter, on_error, on_dir, base)
+
+
+def _counting(on_error: Optional[ErrorHandler]) -> ErrorHandler:
+    def report(path: str, error: Exception) -> None:
+        stats.error(path, error)
+        if on_error is not None:
+            on_error(path, error)
+
+    return report
+
+
+def _walk(
+    root: str,
+    follow_links: bool,
+    depth: int,
+    path_filter: Optional[PathFilter],
+    on_error: Optional[ErrorHandler],
+    on_dir: Optional[Callable[[str], None]],
+    base: Optional[str],
+) -> Iterator["os.DirEntry[str]"]:
+    prefix = len(os.path.join(root if base is None else base, ""))
+    chain: frozenset = frozenset()
+    if follow_links:
+        st = os.stat(root)
+        chain = frozenset([(st.st_dev, st.st_ino)])
+    stack: List[_Frame] = [(root, 0, chain)]
+    while stack:
+        directory, level, chain = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError as e:
+            if on_error is not None:
+                on_error(directory, e)
+            continue
+        if on_dir is not None:
+            on_dir(directory)
+
+        descend = depth <= 0 or level < depth
+        subdirs: List[_Frame] = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if not descend or (not follow_links and entry.is_symlink()):
+                    continue
+                if path_filter and not path_filter.wants_dir(
+                    entry.name, entry.path[prefix:]
+                ):
+                    continue
+                if follow_links:
+                    key = _inode(entry)
+                    if key is None:
+                        continue
+                    if key in chain:
+                        if on_error is not None:
+                            on_error(entry.path, OSError("filesystem loop"))
+                        continue
+                    subdirs.append((entry.path, level + 1, chain | {key}))
+                else:
+                    subdirs.append((entry.path, level + 1, chain))
+            elif not path_filter or path_filter.wants_file(
+                entry.name, entry.path[prefix:]
+            ):
+                yield entry
+        stack.extend(reversed(subdirs))
+
+
+def _inode(entry: "os.DirEntry[str]") -> Optional[InodeKey]:
+    # DirEntry caches this stat, so a followed link is only stat'ed once
+    try:
+        st = entry.stat()
+    except OSError:
+        return None
+    return st.st_dev, st.st_ino
@@ -0,0 +1,406 @@
+"""Incremental identification of a directory as it changes.
+
+A ``Watcher`` identifies every file under a directory once, then only the
+files that are created, modified, moved or deleted.  On Linux it listens
+for inotify events; elsewhere, or on request, it polls the tree and
+compares each file's inode, size and modification time with the previous
+pass.  Either way only files that changed are hashed again.
+
+Events are debounced per path: a file is hashed once nothing has happened
+to it for ``debounce`` seconds, so a file that is still being written is
+read once, after the writes stop.  A file that changes while it is being
+read is queued again rather than reported.  The tree ID of the directory is
+kept in an ``IncrementalTree`` and updated with each batch of changes.
+"""
+
+import os
+import select
+import stat
+import struct
+import sys
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from .cache import IDCache
+from .diff import ADDED, MODIFIED, MOVED, REMOVED, Change
+from .id import ID
+from .parallel import ErrorHandler, _same_file, identify_files
+from .tree import IncrementalTree
+from .walk import PathFilter, walk
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+    | IN_DONT_FOLLOW
+)
+
+# Inode, size and modification time, compared to spot changed files
+StatKey = Tuple[int, int, int]
+
+# struct inotify_event: wd, mask, cookie, len, then len bytes of name
+_EVENT = struct.Struct("iIII")
+
+# Seconds a path must be quiet before it is hashed
+DEFAULT_DEBOUNCE = 0.2
+# Seconds between passes of the polling fallback
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+def _libc() -> object:
+    import ctypes
+    import ctypes.util
+
+    return ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+
+def inotify_available() -> bool:
+    """Whether this platform provides inotify"""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        return hasattr(_libc(), "inotify_init1")
+    except OSError:
+        return False
+
+
+def _key(st: os.stat_result) -> StatKey:
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class _Inotify:
+    """Directory watches on one inotify descriptor"""
+
+    name = "inotify"
+
+    def __init__(self, root: str, on_error: Optional[ErrorHandler]) -> None:
+        import ctypes
+
+        self._ctypes = ctypes
+        self._lib = _libc()
+        fd = self._lib.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)  # type: ignore
+        if fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+        self._fd = fd
+        self._root = root
+        self._on_error = on_error
+        self._dirs: Dict[int, str] = {}
+
+    def watch(self, directory: str) -> None:
+        wd = self._lib.inotify_add_watch(  # type: ignore
+            self._fd, os.fsencode(directory), WATCH_MASK
+        )
+        if wd < 0:
+            code = self._ctypes.get_errno()
+            # ENOSPC means fs.inotify.max_user_watches is exhausted
+            if self._on_error is not None:
+                self._on_error(directory, OSError(code, os.strerror(code)))
+            return
+        self._dirs[wd] = directory
+
+    def read(self, timeout: Optional[float]) -> List[str]:
+        """Paths named by events arriving within ``timeout`` seconds"""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        paths = []
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            paths.extend(self._parse(data))
+        return paths
+
+    def _parse(self, data: bytes) -> Iterator[str]:
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: look at the whole tree again
+                yield self._root
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._dirs[wd]
+            elif mask & IN_MOVE_SELF:
+                # The parent reports the move; stop reporting the old path
+                self._lib.inotify_rm_watch(self._fd, wd)  # type: ignore
+                del self._dirs[wd]
+            elif name:
+                yield os.path.join(directory, os.fsdecode(name))
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class _Poller:
+    """Finds changes by comparing stat results between passes over the tree"""
+
+    name = "poll"
+
+    def __init__(self, list_files: Callable[[], Iterator[str]], interval: float):
+        self._list_files = list_files
+        self._interval = interval
+        self._snapshot = self._stat_all()
+        self._next = time.monotonic() + interval
+
+    def _stat_all(self) -> Dict[str, StatKey]:
+        snapshot = {}
+        for path in self._list_files():
+            try:
+                snapshot[path] = _key(os.stat(path))
+            except OSError:
+                continue
+        return snapshot
+
+    def watch(self, directory: str) -> None:
+        pass
+
+    def read(self, timeout: Optional[float]) -> List[str]:
+        wait = self._next - time.monotonic()
+        if timeout is not None and timeout < wait:
+            time.sleep(max(timeout, 0))
+            return []
+        if wait > 0:
+            time.sleep(wait)
+        self._next = time.monotonic() + self._interval
+        old, new = self._snapshot, self._stat_all()
+        self._snapshot = new
+        changed = [path for path, key in new.items() if old.get(path) != key]
+        changed.extend(path for path in old if path not in new)
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class Watcher:
+    """Keep the IDs and tree ID of the files under ``root`` up to date.
+
+    Call ``scan`` once to identify the existing files, then ``poll`` (or
+    iterate) to receive batches of changes.  ``polling=True`` forces the
+    polling fallback, which otherwise is only used where inotify is not
+    available.  ``jobs``, ``cache`` and ``on_error`` are passed to
+    ``identify_files``.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        path_filter: Optional[PathFilter] = None,
+        debounce: float = DEFAULT_DEBOUNCE,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        polling: bool = False,
+        jobs: int = 1,
+        cache: Optional[IDCache] = None,
+        on_error: Optional[ErrorHandler] = None,
+    ) -> None:
+        self.root = root
+        self.path_filter = path_filter
+        self.debounce = debounce
+        self.jobs = jobs
+        self.cache = cache
+        self.on_error = on_error
+        self.ids: Dict[str, ID] = {}
+        self._keys: Dict[str, StatKey] = {}
+        self.tree = IncrementalTree()
+        self.closed = False
+        self._prefix = len(os.path.join(root, ""))
+        # Path -> time of the last event seen for it
+        self._pending: Dict[str, float] = {}
+        self._source: Union[_Inotify, _Poller]
+        if polling or not inotify_available():
+            self._source = _Poller(lambda: self._list(root, False), poll_interval)
+        else:
+            self._source = _Inotify(root, on_error)
+
+    @property
+    def backend(self) -> str:
+        """``"inotify"`` or ``"poll"``"""
+        return self._source.name
+
+    def tree_id(self) -> Optional[ID]:
+        return self.tree.id()
+
+    def _list(self, directory: str, watch: bool = True) -> Iterator[str]:
+        """Files under ``directory`` that pass the filter, watching each directory"""
+        entries = walk(
+            directory,
+            path_filter=self.path_filter,
+            on_error=self.on_error,
+            on_dir=self._source.watch if watch else None,
+            base=self.root,
+        )
+        for entry in entries:
+            yield entry.path
+
+    def scan(self) -> List[Change]:
+        """Identify every file under the root; each is reported as added"""
+        return self._identify(list(self._list(self.root)))
+
+    def _identify(self, paths: List[str]) -> List[Change]:
+        changes = []
+        for result in identify_files(
+            paths, self.jobs, on_error=self.on_error, cache=self.cache, stat=True
+        ):
+            path, file_id, st = result
+            try:
+                unchanged = st is not None and _same_file(st, os.stat(path))
+            except OSError:
+                unchanged = False
+            if st is None or not unchanged:
+                # Changed while it was read; look again once it settles
+                self._pending[path] = time.monotonic()
+                continue
+            self._keys[path] = _key(st)
+            old = self.ids.get(path)
+            if old == file_id:
+                continue
+            self.ids[path] = file_id
+            self.tree.add(file_id)
+            if old is None:
+                changes.append(Change(ADDED, path, file_id))
+            else:
+                self.tree.remove(old)
+                changes.append(Change(MODIFIED, path, file_id, old))
+        return changes
+
+    def _forget(self, path: str) -> List[Change]:
+        """Drop a path, and everything under it if it was a directory"""
+        under = os.path.join(path, "")
+        gone = [p for p in self.ids if p == path or p.startswith(under)]
+        changes = []
+        for p in gone:
+            old = self.ids.pop(p)
+            del self._keys[p]
+            self.tree.remove(old)
+            changes.append(Change(REMOVED, p, None, old))
+        return changes
+
+    def _wanted(self, path: str) -> bool:
+        if not self.path_filter:
+            return True
+        return self.path_filter.wants_file(os.path.basename(path), path[self._prefix :])
+
+    def _unchanged(self, path: str) -> bool:
+        try:
+            return self._keys.get(path) == _key(os.stat(path))
+        except OSError:
+            return False
+
+    def _process(self, paths: List[str]) -> List[Change]:
+        changes: List[Change] = []
+        files: List[str] = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                changes.extend(self._forget(path))
+                continue
+            if stat.S_ISDIR(st.st_mode):
+                # A directory created or moved in (or an inotify overflow)
+                present = set(self._list(path))
+                under = os.path.join(path, "")
+                for known in [p for p in self.ids if p.startswith(under)]:
+                    if known not in present:
+                        changes.extend(self._forget(known))
+                files.extend(p for p in present if not self._unchanged(p))
+            elif stat.S_ISREG(st.st_mode) and self._wanted(path):
+                files.append(path)
+            else:
+                changes.extend(self._forget(path))
+        changes.extend(self._identify(files))
+        return _pair_moves(changes)
+
+    def poll(self, timeout: Optional[float] = None) -> List[Change]:
+        """Wait up to ``timeout`` seconds (None: forever) for a batch of changes"""
+        clock = time.monotonic
+        deadline = None if timeout is None else clock() + timeout
+        while True:
+            now = clock()
+            ready = [p for p, t in self._pending.items() if now - t >= self.debounce]
+            if ready:
+                for path in ready:
+                    del self._pending[path]
+                changes = self._process(ready)
+                if changes:
+                    return changes
+                continue
+            wait: Optional[float] = None
+            if self._pending:
+                wait = min(self._pending.values()) + self.debounce - now
+            if deadline is not None:
+                remaining = deadline - now
+                if remaining <= 0:
+                    return []
+                wait = remaining if wait is None else min(wait, remaining)
+            for path in self._source.read(wait):
+                self._pending[path] = clock()
+
+    def __iter__(self) -> Iterator[List[Change]]:
+        """Batches of changes until ``close`` is called"""
+        while not self.closed:
+            changes = self.poll(1.0)
+            if changes:
+                yield changes
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self._source.close()
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _pair_moves(changes: List[Change]) -> List[Change]:
+    """Report a removed path whose ID reappeared at an added path as a move"""
+    added: Dict[ID, List[int]] = defaultdict(list)
+    for i, change in enumerate(changes):
+        if change.status == ADDED and change.id is not None:
+            added[change.id].append(i)
+    if not added:
+        return changes
+    result: List[Optional[Change]] = [*changes]
+    for i, change in enumerate(changes):
+        if change.status != REMOVED or change.old_id is None:
+            continue
+        targets = added.get(change.old_id)
+        if targets:
+            j = targets.pop(0)
+            result[j] = Change(
+                MOVED, changes[j].path, change.old_id, change.old_id, change.path
+            )
+            result[i] = None
+    return [c for c in result if c is not None]
@@ -1,8 +1,11 @@
 # tests/conftest.py
 import pytest
 import os
+import hashlib
 import tempfile
-from typing import Generator, Tuple
+from typing import Callable, Generator, List, Tuple
+
+from c4py import ID, Digest
 
 
 @pytest.fixture
@@ -27,3 +30,45 @@ def temp_dir() -> Generator[str, None, None]:
         for name in dirs:
             os.rmdir(os.path.join(root, name))
     os.rmdir(path)
+
+
+@pytest.fixture
+def write() -> Callable[[str, bytes], str]:
+    """Returns a function that writes bytes to a path and returns the path"""
+
+    def write_file(path: str, data: bytes) -> str:
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    return write_file
+
+
+@pytest.fixture
+def make_tree(write: Callable[[str, bytes], str]) -> Callable[[str], None]:
+    """Returns a function that fills a directory with a small nested tree.
+
+    Seven directories (including two named ``build``) each hold an
+    ``x.txt`` and a ``y.exr`` whose contents differ everywhere.
+    """
+
+    def make(root: str) -> None:
+        for sub in ["", "a", "a/b", "a/b/c", "d", "build", "d/build"]:
+            directory = os.path.join(root, sub)
+            os.makedirs(directory, exist_ok=True)
+            for name in ("x.txt", "y.exr"):
+                write(os.path.join(directory, name), (sub + name).encode())
+
+    return make
+
+
+@pytest.fixture
+def sample() -> Callable[[int], List[ID]]:
+    """Returns a function that makes ``count`` distinct IDs"""
+
+    def ids(count: int) -> List[ID]:
+        return [
+            Digest(hashlib.sha512(str(i).encode()).digest()).id() for i in range(count)
+        ]
+
+    return ids
@@ -0,0 +1,99 @@
+import asyncio
+import io
+import threading
+from typing import AsyncIterator, List
+
+import pytest
+
+from c4py import identify
+from c4py.aio import AsyncEncoder, HashingPool, identify_async
+
+DATA = bytes(range(256)) * 2000
+
+
+async def chunks(data: bytes, size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+def test_identify_async_iterator() -> None:
+    """Test async iterators of small and large chunks"""
+    expected = identify(io.BytesIO(DATA))
+    for size in (100, 4096, 200000):
+        assert asyncio.run(identify_async(chunks(DATA, size))) == expected
+
+
+def test_identify_async_stream_reader() -> None:
+    """Test identifying an asyncio.StreamReader"""
+
+    async def run() -> object:
+        reader = asyncio.StreamReader()
+        reader.feed_data(DATA)
+        reader.feed_eof()
+        return await identify_async(reader, chunk_size=100000)
+
+    assert asyncio.run(run()) == identify(io.BytesIO(DATA))
+
+
+def test_identify_async_rejects_other_types() -> None:
+    """Test that plain byte strings are rejected"""
+    with pytest.raises(TypeError):
+        asyncio.run(identify_async(b"data"))  # type: ignore
+
+
+def test_async_encoder_offloads_large_writes() -> None:
+    """Test that large updates run on pool threads, small ones inline"""
+    pool = HashingPool(max_workers=2)
+    threads: List[str] = []
+
+    class Recording(HashingPool):
+        async def run(self, fn, *args):  # type: ignore[override]
+            def wrapped(*a):  # type: ignore[no-untyped-def]
+                threads.append(threading.current_thread().name)
+                return fn(*a)
+
+            return await pool.run(wrapped, *args)
+
+    async def run() -> object:
+        enc = AsyncEncoder(Recording(), threshold=1000)
+        await enc.write(b"x" * 10)
+        assert threads == []
+        await enc.write(b"x" * 2000)
+        await enc.write(b"y" * 5000)
+        await enc.write(b"z" * 10)
+        return enc.id()
+
+    try:
+        result = asyncio.run(run())
+    finally:
+        pool.shutdown()
+
+    assert result == identify(io.BytesIO(b"x" * 2010 + b"y" * 5000 + b"z" * 10))
+    assert len(threads) == 2
+    assert all(name.startswith("c4py-hash") for name in threads)
+
+
+def test_hashing_pool_limits_concurrency() -> None:
+    """Test that many encoders share a bounded number of pending updates"""
+    pool = HashingPool(max_workers=2, max_pending=2)
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work() -> None:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        threading.Event().wait(0.01)
+        with lock:
+            active -= 1
+
+    async def run() -> None:
+        await asyncio.gather(*(pool.run(work) for _ in range(10)))
+
+    try:
+        asyncio.run(run())
+    finally:
+        pool.shutdown()
+    assert peak <= 2
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import subprocess
+import sys
+from typing import Any, Iterator
+
+import pytest
+from click.testing import CliRunner
+
+from c4py import Digest, Encoder, Tree, backends, identify_path
+from c4py.batch import digest_many
+from c4py.cli import main
+
+
+@pytest.fixture(autouse=True)
+def restore_backend() -> Iterator[None]:
+    name = backends.active()
+    yield
+    backends.use(name)
+
+
+def test_hashlib_is_default_and_verified() -> None:
+    """hashlib is used unless told otherwise and passes its known answers"""
+    assert backends.active() == "hashlib"
+    assert backends.status("hashlib") == "ok"
+    assert "hashlib" in backends.available()
+
+
+def test_verify_rejects_wrong_digests() -> None:
+    """A constructor that gets any vector wrong is refused"""
+
+    class Broken:
+        def __init__(self, data: Any = b"") -> None:
+            self._h = hashlib.sha512(data)
+
+        def update(self, data: Any) -> None:
+            # Drops single-byte updates, so only the split check catches it
+            if len(data) > 1:
+                self._h.update(data)
+
+        def digest(self) -> bytes:
+            return self._h.digest()
+
+    assert backends.verify(hashlib.sha512)
+    assert not backends.verify(Broken)
+    assert not backends.verify(hashlib.sha384)
+
+
+def test_unknown_backend() -> None:
+    """Unknown names raise ValueError and leave the backend unchanged"""
+    with pytest.raises(ValueError, match="unknown hash backend"):
+        backends.use("md5")
+    assert backends.active() == "hashlib"
+
+
+@pytest.mark.parametrize("name", ["python", "libcrypto"])
+def test_backends_are_bit_identical(name: str, tmp_path: str) -> None:
+    """IDs, sums, trees and batches match hashlib under every backend"""
+    if backends.status(name) != "ok":
+        pytest.skip(f"{name} backend not available")
+    path = os.path.join(tmp_path, "data")
+    with open(path, "wb") as f:
+        f.write(os.urandom(3000))
+    records = [os.urandom(n) for n in (0, 1, 200)]
+    a, b = (Digest(hashlib.sha512(bytes([i])).digest()) for i in range(2))
+
+    def snapshot() -> tuple:
+        enc = Encoder()
+        enc.write(b"abc")
+        return (
+            identify_path(path),
+            enc.id(),
+            a.sum(b),
+            Tree([a, b, Digest(bytes(64))]).id(),
+            bytes(digest_many(records)),
+        )
+
+    expected = snapshot()
+    assert backends.use(name) == name
+    assert backends.active() == name
+    assert snapshot() == expected
+
+
+def test_benchmark_picks_fastest(monkeypatch: pytest.MonkeyPatch) -> None:
+    """auto uses the backend with the shortest mixed-workload time"""
+    monkeypatch.setattr(backends, "STREAM_SIZE", 256 * 1024)
+    monkeypatch.setattr(backends, "SUM_COUNT", 64)
+    timings = backends.benchmark(repeat=1)
+    assert "hashlib" in timings and "python" not in timings
+    assert backends.fastest(timings) in timings
+    assert backends.use("auto") in timings
+    fake = {
+        "a": backends.Timing(1.0, 1.0, 2.0),
+        "b": backends.Timing(1.0, 1.0, 1.0),
+    }
+    assert backends.fastest(fake) == "b"
+
+
+def test_env_selects_backend() -> None:
+    """C4PY_HASH_BACKEND is applied on import; bad names only warn"""
+    code = "import c4py, c4py.backends as b; print(b.active())"
+    env = dict(os.environ, C4PY_HASH_BACKEND="python")
+    out = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True
+    )
+    assert out.stdout.strip() == "python"
+    env["C4PY_HASH_BACKEND"] = "nope"
+    out = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True
+    )
+    assert out.stdout.strip() == "hashlib"
+    assert "C4PY_HASH_BACKEND ignored" in out.stderr
+
+
+def test_cli_hash_backend(tmp_path: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    """--hash-backend goes before the default command's arguments"""
+    # The option exports C4PY_HASH_BACKEND for worker processes
+    monkeypatch.setenv("C4PY_HASH_BACKEND", "")
+    path = os.path.join(tmp_path, "f")
+    with open(path, "wb") as f:
+        f.write(b"data")
+    runner = CliRunner()
+    result = runner.invoke(main, ["--hash-backend", "python", "-V", path])
+    assert result.exit_code == 0
+    assert result.output == f"{identify_path(path)}: {path}\n"
+    assert os.environ["C4PY_HASH_BACKEND"] == "python"
+    result = runner.invoke(main, ["--hash-backend=bogus", path])
+    assert result.exit_code == 2
+    assert "unknown hash backend" in result.output
+
+
+def test_cli_backends(monkeypatch: pytest.MonkeyPatch) -> None:
+    """backends lists every backend and the fastest"""
+    monkeypatch.setattr(backends, "STREAM_SIZE", 256 * 1024)
+    monkeypatch.setattr(backends, "SUM_COUNT", 64)
+    result = CliRunner().invoke(main, ["backends", "--repeat", "1"])
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert lines[0].startswith("cpu")
+    assert any(line.startswith("* hashlib") for line in lines)
+    assert lines[-1].startswith("fastest")
@@ -0,0 +1,52 @@
+import io
+from typing import List
+
+import pytest
+
+from c4py import IDArray, identify, identify_many, identify_packed
+from c4py.batch import digest_many
+
+
+def records(count: int) -> List[bytes]:
+    return [bytes([i % 256]) * (i % 37) + str(i).encode() for i in range(count)]
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_identify_many(jobs: int) -> None:
+    """Test that batch IDs match one-at-a-time identification, in order"""
+    data = records(1000)
+    ids = identify_many(iter(data), jobs=jobs, batch_size=64)
+    assert isinstance(ids, IDArray)
+    assert list(ids) == [identify(io.BytesIO(r)) for r in data]
+
+
+@pytest.mark.parametrize("jobs", [1, 0])
+def test_identify_packed(jobs: int) -> None:
+    """Test records packed in one buffer, including empty ones"""
+    data = records(300) + [b""]
+    offsets = [0]
+    for record in data:
+        offsets.append(offsets[-1] + len(record))
+    packed = bytearray(b"".join(data))
+    ids = identify_packed(packed, offsets, jobs=jobs, batch_size=7)
+    assert ids == identify_many(data)
+    assert len(ids) == len(data)
+    assert str(ids[-1]) == str(identify(io.BytesIO(b"")))
+
+
+@pytest.mark.parametrize("offsets", [[0, 3, 2], [0, 5, 11], [-1, 2], [4, 2]])
+def test_identify_packed_bad_offsets(offsets: List[int]) -> None:
+    """Test that offsets running backwards or past the buffer are refused"""
+    with pytest.raises(ValueError):
+        identify_packed(b"0123456789", offsets)
+
+
+def test_batch_empty() -> None:
+    """Test that empty inputs give empty arrays that can still grow"""
+    assert len(identify_many([])) == 0
+    assert len(identify_packed(b"", [])) == 0
+    assert len(identify_packed(b"", [0])) == 0
+    ids = identify_many([b"a"])
+    ids.extend(identify_many([b"b"]))
+    assert len(ids) == 2
+    assert len(digest_many([b"a", b"b"])) == 128
@@ -0,0 +1,62 @@
+import json
+
+import c4py
+
+from click.testing import CliRunner
+
+from c4py import bench
+from c4py.cli import main
+
+
+def test_bench_codec(tmp_path) -> None:
+    """Test that the codec benchmark defines every case"""
+    cases = bench.bench_codec(str(tmp_path), quick=True)
+    assert [case.name for case in cases] == [
+        "encode_legacy",
+        "encode",
+        "encode_many",
+        "parse_legacy",
+        "parse",
+        "parse_many",
+    ]
+
+
+def test_run_records_rates_and_memory() -> None:
+    """Test that a run reports rate, unit and peak memory per case"""
+    doc = bench.run(["digest", "tree"], quick=True, repeat=1)
+    assert set(doc["results"]) == {"digest", "tree"}
+    entry = doc["results"]["tree"]["tree_reduce"]
+    assert entry["rate"] > 0
+    assert entry["unit"] == "leaves/s"
+    assert entry["peak_bytes"] > 0
+    assert doc["c4py"] == c4py.__version__
+    json.dumps(doc)
+
+
+def test_compare() -> None:
+    """Test speedup ratios against a baseline run"""
+    current = {"results": {"codec": {"parse": {"rate": 300.0}}}}
+    baseline = {"results": {"codec": {"parse": {"rate": 100.0}, "gone": {}}}}
+    assert bench.compare(current, baseline) == {"codec.parse": 3.0}
+
+
+def test_bench_command(tmp_path) -> None:
+    """Test the bench subcommand saves JSON and compares against it"""
+    output = tmp_path / "bench.json"
+    runner = CliRunner()
+    result = runner.invoke(main, ["bench", "--quick", "-o", str(output), "codec"])
+    assert result.exit_code == 0
+    assert "codec.parse_many" in result.output
+    assert set(bench.load(str(output))["results"]) == {"codec"}
+
+    result = runner.invoke(
+        main, ["bench", "--quick", "--compare", str(output), "codec"]
+    )
+    assert result.exit_code == 0
+    assert "x" in result.output.splitlines()[-1]
+
+
+def test_bench_main(capsys) -> None:
+    """Test the module entry point prints a report"""
+    bench.main(["--quick", "tree"])
+    assert "tree.tree_reduce" in capsys.readouterr().out
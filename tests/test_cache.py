@@ -0,0 +1,92 @@
+import os
+from typing import List
+
+import pytest
+
+from c4py import identify_path
+from c4py.cache import IDCache
+from c4py.parallel import identify_paths
+
+OLD_MTIME_NS = 1_600_000_000 * 10**9
+
+
+def make_old_files(temp_dir: str, count: int) -> List[str]:
+    paths = []
+    for i in range(count):
+        path = os.path.join(temp_dir, f"file{i}.txt")
+        with open(path, "w") as f:
+            f.write(f"content {i}")
+        os.utime(path, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def cache(temp_dir: str):
+    cache_dir = os.path.join(temp_dir, "cache")
+    os.mkdir(cache_dir)
+    with IDCache(os.path.join(cache_dir, "ids.db")) as cache:
+        yield cache
+
+
+def test_cache_store_and_lookup(temp_dir: str, cache: IDCache) -> None:
+    """Test that a stored ID is returned while the stat tuple matches"""
+    (path,) = make_old_files(temp_dir, 1)
+    file_id = identify_path(path)
+    assert file_id is not None
+
+    st = os.stat(path)
+    assert cache.lookup(st) is None
+    cache.store(path, st, file_id)
+    assert cache.lookup(st) == file_id
+    assert len(cache) == 1
+
+    # A different mtime invalidates the entry
+    os.utime(path, ns=(OLD_MTIME_NS + 1, OLD_MTIME_NS + 1))
+    assert cache.lookup(os.stat(path)) is None
+
+
+def test_cache_skips_recent_files(temp_dir: str, cache: IDCache) -> None:
+    """Test that files modified within the racy window are not cached"""
+    path = os.path.join(temp_dir, "fresh.txt")
+    with open(path, "w") as f:
+        f.write("fresh")
+    file_id = identify_path(path)
+    assert file_id is not None
+
+    cache.store(path, os.stat(path), file_id)
+    assert len(cache) == 0
+
+
+def test_identify_paths_uses_cache(temp_dir: str, cache: IDCache, monkeypatch) -> None:
+    """Test that a second scan is served from the cache without hashing"""
+    paths = make_old_files(temp_dir, 4)
+    first = list(identify_paths(paths, cache=cache))
+    assert cache.misses == 4
+    assert len(cache) == 4
+
+    def fail(path: str) -> None:
+        raise AssertionError("file was rehashed")
+
+    monkeypatch.setattr("c4py.parallel.hash_file", fail)
+    second = list(identify_paths(paths, jobs=2, cache=cache))
+    assert second == first
+    assert cache.hits == 4
+
+
+def test_cache_prune_and_persistence(temp_dir: str) -> None:
+    """Test prune evicts deleted files and entries survive reopening"""
+    db = os.path.join(temp_dir, "ids.db")
+    paths = make_old_files(temp_dir, 3)
+
+    with IDCache(db) as cache:
+        list(identify_paths(paths, cache=cache))
+
+    os.unlink(paths[0])
+    with IDCache(db) as cache:
+        assert len(cache) == 3
+        assert cache.prune() == 1
+        cache.compact()
+        assert len(cache) == 2
+        cache.clear()
+        assert len(cache) == 0
@@ -0,0 +1,201 @@
+import hashlib
+import io
+import os
+from typing import Callable, Optional
+
+import pytest
+from click.testing import CliRunner
+
+from c4py import Digest, identify_path
+from c4py.chunked import (
+    BlockTree,
+    hash_block,
+    identify_chunked,
+    identify_chunked_stream,
+    verify_range,
+)
+from c4py.cli import main
+
+BLOCK = 1024
+
+
+def sample_data(size: int) -> bytes:
+    return bytes(i * 7 % 251 for i in range(size))
+
+
+def test_block_tree_root(temp_dir: str, write: Callable[[str, bytes], str]) -> None:
+    """Test that the root combines position-bound leaves with Digest.sum"""
+    data = sample_data(3 * BLOCK + 10)
+    path = write(os.path.join(temp_dir, "big"), data)
+    tree = identify_chunked(path, BLOCK, jobs=1)
+
+    leaves = [
+        Digest(hash_block(data[i : i + BLOCK], i)) for i in range(0, len(data), BLOCK)
+    ]
+    assert len(tree) == 4
+    expected = leaves[0].sum(leaves[1]).sum(leaves[2].sum(leaves[3]))
+    assert tree.digest() == expected
+    assert tree.levels()[-1] == bytes(expected)
+
+
+def test_not_a_c4_id(temp_dir: str, write: Callable[[str, bytes], str]) -> None:
+    """Test that a single-block tree still differs from the file's C4 ID"""
+    path = write(os.path.join(temp_dir, "small"), b"hello")
+    tree = identify_chunked(path, BLOCK)
+    assert len(tree) == 1
+    assert tree.id() != identify_path(path)
+    expected = hashlib.sha512(bytes(8) + b"hello").digest()
+    assert bytes(tree.digest()) == expected
+
+
+@pytest.mark.parametrize("size", [0, 1, BLOCK, 5 * BLOCK + 1])
+def test_parallel_matches_serial(
+    temp_dir: str, size: int, write: Callable[[str, bytes], str]
+) -> None:
+    """Test that the ID is the same for any number of threads or a stream"""
+    data = sample_data(size)
+    path = write(os.path.join(temp_dir, "f"), data)
+    serial = identify_chunked(path, BLOCK, jobs=1)
+    assert identify_chunked(path, BLOCK, jobs=4).id() == serial.id()
+    stream = identify_chunked_stream(io.BytesIO(data), BLOCK)
+    assert stream.id() == serial.id()
+    assert stream.size == size
+
+
+def test_stream_short_reads(temp_dir: str, write: Callable[[str, bytes], str]) -> None:
+    """Test that a stream returning short reads hashes whole blocks"""
+    data = sample_data(3 * BLOCK + 7)
+
+    class Trickle(io.BytesIO):
+        def read(self, n: Optional[int] = -1) -> bytes:
+            if n is None or n < 0:
+                return super().read()
+            return super().read(min(n, 100))
+
+    path = write(os.path.join(temp_dir, "f"), data)
+    stream = identify_chunked_stream(Trickle(data), BLOCK)
+    assert stream.id() == identify_chunked(path, BLOCK, jobs=1).id()
+    assert stream.size == len(data)
+
+
+def test_block_size_changes_id(
+    temp_dir: str, write: Callable[[str, bytes], str]
+) -> None:
+    """Test that the block size is part of a block-tree ID"""
+    path = write(os.path.join(temp_dir, "f"), sample_data(4 * BLOCK))
+    assert identify_chunked(path, BLOCK).id() != identify_chunked(path, 2 * BLOCK).id()
+
+
+def test_swapped_blocks_change_id(
+    temp_dir: str, write: Callable[[str, bytes], str]
+) -> None:
+    """Test that reordering blocks changes the ID"""
+    a, b = b"a" * BLOCK, b"b" * BLOCK
+    first = identify_chunked(write(os.path.join(temp_dir, "ab"), a + b), BLOCK)
+    second = identify_chunked(write(os.path.join(temp_dir, "ba"), b + a), BLOCK)
+    assert first.id() != second.id()
+
+
+def test_serialization_round_trip(
+    temp_dir: str, write: Callable[[str, bytes], str]
+) -> None:
+    """Test that a saved tree loads back with the same levels"""
+    path = write(os.path.join(temp_dir, "f"), sample_data(7 * BLOCK))
+    tree = identify_chunked(path, BLOCK)
+    loaded = BlockTree.frombytes(tree.tobytes())
+    assert loaded.block_size == BLOCK
+    assert loaded.size == tree.size
+    assert loaded.levels() == tree.levels()
+    with pytest.raises(ValueError):
+        BlockTree.frombytes(b"nope")
+
+
+def test_verify_range(temp_dir: str, write: Callable[[str, bytes], str]) -> None:
+    """Test that only blocks in the range are checked"""
+    data = bytearray(sample_data(8 * BLOCK))
+    path = write(os.path.join(temp_dir, "f"), bytes(data))
+    tree = identify_chunked(path, BLOCK)
+    assert verify_range(path, tree) == []
+
+    data[2 * BLOCK + 5] ^= 0xFF
+    data[6 * BLOCK] ^= 0xFF
+    write(path, bytes(data))
+    assert verify_range(path, tree) == [2, 6]
+    assert verify_range(path, tree, 0, 2 * BLOCK) == []
+    assert verify_range(path, tree, 2 * BLOCK + 100, 3 * BLOCK) == [2]
+    assert verify_range(path, tree, 5 * BLOCK, None, jobs=3) == [6]
+    assert verify_range(path, tree, 6 * BLOCK, 100 * BLOCK) == [6]
+
+
+@pytest.mark.parametrize(
+    "start, end", [(8 * BLOCK, None), (9 * BLOCK, 10 * BLOCK), (3, 3), (5, 2), (-1, 4)]
+)
+def test_verify_range_rejects_bad_ranges(
+    temp_dir: str, start: int, end, write: Callable[[str, bytes], str]
+) -> None:
+    """Test that ranges outside the tree or running backwards are refused"""
+    path = write(os.path.join(temp_dir, "f"), sample_data(8 * BLOCK))
+    tree = identify_chunked(path, BLOCK)
+    with pytest.raises(ValueError):
+        verify_range(path, tree, start, end)
+
+
+def test_verify_range_size_change(
+    temp_dir: str, write: Callable[[str, bytes], str]
+) -> None:
+    """Test that truncation fails the blocks past the new end"""
+    data = sample_data(4 * BLOCK)
+    path = write(os.path.join(temp_dir, "f"), data)
+    tree = identify_chunked(path, BLOCK)
+    write(path, data[: 2 * BLOCK + 1])
+    assert verify_range(path, tree) == [2, 3]
+    assert verify_range(path, tree, 0, BLOCK) == []
+
+
+def test_cli_chunked(temp_dir: str, write: Callable[[str, bytes], str]) -> None:
+    """Test the chunked command, --save and --check with a range"""
+    data = bytearray(sample_data(4 * BLOCK))
+    path = write(os.path.join(temp_dir, "f"), bytes(data))
+    saved = os.path.join(temp_dir, "f.c4bt")
+    runner = CliRunner()
+
+    result = runner.invoke(main, ["chunked", "-b", "1K", "--save", saved, path])
+    assert result.exit_code == 0
+    assert result.output.strip() == str(identify_chunked(path, BLOCK).id())
+
+    result = runner.invoke(main, ["chunked", "--check", saved, path])
+    assert result.exit_code == 0
+    assert result.output == ""
+
+    data[3 * BLOCK] ^= 1
+    write(path, bytes(data))
+    result = runner.invoke(main, ["chunked", "--check", saved, "--range", ":2K", path])
+    assert result.exit_code == 0
+    result = runner.invoke(main, ["chunked", "--check", saved, "--range", "2K:", path])
+    assert result.exit_code == 1
+    assert result.output == f"block 3 at {3 * BLOCK} differs: {path}\n"
+    result = runner.invoke(main, ["chunked", "--check", saved, "--range", "4K:", path])
+    assert result.exit_code == 2
+    assert "outside the 4096-byte file" in result.output
+
+
+def test_cli_chunked_errors(temp_dir: str, write: Callable[[str, bytes], str]) -> None:
+    """Test that bad sizes and option combinations are rejected"""
+    path = write(os.path.join(temp_dir, "f"), b"data")
+    runner = CliRunner()
+    for args in (
+        ["-b", "0", path],
+        ["-b", "lots", path],
+        ["--range", "0:1", path],
+        ["--save", os.path.join(temp_dir, "t"), path, path],
+    ):
+        result = runner.invoke(main, ["chunked"] + args)
+        assert result.exit_code == 2, args
+
+    result = runner.invoke(main, ["chunked", "--check", path, path])
+    assert result.exit_code == 2
+    assert "not a c4py block tree" in result.output
+
+    result = runner.invoke(main, ["chunked", path, os.path.join(temp_dir, "missing")])
+    assert result.exit_code == 1
+    assert "Error processing" in result.output
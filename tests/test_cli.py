@@ -4,7 +4,7 @@ from typing import Any
 from click.testing import CliRunner
 import os
 from c4py.cli import main
-from c4py import NIL_ID
+from c4py import ID, NIL_ID
 
 
 @pytest.fixture
@@ -283,11 +283,11 @@ def test_cli_directory_exception_handling(
     with open(test_file, "w") as f:
         f.write("test content")
 
-    # Mock os.walk to raise an exception - need to handle the followlinks parameter
-    def mock_walk(path, followlinks=False):
+    # Mock the directory walker to raise an exception
+    def mock_walk(*args, **kwargs):
         raise PermissionError("Mocked permission error")
 
-    monkeypatch.setattr("os.walk", mock_walk)
+    monkeypatch.setattr("c4py.walk.walk", mock_walk)
 
     result = runner.invoke(main, ["-R", temp_dir])
     assert result.exit_code == 0
@@ -317,7 +317,7 @@ def test_cli_file_processing_exception(
     path, _ = temp_file
 
     # Mock identify_file to raise an exception
-    def mock_identify_file(file_path):
+    def mock_identify_file(file_path, cache=None):
         raise IOError("Mocked file error")
 
     monkeypatch.setattr("c4py.cli.identify_file", mock_identify_file)
@@ -326,3 +326,179 @@ def test_cli_file_processing_exception(
     assert result.exit_code == 1
     assert "Error processing" in result.output
     assert "Mocked file error" in result.output
+
+
+def test_cli_recursive_jobs(runner: CliRunner, temp_dir: str) -> None:
+    """Test --jobs produces the same output as a serial run"""
+    for i in range(10):
+        with open(os.path.join(temp_dir, f"test{i}.txt"), "w") as f:
+            f.write(f"Content {i}")
+
+    serial = runner.invoke(main, ["-R", "-V", temp_dir])
+    threaded = runner.invoke(main, ["-R", "-V", "--jobs", "4", temp_dir])
+    processes = runner.invoke(main, ["-R", "-V", "-j", "2", "--processes", temp_dir])
+
+    assert serial.exit_code == 0
+    assert threaded.output == serial.output
+    assert processes.output == serial.output
+
+
+def test_cli_cache(runner: CliRunner, temp_dir: str) -> None:
+    """Test --cache, --no-cache and the cache maintenance commands"""
+    data_dir = os.path.join(temp_dir, "data")
+    os.mkdir(data_dir)
+    for i in range(3):
+        path = os.path.join(data_dir, f"test{i}.txt")
+        with open(path, "w") as f:
+            f.write(f"Content {i}")
+        os.utime(path, (1_600_000_000, 1_600_000_000))
+    db = os.path.join(temp_dir, "ids.db")
+
+    plain = runner.invoke(main, ["-R", "-V", data_dir])
+    cached = runner.invoke(main, ["-R", "-V", "--cache", db, data_dir])
+    again = runner.invoke(main, ["-R", "-V", "--cache", db, data_dir])
+    skipped = runner.invoke(main, ["-R", "-V", "--cache", db, "--no-cache", data_dir])
+    assert cached.output == plain.output
+    assert again.output == plain.output
+    assert skipped.output == plain.output
+
+    os.unlink(os.path.join(data_dir, "test0.txt"))
+    result = runner.invoke(main, ["cache", "prune", "--cache", db])
+    assert result.exit_code == 0
+    assert "Removed 1 stale entries, 2 remaining" in result.output
+
+    result = runner.invoke(main, ["cache", "clear"], env={"C4PY_CACHE": db})
+    assert result.exit_code == 0
+
+
+def test_cli_cache_unopenable(runner: CliRunner, temp_dir: str) -> None:
+    """Test that a cache that cannot be opened is a clean error"""
+    missing = os.path.join(temp_dir, "missing", "ids.db")
+    for command in ("id", "watch"):
+        result = runner.invoke(main, [command, "--cache", missing, temp_dir])
+        assert result.exit_code == 1
+        assert f"cannot open cache {missing}" in result.output
+
+    not_db = os.path.join(temp_dir, "not.db")
+    with open(not_db, "w") as f:
+        f.write("x" * 4096)
+    result = runner.invoke(main, ["cache", "prune", "--cache", not_db])
+    assert result.exit_code == 1
+    assert f"cannot open cache {not_db}" in result.output
+
+
+def test_cli_default_command(runner: CliRunner, temp_file: Any) -> None:
+    """Test that 'c4py FILE' and 'c4py id FILE' agree"""
+    path, _ = temp_file
+    default = runner.invoke(main, [path])
+    explicit = runner.invoke(main, ["id", path])
+    assert default.output == explicit.output
+    result = runner.invoke(main, ["--help"])
+    assert "--recursive" in result.output
+    assert "cache" in result.output
+
+
+def test_cli_tree(runner: CliRunner, temp_dir: str) -> None:
+    """Test --tree outputs a single ID for all files"""
+    from c4py import Tree
+
+    for i in range(5):
+        with open(os.path.join(temp_dir, f"test{i}.txt"), "w") as f:
+            f.write(f"Content {i}")
+
+    ids = runner.invoke(main, ["-R", temp_dir]).output.split()
+    result = runner.invoke(main, ["-R", "--tree", temp_dir])
+    assert result.exit_code == 0
+    assert result.output.strip() == str(Tree(ID.parse(i) for i in ids).id())
+
+
+def test_process_directory_streams(temp_dir: str) -> None:
+    """Test that process_directory yields results lazily"""
+    import types
+    from c4py.cli import process_directory
+
+    for i in range(3):
+        with open(os.path.join(temp_dir, f"test{i}.txt"), "w") as f:
+            f.write(f"Content {i}")
+
+    results = process_directory(temp_dir, False, 0, False)
+    assert isinstance(results, types.GeneratorType)
+    assert len(list(results)) == 3
+
+
+def test_cli_sort(runner: CliRunner, temp_dir: str, monkeypatch) -> None:
+    """Test --sort orders output by path, including spilled runs"""
+    import c4py.extsort
+
+    for name in ["b", "a", "d", "c", os.path.join("sub", "a")]:
+        path = os.path.join(temp_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(name)
+
+    spills = []
+    original_spill = c4py.extsort.ExternalSorter._spill
+
+    def spill(self) -> None:  # type: ignore[no-untyped-def]
+        spills.append(len(self._buffer))
+        original_spill(self)
+
+    monkeypatch.setattr(c4py.extsort, "DEFAULT_RUN_SIZE", 2)
+    monkeypatch.setattr(c4py.extsort.ExternalSorter, "_spill", spill)
+    result = runner.invoke(main, ["-R", "-V", "-p", "--sort", temp_dir])
+    assert spills == [2, 2, 1]
+    assert result.exit_code == 0
+    paths = [line.split(": ")[0] for line in result.output.strip().split("\n")]
+    assert len(paths) == 5
+    assert paths == sorted(paths)
+
+
+def test_cli_formats(runner: CliRunner, temp_dir: str, monkeypatch) -> None:
+    """Test manifest formats stat each file only once"""
+    import json
+
+    for i in range(3):
+        with open(os.path.join(temp_dir, f"test{i}.txt"), "w") as f:
+            f.write(f"Content {i}")
+
+    stats = []
+    real_stat = os.stat
+
+    def counting_stat(path, *args, **kwargs):  # type: ignore[no-untyped-def]
+        stats.append(path)
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr("os.stat", counting_stat)
+    result = runner.invoke(main, ["-R", "--format", "jsonl", temp_dir])
+    assert result.exit_code == 0
+    records = [json.loads(line) for line in result.output.splitlines()]
+    assert len(records) == 3
+    assert all(r["size"] == 9 for r in records)
+    file_stats = [p for p in stats if p != temp_dir]
+    assert sorted(file_stats) == sorted(r["path"] for r in records)
+
+    for fmt in ("csv", "c4m", "bin"):
+        result = runner.invoke(main, ["-R", "-f", fmt, temp_dir])
+        assert result.exit_code == 0, result.output
+
+    result = runner.invoke(main, ["-R", "-f", "xml", temp_dir])
+    assert result.exit_code != 0
+
+    result = runner.invoke(main, ["-f", "jsonl"], input="data")
+    assert result.exit_code == 2
+    assert "--format jsonl needs FILE arguments" in result.output
+
+
+def test_cli_links_skip_loops(runner: CliRunner, tmp_path) -> None:
+    """Test that -L does not follow a link back to an ancestor directory"""
+    temp_dir = str(tmp_path)
+    sub = os.path.join(temp_dir, "sub")
+    os.mkdir(sub)
+    with open(os.path.join(sub, "file.txt"), "w") as f:
+        f.write("content")
+    os.symlink(temp_dir, os.path.join(sub, "loop"))
+
+    result = runner.invoke(main, ["-R", "-L", "-V", temp_dir])
+    assert result.exit_code == 0
+    assert result.output.count("file.txt") == 1
+    assert "filesystem loop" in result.output
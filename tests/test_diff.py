@@ -0,0 +1,127 @@
+import os
+from typing import Callable, Dict
+
+from click.testing import CliRunner
+
+import c4py.parallel
+from c4py import Digest, identify_path
+from c4py.cli import main
+from c4py.diff import (
+    ADDED,
+    MODIFIED,
+    MOVED,
+    REMOVED,
+    VerifyStats,
+    diff_manifests,
+    load_index,
+    verify_tree,
+)
+from c4py.formats import ManifestEntry
+
+ID1 = Digest(bytes([1]) * 64).id()
+ID2 = Digest(bytes([2]) * 64).id()
+ID3 = Digest(bytes([3]) * 64).id()
+
+
+def index(**paths) -> Dict[str, ManifestEntry]:  # type: ignore[no-untyped-def]
+    return load_index(ManifestEntry(p, i, None, None) for p, i in paths.items())
+
+
+def test_diff_manifests() -> None:
+    """Test added, removed, modified and moved paths"""
+    old = index(same=ID1, changed=ID1, gone=ID2, moved=ID3)
+    new = index(same=ID1, changed=ID2, fresh=ID1, there=ID3)
+    changes = diff_manifests(old, new)
+    assert [(c.status, c.path, c.old_path) for c in changes] == [
+        (MODIFIED, "changed", None),
+        (ADDED, "fresh", None),
+        (REMOVED, "gone", None),
+        (MOVED, "there", "moved"),
+    ]
+
+
+def indexed_files(
+    temp_dir: str, write: Callable[[str, bytes], str]
+) -> Dict[str, ManifestEntry]:
+    entries = []
+    for name in ("a", "b", "c", "d"):
+        path = write(os.path.join(temp_dir, name), f"content {name}".encode())
+        st = os.stat(path)
+        file_id = identify_path(path)
+        assert file_id is not None
+        entries.append(ManifestEntry(path, file_id, st.st_size, st.st_mtime_ns))
+    return load_index(entries)
+
+
+def test_verify_unchanged_tree_reads_nothing(
+    temp_dir: str, monkeypatch, write: Callable[[str, bytes], str]
+) -> None:
+    """Test that entries with matching size and mtime are not rehashed"""
+    manifest = indexed_files(temp_dir, write)
+
+    def fail(path: str) -> None:
+        raise AssertionError(f"unexpected hash of {path}")
+
+    monkeypatch.setattr(c4py.parallel, "hash_file", fail)
+    stats = VerifyStats()
+    assert verify_tree(manifest, stats=stats) == []
+    assert (stats.checked, stats.rehashed) == (4, 0)
+
+
+def test_verify_tree_changes(temp_dir: str, write: Callable[[str, bytes], str]) -> None:
+    """Test that verify reports every kind of change"""
+    manifest = indexed_files(temp_dir, write)
+    join = lambda name: os.path.join(temp_dir, name)  # noqa: E731
+    with open(join("a"), "w") as f:
+        f.write("modified")
+    os.utime(join("b"), ns=(0, 0))
+    os.rename(join("c"), join("c2"))
+    os.unlink(join("d"))
+    with open(join("e"), "w") as f:
+        f.write("new")
+
+    stats = VerifyStats()
+    tree = [join(name) for name in sorted(os.listdir(temp_dir))]
+    changes = verify_tree(manifest, tree, jobs=2, stats=stats)
+    assert [(c.status, os.path.basename(c.path)) for c in changes] == [
+        (MODIFIED, "a"),
+        (MOVED, "c2"),
+        (REMOVED, "d"),
+        (ADDED, "e"),
+    ]
+    # a and b (touched) are rehashed along with the two new paths
+    assert stats.rehashed == 4
+
+
+def test_cli_verify_and_diff(temp_dir: str, tmp_path) -> None:
+    """Test the verify and diff subcommands"""
+    for name in ("a", "b"):
+        with open(os.path.join(temp_dir, name), "w") as f:
+            f.write(name)
+    runner = CliRunner()
+    old = tmp_path / "old.jsonl"
+    old.write_text(runner.invoke(main, ["-R", "-f", "jsonl", temp_dir]).output)
+
+    result = runner.invoke(main, ["verify", str(old), temp_dir])
+    assert result.exit_code == 0
+
+    os.rename(os.path.join(temp_dir, "b"), os.path.join(temp_dir, "c"))
+    result = runner.invoke(main, ["verify", str(old), temp_dir])
+    assert result.exit_code == 1
+    moved = f"R {os.path.join(temp_dir, 'b')} -> {os.path.join(temp_dir, 'c')}"
+    assert moved in result.output
+
+    new = tmp_path / "new.c4m"
+    new.write_text(runner.invoke(main, ["-R", "-f", "c4m", temp_dir]).output)
+    result = runner.invoke(main, ["diff", str(old), str(new)])
+    assert result.exit_code == 1
+    assert moved in result.output
+
+    result = runner.invoke(main, ["diff", str(old), str(old)])
+    assert result.exit_code == 0
+    assert result.output == ""
+
+    bad = tmp_path / "bad.txt"
+    bad.write_text("nonsense\n")
+    result = runner.invoke(main, ["verify", str(bad)])
+    assert result.exit_code == 2
@@ -0,0 +1,101 @@
+import json
+import os
+from typing import Callable, List
+
+from click.testing import CliRunner
+
+from c4py import identify_path
+from c4py.cli import main
+from c4py.dupes import DupeStats, find_duplicates, sample_digest
+
+
+def make_dupes(temp_dir: str, write: Callable[[str, bytes], str]) -> List[str]:
+    block = bytes(range(256)) * 400
+    return [
+        write(os.path.join(temp_dir, "a1"), block),
+        write(os.path.join(temp_dir, "a2"), block),
+        # Same size and same ends as a1, different middle
+        write(
+            os.path.join(temp_dir, "middle"),
+            block[:50000] + b"x" + block[50001:],
+        ),
+        # Same size, different ends: rejected by the sample hash
+        write(os.path.join(temp_dir, "ends"), b"y" + block[1:]),
+        write(os.path.join(temp_dir, "small1"), b"hello"),
+        write(os.path.join(temp_dir, "small2"), b"hello"),
+        write(os.path.join(temp_dir, "unique"), b"unique"),
+        write(os.path.join(temp_dir, "empty1"), b""),
+        write(os.path.join(temp_dir, "empty2"), b""),
+    ]
+
+
+def test_find_duplicates(temp_dir: str, write: Callable[[str, bytes], str]) -> None:
+    """Test that groups hold exactly the files with equal content"""
+    paths = make_dupes(temp_dir, write)
+    stats = DupeStats()
+    groups = find_duplicates(paths, sample_size=1024, stats=stats)
+    names = [[os.path.basename(p) for p in g.paths] for g in groups]
+    assert names == [["a1", "a2"], ["small1", "small2"]]
+    assert groups[0].id == identify_path(paths[0])
+    assert groups[0].size == 102400
+    # "ends" never gets past the sample hash
+    assert stats.sampled == 4
+    assert stats.hashed == 5
+
+
+def test_find_duplicates_min_size_and_links(
+    temp_dir: str, write: Callable[[str, bytes], str]
+) -> None:
+    """Test empty files with min_size 0 and hard links sharing one read"""
+    paths = make_dupes(temp_dir, write)
+    link = os.path.join(temp_dir, "unique-link")
+    os.link(paths[6], link)
+    stats = DupeStats()
+    groups = find_duplicates(paths + [link], jobs=2, min_size=0, stats=stats)
+    names = sorted([os.path.basename(p) for p in g.paths] for g in groups)
+    assert ["empty1", "empty2"] in names
+    assert ["unique", "unique-link"] in names
+
+
+def test_sample_digest(temp_dir: str, write: Callable[[str, bytes], str]) -> None:
+    """Test that the sample covers only the ends of a file"""
+    block = b"a" * 100
+    one = write(os.path.join(temp_dir, "one"), block + b"b" + block)
+    two = write(os.path.join(temp_dir, "two"), block + b"c" + block)
+    assert sample_digest(one, 201, 100) == sample_digest(two, 201, 100)
+    assert sample_digest(one, 201, 101) != sample_digest(two, 201, 101)
+
+
+def test_cli_dupes(temp_dir: str, write: Callable[[str, bytes], str]) -> None:
+    """Test the dupes subcommand in text and jsonl formats"""
+    make_dupes(temp_dir, write)
+    runner = CliRunner()
+    result = runner.invoke(main, ["dupes", temp_dir])
+    assert result.exit_code == 0
+    assert "102400 bytes x 2" in result.output
+    assert f"  {os.path.join(temp_dir, 'a2')}" in result.output
+
+    result = runner.invoke(main, ["dupes", "-f", "jsonl", temp_dir])
+    assert result.exit_code == 0
+    records = [
+        json.loads(line) for line in result.output.splitlines() if line.startswith("{")
+    ]
+    assert [len(r["paths"]) for r in records] == [2, 2]
+
+
+def test_cli_dupes_overlapping_roots(
+    temp_dir: str, write: Callable[[str, bytes], str]
+) -> None:
+    """Test that a file reached through two roots is not its own duplicate"""
+    sub = os.path.join(temp_dir, "sub")
+    os.mkdir(sub)
+    write(os.path.join(sub, "a"), b"only copy")
+    write(os.path.join(temp_dir, "b"), b"other")
+    runner = CliRunner()
+    result = runner.invoke(main, ["dupes", temp_dir, sub, os.path.join(sub, "a")])
+    assert result.exit_code == 0
+    assert "0 duplicate groups in 2 files" in result.output
+
+    twin = write(os.path.join(temp_dir, "twin"), b"only copy")
+    groups = find_duplicates([twin, os.path.join(sub, "a"), os.path.join(sub, "a")])
+    assert [g.paths for g in groups] == [sorted([twin, os.path.join(sub, "a")])]
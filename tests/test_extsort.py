@@ -0,0 +1,33 @@
+import random
+from operator import itemgetter
+
+from c4py.extsort import ExternalSorter, external_sort
+
+
+def test_external_sort_in_memory() -> None:
+    """Test that small inputs sort without spilling"""
+    sorter: ExternalSorter[int] = ExternalSorter(run_size=100)
+    values = list(range(50))
+    random.shuffle(values)
+    for value in values:
+        sorter.add(value)
+    assert sorter.spilled == 0
+    assert list(sorter) == sorted(values)
+
+
+def test_external_sort_spills_and_merges() -> None:
+    """Test sorting across many spilled runs with a key"""
+    records = [(f"path/{random.randrange(10**6):07d}", n) for n in range(1000)]
+    sorter: ExternalSorter = ExternalSorter(key=itemgetter(0), run_size=64)
+    for record in records:
+        sorter.add(record)
+    assert sorter.spilled == 15
+    result = list(sorter)
+    assert result == sorted(records, key=itemgetter(0))
+    assert sorter.spilled == 0
+
+
+def test_external_sort_function() -> None:
+    """Test the functional wrapper"""
+    assert list(external_sort(iter([3, 1, 2]), run_size=2)) == [1, 2, 3]
+    assert list(external_sort(iter([]))) == []
@@ -0,0 +1,155 @@
+import csv
+import io
+import json
+import os
+import time
+
+import pytest
+
+from c4py import Digest
+from c4py.formats import (
+    BIN_HEADER,
+    BIN_MAGIC,
+    BIN_RECORD,
+    C4M_HEADER,
+    TextWriter,
+    get_writer,
+    quote_c4m_path,
+    read_manifest,
+)
+
+ID1 = Digest(bytes([1]) * 64).id()
+ID2 = Digest(bytes([2]) * 64).id()
+
+
+def records(temp_file):
+    path, _ = temp_file
+    return [(path, ID1, os.stat(path)), ("with space.txt", ID2, None)]
+
+
+def render(name: str, recs) -> bytes:
+    out = io.BytesIO()
+    writer = get_writer(name, out)
+    for rec in recs:
+        writer.write(*rec)
+    writer.close()
+    return out.getvalue()
+
+
+def test_jsonl_format(temp_file) -> None:
+    """Test one JSON object per record"""
+    recs = records(temp_file)
+    lines = render("jsonl", recs).decode().splitlines()
+    first = json.loads(lines[0])
+    assert first["path"] == recs[0][0]
+    assert first["id"] == str(ID1)
+    assert first["size"] == recs[0][2].st_size
+    assert first["mtime_ns"] == recs[0][2].st_mtime_ns
+    assert json.loads(lines[1])["size"] is None
+
+
+def test_csv_format(temp_file) -> None:
+    """Test CSV output with a header row"""
+    recs = records(temp_file)
+    rows = list(csv.reader(io.StringIO(render("csv", recs).decode())))
+    assert rows[0] == ["path", "id", "size", "mtime_ns", "mode"]
+    assert rows[1][:3] == [recs[0][0], str(ID1), str(recs[0][2].st_size)]
+    assert rows[2] == ["with space.txt", str(ID2), "", "", ""]
+
+
+def test_c4m_format(temp_file) -> None:
+    """Test c4m lines and path quoting"""
+    recs = records(temp_file)
+    lines = render("c4m", recs).decode().splitlines()
+    assert lines[0] == C4M_HEADER
+    mode, mtime, size, path, id_str = lines[1].split(" ")
+    assert mode.startswith("-rw")
+    assert mtime.endswith("Z")
+    assert size == str(recs[0][2].st_size)
+    assert (path, id_str) == (recs[0][0], str(ID1))
+    assert lines[2].endswith(f'"with space.txt" {ID2}')
+    assert quote_c4m_path("plain") == "plain"
+    assert quote_c4m_path('a"b') == '"a\\"b"'
+
+
+def test_bin_format(temp_file) -> None:
+    """Test binary records with raw digests and length-prefixed paths"""
+    recs = records(temp_file)
+    data = render("bin", recs)
+    magic, version = BIN_HEADER.unpack_from(data)
+    assert magic == BIN_MAGIC and version == 1
+
+    offset = BIN_HEADER.size
+    digest, size, mtime_ns, mode, length = BIN_RECORD.unpack_from(data, offset)
+    offset += BIN_RECORD.size
+    assert digest == bytes(ID1.digest())
+    assert size == recs[0][2].st_size
+    assert data[offset : offset + length] == os.fsencode(recs[0][0])
+
+
+def test_writer_batches() -> None:
+    """Test that writes are buffered until a batch fills"""
+    out = io.BytesIO()
+    writer = TextWriter(out, lambda path, id_obj, st: path, batch_size=3)
+    writer.write("a", ID1, None)
+    writer.write("b", ID1, None)
+    assert out.getvalue() == b""
+    writer.write("c", ID1, None)
+    assert out.getvalue() == b"a\nb\nc\n"
+    writer.write("d", ID1, None)
+    writer.close()
+    assert out.getvalue() == b"a\nb\nc\nd\n"
+
+
+def test_writer_flushes_stalled_batches() -> None:
+    """Test that max_delay writes a partial batch while no records arrive"""
+    out = io.BytesIO()
+    writer = TextWriter(
+        out, lambda path, id_obj, st: path, batch_size=100, max_delay=0.05
+    )
+    writer.write("a", ID1, None)
+    deadline = time.monotonic() + 5
+    while not out.getvalue() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert out.getvalue() == b"a\n"
+    writer.write("b", ID1, None)
+    writer.close()
+    assert out.getvalue() == b"a\nb\n"
+
+
+def test_writer_formats() -> None:
+    """Test that the base writer is abstract and the CLI knows every format"""
+    from c4py.cli import OUTPUT_FORMATS
+    from c4py.formats import WRITERS, ManifestWriter
+
+    assert ManifestWriter.__abstractmethods__ == frozenset({"encode"})
+    assert sorted(OUTPUT_FORMATS) == sorted(["text", *WRITERS])
+
+
+@pytest.mark.parametrize("name", ["jsonl", "csv", "c4m", "bin"])
+def test_read_manifest_round_trip(temp_file, name: str) -> None:
+    """Test that every manifest format reads back what was written"""
+    recs = records(temp_file)
+    entries = list(read_manifest(io.BytesIO(render(name, recs))))
+    assert [(e.path, e.id) for e in entries] == [(p, i) for p, i, _ in recs]
+    st = recs[0][2]
+    assert (entries[0].size, entries[0].mtime_ns) == (st.st_size, st.st_mtime_ns)
+    assert (entries[1].size, entries[1].mtime_ns) == (None, None)
+
+
+def test_read_truncated_bin_manifest(temp_file) -> None:
+    """Test that a binary manifest cut short is rejected, not misread"""
+    data = render("bin", records(temp_file))
+    # Mid-record and mid-path cuts of the last entry
+    for end in (len(data) - 20, len(data) - 3):
+        with pytest.raises(ValueError, match="truncated"):
+            list(read_manifest(io.BytesIO(data[:end])))
+
+
+def test_read_text_manifest() -> None:
+    """Test reading -V output in either order"""
+    data = f"{ID1}: a b.txt\nc.txt: {ID2}\n".encode()
+    entries = list(read_manifest(io.BytesIO(data)))
+    assert [(e.path, e.id) for e in entries] == [("a b.txt", ID1), ("c.txt", ID2)]
+    with pytest.raises(ValueError):
+        list(read_manifest(io.BytesIO(f"{ID1}\n".encode())))
@@ -1,7 +1,7 @@
 # tests/test_id.py
 import pytest
 import io
-from typing import Tuple
+from typing import Any, Tuple
 from c4py import ID, Digest, Encoder, identify, NIL_ID, VOID_ID, MAX_ID
 from c4py.errors import ErrBadChar, ErrBadLength
 
@@ -330,3 +330,205 @@ def test_encode_function() -> None:
     src2 = io.BytesIO(test_data)
     result2 = identify(src2)
     assert result == result2
+
+
+def test_identify_chunk_size() -> None:
+    """Test that the read size does not change the ID"""
+    data = bytes(range(256)) * 1000
+    expected = identify(io.BytesIO(data))
+    for chunk_size in (1, 7, 4096, 1 << 20):
+        assert identify(io.BytesIO(data), chunk_size=chunk_size) == expected
+
+    # Streams without readinto use the plain read loop
+    class ReadOnly:
+        def __init__(self, data: bytes) -> None:
+            self._src = io.BytesIO(data)
+
+        def read(self, n: int) -> bytes:
+            return self._src.read(n)
+
+    assert identify(ReadOnly(data), chunk_size=1000) == expected  # type: ignore
+
+    with pytest.raises(ValueError):
+        identify(io.BytesIO(data), chunk_size=0)
+
+
+@pytest.mark.parametrize("size", [0, 100, 70000, 3 * 1024 * 1024 + 5])
+def test_identify_path(temp_dir: str, size: int) -> None:
+    """Test identify_path against identify for small and mmap-sized files"""
+    import os
+    from c4py import identify_path
+
+    data = (bytes(range(251)) * (size // 251 + 1))[:size]
+    path = os.path.join(temp_dir, "data.bin")
+    with open(path, "wb") as f:
+        f.write(data)
+
+    expected = identify(io.BytesIO(data))
+    assert identify_path(path) == expected
+    assert identify_path(path, chunk_size=4096) == expected
+
+
+def test_identify_path_pipe() -> None:
+    """Test that non-regular files fall back to the stream loop"""
+    import os
+    import threading
+    from c4py import identify_path
+
+    if not os.path.exists("/dev/fd"):
+        pytest.skip("no /dev/fd")
+
+    data = b"pipe data" * 10000
+    r, w = os.pipe()
+
+    def writer() -> None:
+        with os.fdopen(w, "wb") as f:
+            f.write(data)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        assert identify_path(f"/dev/fd/{r}") == identify(io.BytesIO(data))
+    finally:
+        thread.join()
+        os.close(r)
+
+
+def test_identify_path_truncated_while_hashing(temp_dir: str) -> None:
+    """Test that a file truncated mid-hash gives a short read, not SIGBUS"""
+    import os
+    import subprocess
+    import sys
+
+    from c4py.id import MAX_CHUNK_SIZE
+
+    path = os.path.join(temp_dir, "shrinking.bin")
+    data = b"x" * (2 * MAX_CHUNK_SIZE + 1)
+    with open(path, "wb") as f:
+        f.write(data)
+    # Run in a child so a regression to mmap cannot kill the test process
+    code = (
+        "import os, sys, c4py.id as m\n"
+        "write = m.Encoder.write\n"
+        "def truncating(self, data):\n"
+        "    os.truncate(sys.argv[1], 0)\n"
+        "    return write(self, data)\n"
+        "m.Encoder.write = truncating\n"
+        "print(m.identify_path(sys.argv[1]))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code, path], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == str(identify(io.BytesIO(data[:MAX_CHUNK_SIZE])))
+
+
+def test_base58_matches_legacy_codec() -> None:
+    """Test the table-driven codec against the digit-at-a-time loops"""
+    from c4py.bench import _legacy_decode, _legacy_encode, sample_ids
+
+    values = [1, 57, 58, 58**44, 2**512 - 1] + [i._value for i in sample_ids(200)]
+    for value in values:
+        encoded = str(ID(value))
+        assert encoded == _legacy_encode(value)
+        assert len(encoded) == 90
+        assert ID.parse(encoded) == ID(value)
+        assert _legacy_decode(encoded) == value
+
+
+def test_encode_parse_many() -> None:
+    """Test the batch codec APIs"""
+    from c4py import encode_many, parse_many
+
+    ids = [Digest(bytes([i]) * 64).id() for i in range(1, 10)]
+    strs = encode_many(ids)
+    assert strs == [str(i) for i in ids]
+    assert parse_many(strs) == ids
+
+    with pytest.raises(ErrBadLength):
+        parse_many(strs + ["c4"])
+    with pytest.raises(ErrBadChar) as exc:
+        parse_many([strs[0][:50] + "l" + strs[0][51:]])
+    assert exc.value.pos == 50
+
+
+def test_id_parse_non_ascii() -> None:
+    """Test that non-ASCII characters report their position"""
+    with pytest.raises(ErrBadChar) as exc:
+        ID.parse("c4" + "1" * 10 + "é" + "1" * 77)
+    assert exc.value.pos == 12
+
+
+def test_id_hashable() -> None:
+    """Test that equal IDs hash equally and work in sets and dicts"""
+    a = ID.parse(
+        "c43zYcLni5LF9rR4Lg4B8h3Jp8SBwjcnyyeh4bc6gTPHndKuKdjUWx1kJPYhZxYt3zV6tQXpDs2shPsPYjgG81wZM1"
+    )
+    b = ID.parse(str(a))
+    assert hash(a) == hash(b)
+    assert len({a, b, NIL_ID}) == 2
+    assert {a: 1}[b] == 1
+
+
+def test_id_rich_comparisons() -> None:
+    """Test the full set of ordering operators"""
+    low, high = ID(1), ID(2)
+    assert low < high and low <= high and low <= ID(1)
+    assert high > low and high >= low and high >= ID(2)
+    assert low != high and not (low != ID(1))
+    assert not (low > high) and not (low >= high)
+    assert sorted([MAX_ID, VOID_ID, NIL_ID])[-1] == MAX_ID
+
+    # None sorts before every ID
+    assert not (low < None) and not (low <= None)
+    assert low > None and low >= None
+    assert low.__ne__("x") is NotImplemented
+
+
+@pytest.mark.parametrize("other", [5, "c4", 1.5, b"x" * 64])
+def test_id_mixed_type_comparisons(other: Any) -> None:
+    """Test that ordering against non-IDs raises TypeError"""
+    id_obj = ID(1)
+    for compare in (
+        lambda: id_obj < other,
+        lambda: id_obj <= other,
+        lambda: id_obj > other,
+        lambda: id_obj >= other,
+        lambda: other < id_obj,
+        lambda: other >= id_obj,
+    ):
+        with pytest.raises(TypeError):
+            compare()
+    assert id_obj != other and not (id_obj == other)
+    assert None < id_obj and not (None > id_obj)
+
+
+def test_digest_backed_id() -> None:
+    """Test that digest- and integer-backed IDs are interchangeable"""
+    values = [0, 1, 2, 255, 1 << 64, (1 << 512) - 1, NIL_ID._value]
+    by_int = [ID(v) for v in values]
+    by_digest = [ID.from_digest(v.to_bytes(64, "big")) for v in values]
+    for a, b in zip(by_int, by_digest):
+        assert a == b and not (a != b)
+        assert hash(a) == hash(b)
+        assert str(a) == str(b)
+        assert bytes(a) == bytes(b) == b.digest()
+        assert a._value == b._value
+    assert sorted(by_digest) == sorted(by_int)
+    for x, y in zip(by_digest, by_digest[1:]):
+        assert (x < y) == (x._value < y._value)
+        assert (x >= y) == (x._value >= y._value)
+    assert len(set(by_int) | set(by_digest)) == len(set(values))
+
+
+def test_id_digest_not_copied() -> None:
+    """Test that digests and IDs share one buffer across conversions"""
+    digest = Encoder().digest()
+    assert Digest(digest) is digest
+    file_id = digest.id()
+    assert file_id.digest() is digest
+    assert bytes(file_id) is digest
+    # An integer-backed ID converts once and keeps the digest
+    assert NIL_ID.digest() is NIL_ID.digest()
+    view = memoryview(bytearray(bytes(digest)))
+    assert ID.from_digest(view) == NIL_ID
@@ -0,0 +1,100 @@
+from typing import Callable, List
+
+import pytest
+
+from c4py import ID, IDArray
+import c4py.idarray
+
+
+def test_id_has_no_dict() -> None:
+    """Test that ID uses __slots__"""
+    assert not hasattr(ID(1), "__dict__")
+
+
+def test_idarray_indexing(sample: Callable[[int], List[ID]]) -> None:
+    """Test building, indexing and iterating"""
+    ids = sample(10)
+    arr = IDArray(ids)
+    assert len(arr) == 10
+    assert len(arr.tobytes()) == 640
+    assert arr[0] == ids[0]
+    assert arr[-1] == ids[-1]
+    assert list(arr) == ids
+    assert arr.digest(3) == ids[3].digest()
+    with pytest.raises(IndexError):
+        arr[10]
+
+    arr.append(ids[0].digest())
+    arr.extend(IDArray(ids[:2]))
+    assert len(arr) == 13
+    with pytest.raises(ValueError):
+        arr.append(b"short")
+
+
+def test_idarray_slices_are_views(sample: Callable[[int], List[ID]]) -> None:
+    """Test that contiguous slices share the parent buffer"""
+    ids = sample(8)
+    arr = IDArray(ids)
+    view = arr[2:5]
+    assert list(view) == ids[2:5]
+    assert view.buffer.obj is arr._buf
+    assert list(arr[::2]) == ids[::2]
+    assert len(arr[5:2]) == 0
+    with pytest.raises(TypeError):
+        view.append(ids[0])
+
+
+def test_idarray_from_buffer(sample: Callable[[int], List[ID]]) -> None:
+    """Test wrapping an existing digest buffer"""
+    ids = sample(4)
+    buf = b"".join(i.digest() for i in ids)
+    arr = IDArray.from_buffer(buf)
+    assert list(arr) == ids
+    assert arr == IDArray(ids)
+    with pytest.raises(ValueError):
+        IDArray.from_buffer(buf[:-1])
+
+    owned = IDArray.from_bytearray(bytearray(buf))
+    owned.append(ids[0])
+    assert list(owned) == ids + ids[:1]
+    with pytest.raises(ValueError):
+        IDArray.from_bytearray(bytearray(buf[:-1]))
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_idarray_sort_and_search(
+    monkeypatch, use_numpy: bool, sample: Callable[[int], List[ID]]
+) -> None:
+    """Test sorting, dedup and binary search membership"""
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(c4py.idarray, "_numpy", lambda: None)
+
+    ids = sample(50)
+    arr = IDArray(ids + ids[:10])
+    assert list(arr.sorted()) == sorted(ids + ids[:10])
+    unique = arr.sorted(unique=True)
+    assert list(unique) == sorted(ids)
+
+    arr.sort()
+    assert list(arr) == sorted(ids + ids[:10])
+
+    for i, id_obj in enumerate(unique):
+        assert unique.searchsorted(id_obj) == i
+        assert unique.contains_sorted(id_obj)
+    assert not unique.contains_sorted(ID(1))
+    assert unique.searchsorted(ID(1)) == 0
+
+
+def test_idarray_contains(sample: Callable[[int], List[ID]]) -> None:
+    """Test linear membership only matches aligned records"""
+    ids = sample(3)
+    arr = IDArray(ids)
+    assert ids[1] in arr
+    assert ids[1] in arr[1:]
+    assert ids[1] not in arr[2:]
+    assert "c4" not in arr
+    assert b"short" not in arr
+    # A 64-byte window straddling two records is not a member
+    assert arr.tobytes()[32:96] not in arr
@@ -0,0 +1,47 @@
+from typing import Callable, List
+
+import pytest
+
+from c4py import ID, IDArray, IDIndex
+
+
+def test_index_lookup_by_any_key_form(sample: Callable[[int], List[ID]]) -> None:
+    """Test lookups by ID, digest, raw bytes and string"""
+    ids = sample(5)
+    index = IDIndex((id_obj, n) for n, id_obj in enumerate(ids))
+
+    assert len(index) == 5
+    assert index[ids[2]] == 2
+    assert index[ids[2].digest()] == 2
+    assert index[bytes(ids[2].digest())] == 2
+    assert index[str(ids[2])] == 2
+    assert ids[4] in index
+    assert str(ids[4]) in index
+    assert "not an id" not in index
+    assert b"short" not in index
+    assert 42 not in index
+    assert list(index) == ids
+
+    with pytest.raises(KeyError):
+        index["c4" + "0" * 88]
+
+
+def test_index_mutation(sample: Callable[[int], List[ID]]) -> None:
+    """Test set, overwrite and delete"""
+    ids = sample(3)
+    index: IDIndex[str] = IDIndex()
+    for id_obj in ids:
+        index[id_obj] = str(id_obj)
+    index[ids[0]] = "first"
+    del index[ids[1]]
+
+    assert dict(index.items()) == {ids[0]: "first", ids[2]: str(ids[2])}
+    assert index.get(ids[1]) is None
+
+
+def test_index_from_array(sample: Callable[[int], List[ID]]) -> None:
+    """Test building an index from an IDArray"""
+    ids = sample(4)
+    index = IDIndex.from_array(IDArray(ids), ["a", "b", "c", "d"])
+    assert index[ids[3]] == "d"
+    assert list(index.ids()) == ids
@@ -1,5 +1,12 @@
 # tests/test_main.py
 import importlib
+import os
+import subprocess
+import sys
+
+import pytest
+
+import c4py
 
 
 def test_main_module() -> None:
@@ -7,3 +14,46 @@ def test_main_module() -> None:
     # Import the module
     main = importlib.import_module("c4py.__main__")
     assert main is not None
+
+
+def run_python(code: str) -> str:
+    src = os.path.dirname(os.path.dirname(c4py.__file__))
+    env = dict(os.environ, PYTHONPATH=src)
+    return subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True
+    ).stdout
+
+
+def test_import_is_lazy() -> None:
+    """Test that importing c4py skips the CLI and heavier submodules"""
+    loaded = run_python(
+        "import sys, c4py; print(sorted(m for m in sys.modules "
+        "if m in ('click', 'typing', 'concurrent.futures', 'sqlite3') "
+        "or m.startswith('c4py.')))"
+    )
+    assert loaded.strip() == "['c4py.errors', 'c4py.id', 'c4py.stats']"
+
+
+def test_cli_import_skips_formats() -> None:
+    """Test that loading the CLI leaves the manifest writers unimported"""
+    loaded = run_python(
+        "import sys, c4py.cli; print(sorted(m for m in sys.modules "
+        "if m in ('json', 'csv', 'c4py.formats')))"
+    )
+    assert loaded.strip() == "[]"
+
+
+def test_lazy_attributes() -> None:
+    """Test that lazily exported names resolve on first access"""
+    assert c4py.Tree is importlib.import_module("c4py.tree").Tree
+    assert "IDArray" in dir(c4py)
+    with pytest.raises(AttributeError):
+        c4py.missing
+
+
+def test_version_fast_path(monkeypatch, capsys) -> None:
+    """Test that --version is answered without loading the CLI"""
+    main = importlib.import_module("c4py.__main__")
+    monkeypatch.setattr(sys, "argv", ["c4py", "--version"])
+    main.run()
+    assert capsys.readouterr().out == f"c4py, version {c4py.__version__}\n"
@@ -0,0 +1,100 @@
+import os
+from typing import Callable, Dict, List, Tuple
+
+from click.testing import CliRunner
+
+from c4py import identify_path
+from c4py.cli import main, walk_files
+from c4py.manifest import build_manifest, pack_record, unpack_records
+
+
+def walked(temp_dir: str, depth: int = 0) -> Dict[str, str]:
+    return {
+        path: str(identify_path(path))
+        for path in walk_files(temp_dir, False, depth, False)
+    }
+
+
+def test_build_manifest_matches_walk(
+    temp_dir: str, make_tree: Callable[[str], None]
+) -> None:
+    """Test that the worker walk finds every file with the same IDs"""
+    make_tree(temp_dir)
+    results = list(build_manifest(temp_dir, jobs=3))
+    assert {r.path: str(r.id) for r in results} == walked(temp_dir)
+    for result in results:
+        assert result.stat is not None
+        assert result.stat.st_size == os.path.getsize(result.path)
+
+
+def test_build_manifest_depth(temp_dir: str, make_tree: Callable[[str], None]) -> None:
+    """Test that depth limits match the CLI walk"""
+    make_tree(temp_dir)
+    for depth in (1, 2):
+        results = build_manifest(temp_dir, jobs=2, depth=depth)
+        assert {r.path: str(r.id) for r in results} == walked(temp_dir, depth)
+
+
+def test_build_manifest_errors(temp_dir: str, make_tree: Callable[[str], None]) -> None:
+    """Test that unreadable entries are reported and skipped"""
+    make_tree(temp_dir)
+    os.symlink("missing", os.path.join(temp_dir, "broken"))
+    errors: List[Tuple[str, Exception]] = []
+    results = list(
+        build_manifest(temp_dir, jobs=2, on_error=lambda p, e: errors.append((p, e)))
+    )
+    assert len(results) == 14
+    assert [p for p, _ in errors] == [os.path.join(temp_dir, "broken")]
+
+
+def test_record_round_trip(temp_file) -> None:
+    """Test packing and unpacking worker records"""
+    path, _ = temp_file
+    st = os.stat(path)
+    file_id = identify_path(path)
+    assert file_id is not None
+    data = pack_record(path, file_id, st) * 2
+    results = list(unpack_records(data))
+    assert len(results) == 2
+    assert results[0].path == path
+    assert results[0].id == file_id
+    unpacked = results[0].stat
+    assert unpacked is not None
+    assert unpacked.st_mtime_ns == st.st_mtime_ns
+    assert unpacked.st_mode == st.st_mode
+
+
+def test_cli_workers(temp_dir: str, make_tree: Callable[[str], None]) -> None:
+    """Test that -w output matches the ordinary walk once sorted"""
+    make_tree(temp_dir)
+    runner = CliRunner()
+    expected = runner.invoke(main, ["-R", "-V", "--sort", temp_dir])
+    result = runner.invoke(main, ["-R", "-V", "--sort", "-w", "2", temp_dir])
+    assert result.exit_code == 0
+    assert result.output == expected.output
+
+
+def test_build_manifest_links(tmp_path, make_tree: Callable[[str], None]) -> None:
+    """Test hard links share an ID and symlink loops are reported"""
+    temp_dir = str(tmp_path)
+    make_tree(temp_dir)
+    os.link(os.path.join(temp_dir, "a", "x.txt"), os.path.join(temp_dir, "d", "hard"))
+    os.symlink(temp_dir, os.path.join(temp_dir, "a", "loop"))
+    errors: List[Tuple[str, Exception]] = []
+    results = {
+        r.path: r.id
+        for r in build_manifest(
+            temp_dir,
+            jobs=2,
+            follow_links=True,
+            on_error=lambda p, e: errors.append((p, e)),
+        )
+    }
+    assert len(results) == 15
+    assert (
+        results[os.path.join(temp_dir, "d", "hard")]
+        == results[os.path.join(temp_dir, "a", "x.txt")]
+    )
+    assert [(p, str(e)) for p, e in errors] == [
+        (os.path.join(temp_dir, "a", "loop"), "filesystem loop")
+    ]
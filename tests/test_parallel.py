@@ -0,0 +1,101 @@
+import io
+import os
+from typing import List, Tuple
+
+from c4py import identify
+from c4py.parallel import identify_paths
+
+
+def make_files(temp_dir: str, count: int) -> List[str]:
+    paths = []
+    for i in range(count):
+        path = os.path.join(temp_dir, f"file{i:03d}.bin")
+        with open(path, "wb") as f:
+            f.write(bytes([i % 256]) * (i * 1000))
+        paths.append(path)
+    return paths
+
+
+def expected_ids(paths: List[str]) -> List[Tuple[str, str]]:
+    results = []
+    for path in paths:
+        with open(path, "rb") as f:
+            results.append((path, str(identify(f))))
+    return results
+
+
+def test_identify_paths_serial(temp_dir: str) -> None:
+    """Test inline hashing with a single job"""
+    paths = make_files(temp_dir, 5)
+    results = [(p, str(i)) for p, i in identify_paths(paths, jobs=1)]
+    assert results == expected_ids(paths)
+
+
+def test_identify_paths_threads_preserve_order(temp_dir: str) -> None:
+    """Test that thread pool results come back in input order"""
+    paths = make_files(temp_dir, 40)
+    results = [(p, str(i)) for p, i in identify_paths(iter(paths), jobs=4)]
+    assert results == expected_ids(paths)
+
+
+def test_identify_paths_processes(temp_dir: str) -> None:
+    """Test hashing on a process pool"""
+    paths = make_files(temp_dir, 6)
+    results = [(p, str(i)) for p, i in identify_paths(paths, jobs=2, processes=True)]
+    assert results == expected_ids(paths)
+
+
+def test_identify_paths_errors(temp_dir: str) -> None:
+    """Test that failing files are reported and skipped"""
+    paths = make_files(temp_dir, 3)
+    missing = os.path.join(temp_dir, "missing.bin")
+    errors = []
+
+    results = list(
+        identify_paths(
+            [paths[0], missing, paths[1]],
+            jobs=2,
+            on_error=lambda path, e: errors.append(path),
+        )
+    )
+
+    assert [p for p, _ in results] == [paths[0], paths[1]]
+    assert errors == [missing]
+
+
+def test_identify_paths_all_cpus(temp_dir: str) -> None:
+    """Test that jobs=0 uses one worker per CPU"""
+    paths = make_files(temp_dir, 3)
+    results = list(identify_paths(paths, jobs=0))
+    assert len(results) == 3
+    assert results[0][1] == identify(io.BytesIO(b""))
+
+
+def test_identify_files_hashes_each_inode_once(temp_dir: str, monkeypatch) -> None:
+    """Test that hard links reuse the ID of the first path to their inode"""
+    import c4py.parallel
+    from c4py.parallel import InodeIndex, identify_files
+
+    original = os.path.join(temp_dir, "original")
+    with open(original, "wb") as f:
+        f.write(b"linked content")
+    links = [os.path.join(temp_dir, f"link{i}") for i in range(3)]
+    for link in links:
+        os.link(original, link)
+    single = make_files(temp_dir, 2)
+
+    hashed: List[str] = []
+    real_hash = c4py.parallel.hash_file
+
+    def counting_hash(path: str):  # type: ignore[no-untyped-def]
+        hashed.append(path)
+        return real_hash(path)
+
+    monkeypatch.setattr(c4py.parallel, "hash_file", counting_hash)
+    inodes = InodeIndex()
+    paths = [original] + links + single
+    results = list(identify_files(paths, jobs=2, inodes=inodes))
+    assert [(r.path, str(r.id)) for r in results] == expected_ids(paths)
+    assert hashed == [original] + single
+    assert inodes.reused == 3
+    assert len(inodes.files) == 1
@@ -0,0 +1,203 @@
+import hashlib
+import io
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from c4py import identify
+from c4py.cli import main
+from c4py.resumable import (
+    BACKENDS,
+    ResumableEncoder,
+    default_backend,
+    identify_resumable,
+    load_checkpoint,
+    save_checkpoint,
+    source_of,
+)
+
+DATA = bytes(i * 31 % 256 for i in range(5000))
+
+AVAILABLE = ["python"] + (["libcrypto"] if default_backend() == "libcrypto" else [])
+
+
+@pytest.mark.parametrize("backend", AVAILABLE)
+@pytest.mark.parametrize("size", [0, 1, 111, 112, 127, 128, 129, 256, 5000])
+def test_matches_hashlib(backend: str, size: int) -> None:
+    """Test that each backend computes plain SHA-512 and the same C4 ID"""
+    enc = ResumableEncoder(backend)
+    enc.write(DATA[:size])
+    assert bytes(enc.digest()) == hashlib.sha512(DATA[:size]).digest()
+    assert enc.id() == identify(io.BytesIO(DATA[:size]))
+    # Digest-backed like every other encoder's IDs
+    assert enc.id()._digest is not None
+    assert enc.offset == size
+
+
+@pytest.mark.parametrize("first", AVAILABLE)
+@pytest.mark.parametrize("second", AVAILABLE)
+@pytest.mark.parametrize("split", [0, 100, 128, 3333])
+def test_checkpoint_round_trip(first: str, second: str, split: int) -> None:
+    """Test that a checkpoint resumes on either backend"""
+    enc = ResumableEncoder(first)
+    enc.write(DATA[:split])
+    # Reading the ID must not disturb the running state
+    enc.id()
+    resumed = ResumableEncoder.resume(enc.checkpoint(), second)
+    assert resumed.offset == split
+    resumed.write(bytearray(DATA[split:]))
+    assert bytes(resumed.digest()) == hashlib.sha512(DATA).digest()
+
+
+def test_bad_checkpoint() -> None:
+    """Test that truncated or foreign checkpoints are rejected"""
+    enc = ResumableEncoder()
+    enc.write(DATA[:200])
+    data = enc.checkpoint()
+    for bad in (b"", b"C4BT" + data[4:], data[:-1]):
+        with pytest.raises(ValueError):
+            ResumableEncoder.resume(bad)
+    with pytest.raises(ValueError):
+        ResumableEncoder("nope")
+    assert set(BACKENDS) == {"python", "libcrypto"}
+
+
+def test_identify_resumable(temp_dir: str) -> None:
+    """Test that a resumed stream gets the same ID as an uninterrupted one"""
+    checkpoint = os.path.join(temp_dir, "ingest.ckpt")
+    enc = ResumableEncoder()
+    enc.write(DATA[:3000])
+    save_checkpoint(checkpoint, enc)
+    assert load_checkpoint(checkpoint).offset == 3000
+
+    # A seekable source is repositioned; a pipe must restart at the offset
+    expected = identify(io.BytesIO(DATA))
+    assert identify_resumable(io.BytesIO(DATA), checkpoint, resume=True) == expected
+    assert not os.path.exists(checkpoint)
+
+    save_checkpoint(checkpoint, enc)
+
+    class Pipe(io.BytesIO):
+        def seekable(self) -> bool:
+            return False
+
+    assert identify_resumable(Pipe(DATA[3000:]), checkpoint, resume=True) == expected
+
+
+def test_resume_checks_source(temp_dir: str) -> None:
+    """Test that a file checkpoint only resumes against the same, unchanged file"""
+    path = os.path.join(temp_dir, "data.bin")
+    other = os.path.join(temp_dir, "other.bin")
+    for name in (path, other):
+        with open(name, "wb") as f:
+            f.write(DATA)
+    checkpoint = os.path.join(temp_dir, "ingest.ckpt")
+
+    def save_partial() -> None:
+        with open(path, "rb") as f:
+            enc = ResumableEncoder(source=source_of(f))
+        enc.write(DATA[:3000])
+        save_checkpoint(checkpoint, enc)
+
+    save_partial()
+    source = load_checkpoint(checkpoint).source
+    assert source is not None and source.path == path and source.size == len(DATA)
+    with open(path, "rb") as f:
+        assert identify_resumable(f, checkpoint, resume=True) == identify(
+            io.BytesIO(DATA)
+        )
+
+    for src in (lambda: open(other, "rb"), lambda: io.BytesIO(DATA)):
+        save_partial()
+        with src() as f, pytest.raises(ValueError, match="was taken from"):
+            identify_resumable(f, checkpoint, resume=True)
+
+    save_partial()
+    with open(path, "r+b") as f:
+        f.write(b"changed")
+    os.utime(path, ns=(0, 1))
+    with open(path, "rb") as f, pytest.raises(ValueError, match=path):
+        identify_resumable(f, checkpoint, resume=True)
+
+    with open(path, "wb") as f:
+        f.write(DATA[:2000])
+    with open(path, "rb") as f, pytest.raises(ValueError, match=path):
+        identify_resumable(f, checkpoint, resume=True)
+
+
+def test_resume_grown_file(temp_dir: str) -> None:
+    """Test that a checkpoint resumes against a file that was appended to"""
+    path = os.path.join(temp_dir, "data.bin")
+    with open(path, "wb") as f:
+        f.write(DATA[:3000])
+    checkpoint = os.path.join(temp_dir, "ingest.ckpt")
+    with open(path, "rb") as f:
+        enc = ResumableEncoder(source=source_of(f))
+    enc.write(DATA[:3000])
+    save_checkpoint(checkpoint, enc)
+
+    with open(path, "ab") as f:
+        f.write(DATA[3000:])
+    with open(path, "rb") as f:
+        assert identify_resumable(f, checkpoint, resume=True) == identify(
+            io.BytesIO(DATA)
+        )
+
+
+def test_identify_resumable_writes_checkpoints(temp_dir: str) -> None:
+    """Test that checkpoints are saved at the requested interval"""
+    checkpoint = os.path.join(temp_dir, "ingest.ckpt")
+    offsets = []
+
+    class Crash(io.BytesIO):
+        def readinto(self, buf):  # type: ignore[no-untyped-def]
+            if os.path.exists(checkpoint):
+                offsets.append(load_checkpoint(checkpoint).offset)
+                if len(offsets) == 2:
+                    raise OSError("connection lost")
+            return super().readinto(buf)
+
+    with pytest.raises(OSError):
+        identify_resumable(Crash(DATA), checkpoint, every=1000, chunk_size=512)
+    assert offsets[-1] >= 1000
+    resumed = identify_resumable(io.BytesIO(DATA), checkpoint, resume=True)
+    assert resumed == identify(io.BytesIO(DATA))
+
+
+def test_cli_checkpoint(temp_dir: str) -> None:
+    """Test --checkpoint and --resume for a file and for stdin"""
+    path = os.path.join(temp_dir, "stream.bin")
+    with open(path, "wb") as f:
+        f.write(DATA)
+    checkpoint = os.path.join(temp_dir, "ckpt")
+    expected = str(identify(io.BytesIO(DATA)))
+    runner = CliRunner()
+
+    result = runner.invoke(main, ["--checkpoint", checkpoint, path])
+    assert result.exit_code == 0
+    assert result.output.strip() == expected
+
+    enc = ResumableEncoder()
+    enc.write(DATA[:1234])
+    save_checkpoint(checkpoint, enc)
+    args = ["--checkpoint", checkpoint, "--resume"]
+    # The test runner's stdin is seekable, so it is repositioned
+    result = runner.invoke(main, args, input=DATA)
+    assert result.exit_code == 0
+    assert result.output.strip() == expected
+
+    result = runner.invoke(main, ["--resume", path])
+    assert result.exit_code == 2
+    result = runner.invoke(main, ["--checkpoint", checkpoint, path, path])
+    assert result.exit_code == 2
+    # A stream's checkpoint does not resume a file
+    save_checkpoint(checkpoint, enc)
+    result = runner.invoke(main, args + [path])
+    assert result.exit_code == 2
+    assert "was taken from a stream" in result.output
+    with open(checkpoint, "wb") as f:
+        f.write(b"garbage")
+    result = runner.invoke(main, args + [path])
+    assert result.exit_code == 2
+    assert "not a c4py checkpoint" in result.output
@@ -0,0 +1,135 @@
+import json
+import os
+import socket
+import threading
+from typing import Iterator, List, Tuple
+
+import pytest
+from click.testing import CliRunner
+
+from c4py import identify_path
+from c4py.cli import main
+from c4py.id import Encoder
+from c4py.server import Client, Server, ServerError
+
+
+@pytest.fixture
+def server(tmp_path: str) -> Iterator[Server]:
+    srv = Server(os.path.join(tmp_path, "c4py.sock"), jobs=2)
+    thread = threading.Thread(target=srv.serve_forever)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    thread.join()
+    srv.server_close()
+
+
+def make_files(root: str) -> List[str]:
+    paths = []
+    for name in ("a", "b", "c"):
+        path = os.path.join(root, name)
+        with open(path, "wb") as f:
+            f.write(name.encode() * 1000)
+        os.utime(path, (0, 0))
+        paths.append(path)
+    return paths
+
+
+def test_identify_path(server: Server, tmp_path: str) -> None:
+    """Path IDs match local hashing and are cached after the first request"""
+    path = make_files(str(tmp_path))[0]
+    with Client(server.socket_path) as client:
+        assert client.identify_path(path) == identify_path(path)
+        assert client.ping()["cached"] == 1
+        assert client.identify_path(path) == identify_path(path)
+    assert server.cache.hits == 1
+
+
+def test_identify_bytes(server: Server) -> None:
+    """Bytes are hashed as sent"""
+    enc = Encoder()
+    enc.write(b"hello")
+    with Client(server.socket_path) as client:
+        assert client.identify_bytes(b"hello") == enc.id()
+
+
+def test_identify_paths_batches(server: Server, tmp_path: str) -> None:
+    """Batches keep input order and report failures without stopping"""
+    paths = make_files(str(tmp_path))
+    missing = os.path.join(tmp_path, "missing")
+    errors: List[Tuple[str, Exception]] = []
+    with Client(server.socket_path) as client:
+        results = list(
+            client.identify_paths(
+                [paths[0], missing, str(tmp_path), *paths[1:]],
+                on_error=lambda path, e: errors.append((path, e)),
+                batch_size=2,
+            )
+        )
+    assert results == [(path, identify_path(path)) for path in paths]
+    assert [path for path, _ in errors] == [missing, str(tmp_path)]
+    assert isinstance(errors[0][1], FileNotFoundError)
+    assert isinstance(errors[1][1], IsADirectoryError)
+
+
+def test_client_errors(server: Server, tmp_path: str) -> None:
+    """A missing file raises OSError; a bad request raises ServerError"""
+    with Client(server.socket_path) as client:
+        with pytest.raises(FileNotFoundError):
+            client.identify_path(os.path.join(tmp_path, "missing"))
+        with pytest.raises(ServerError, match="unknown op"):
+            client._result(client.request({"op": "nope"}))
+
+
+def test_raw_protocol(server: Server) -> None:
+    """Malformed lines get an error reply and the connection stays usable"""
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.connect(server.socket_path)
+        sock.sendall(b'not json\n{"op": "path", "path": 3}\n{"op": "ping"}\n')
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile("rb") as f:
+            replies = [json.loads(line) for line in f]
+    assert replies[0]["error"].startswith("bad request")
+    assert replies[1]["error"].startswith("bad request")
+    assert "version" in replies[2]
+
+
+def test_socket_permissions_and_cleanup(tmp_path: str) -> None:
+    """The socket is private to its owner and removed on close"""
+    path = os.path.join(tmp_path, "c4py.sock")
+    with Server(path, jobs=1):
+        assert os.stat(path).st_mode & 0o777 == 0o600
+        with pytest.raises(OSError):
+            Server(path, jobs=1)
+    assert not os.path.exists(path)
+
+
+def test_stale_socket_replaced(tmp_path: str) -> None:
+    """A socket left by a dead server is removed"""
+    path = os.path.join(tmp_path, "c4py.sock")
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(path)
+    stale.close()
+    with Server(path, jobs=1):
+        assert os.path.exists(path)
+
+
+def test_cli_server(server: Server, tmp_path: str) -> None:
+    """id --server prints the same output as hashing locally"""
+    files = os.path.join(tmp_path, "files")
+    os.mkdir(files)
+    make_files(files)
+    runner = CliRunner()
+    local = runner.invoke(main, ["-R", "-V", files])
+    remote = runner.invoke(main, ["-R", "-V", "--server", server.socket_path, files])
+    assert remote.exit_code == 0
+    assert remote.output == local.output
+
+
+def test_cli_server_unreachable(tmp_path: str) -> None:
+    """A missing server is a clear error"""
+    runner = CliRunner()
+    missing = os.path.join(tmp_path, "none.sock")
+    result = runner.invoke(main, ["--server", missing, str(tmp_path)])
+    assert result.exit_code == 1
+    assert "cannot connect to server" in result.output
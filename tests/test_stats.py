@@ -0,0 +1,128 @@
+import inspect
+import io
+import os
+from typing import Any, BinaryIO, Dict, List, Tuple, cast
+
+from click.testing import CliRunner
+
+from c4py import stats
+from c4py.cli import main
+from c4py.id import identify, identify_path
+from c4py.walk import walk
+
+
+class Recorder(stats.Hook):
+    def __init__(self) -> None:
+        self.phases: List[Tuple[str, float]] = []
+        self.files: List[Tuple[str, int]] = []
+        self.errors: List[str] = []
+
+    def on_phase(self, phase: str, seconds: float) -> None:
+        self.phases.append((phase, seconds))
+
+    def on_file(self, path: str, size: int, seconds: float) -> None:
+        self.files.append((path, size))
+
+    def on_error(self, path: str, error: Exception) -> None:
+        self.errors.append(path)
+
+
+def test_hooks_disabled_by_default() -> None:
+    """No hooks means no instrumentation"""
+    assert not stats.enabled
+    hook = Recorder()
+    with hook:
+        assert stats.enabled
+    assert not stats.enabled
+    assert hook.phases == []
+
+
+def test_identify_path_reports_phases(tmp_path: str) -> None:
+    """Hashing a file reports stat, io and hash time and the file"""
+    path = os.path.join(tmp_path, "data")
+    with open(path, "wb") as f:
+        f.write(b"x" * 2_000_000)
+    expected = identify_path(path)
+    hook = Recorder()
+    with hook:
+        assert identify_path(path) == expected
+    assert hook.files == [(path, 2_000_000)]
+    assert {name for name, _ in hook.phases} == {stats.STAT, stats.IO, stats.HASH}
+    assert all(seconds >= 0 for _, seconds in hook.phases)
+
+
+def test_identify_stream_reports_phases() -> None:
+    """Streams without readinto are timed too"""
+
+    class Reader:
+        def __init__(self, data: bytes) -> None:
+            self.buf = io.BytesIO(data)
+
+        def read(self, n: int) -> bytes:
+            return self.buf.read(n)
+
+    expected = identify(io.BytesIO(b"abc"))
+    hook = Recorder()
+    with hook:
+        assert identify(cast(BinaryIO, Reader(b"abc"))) == expected
+    assert [name for name, _ in hook.phases] == [stats.IO, stats.HASH]
+
+
+def test_walk_reports_time_and_errors(tmp_path: str) -> None:
+    """Walks report their time and the directories they cannot list"""
+    open(os.path.join(tmp_path, "a"), "w").close()
+    errors: List[str] = []
+    hook = Recorder()
+    with hook:
+        assert len(list(walk(str(tmp_path)))) == 1
+        missing = os.path.join(tmp_path, "missing")
+        list(walk(missing, on_error=lambda path, e: errors.append(path)))
+    assert [name for name, _ in hook.phases] == [stats.WALK, stats.WALK]
+    assert hook.errors == errors == [missing]
+
+
+def test_run_stats_report() -> None:
+    """RunStats totals files and keeps the slowest ones"""
+    run = stats.RunStats(slowest=2)
+    for i, seconds in enumerate([0.1, 0.3, 0.2]):
+        run.on_file(f"f{i}", 1000, seconds)
+    run.on_phase(stats.HASH, 0.5)
+    run.on_error("bad", OSError())
+    assert [path for _, path, _ in run.slowest] == ["f1", "f2"]
+    report = run.report(elapsed=2.0)
+    assert "hashed   3 files (1 errors)" in report
+    assert "1.5 files/s, 1.5 KB/s" in report
+    assert "hash 0.500 s" in report
+    assert report.splitlines()[-1].endswith("f2")
+
+
+def test_progress_line() -> None:
+    """Progress ends with a final status line"""
+    out = io.StringIO()
+    with stats.Progress(out, interval=60):
+        stats.file_done("a", 5000, 0.0)
+    assert out.getvalue().startswith("\r1 files, 5.0 KB")
+    assert out.getvalue().endswith("\n")
+
+
+def separate_runner() -> CliRunner:
+    """CliRunner that keeps stderr apart from stdout on click 8.1 and 8.2+"""
+    kwargs: Dict[str, Any] = {}
+    if "mix_stderr" in inspect.signature(CliRunner.__init__).parameters:
+        kwargs["mix_stderr"] = False
+    return CliRunner(**kwargs)
+
+
+def test_cli_stats(tmp_path: str) -> None:
+    """--stats prints a report to stderr and leaves stdout alone"""
+    for name in ("a", "b"):
+        with open(os.path.join(tmp_path, name), "w") as f:
+            f.write(name)
+    runner = separate_runner()
+    plain = runner.invoke(main, ["-R", str(tmp_path)])
+    result = runner.invoke(main, ["-R", "--stats", "--progress", str(tmp_path)])
+    assert result.exit_code == 0
+    assert result.stdout == plain.stdout
+    assert "hashed   2 files (0 errors)" in result.stderr
+    assert "format" in result.stderr
+    assert not stats.enabled
@@ -0,0 +1,76 @@
+import hashlib
+
+import pytest
+
+from c4py import Digest, Tree
+from c4py.errors import ErrInvalidTree
+from c4py.tree import reduce_level
+import c4py.tree
+
+
+def digests(count: int):
+    return [Digest(hashlib.sha512(str(i).encode()).digest()) for i in range(count)]
+
+
+def reference_root(items) -> Digest:
+    """Reduce with Digest.sum one Python object at a time"""
+    level = sorted(set(items))
+    while len(level) > 1:
+        nxt = [level[i].sum(level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            nxt.append(level[-1])
+        level = nxt
+    return level[0]
+
+
+def test_tree_two_leaves_matches_sum() -> None:
+    """Test that a two-leaf tree is the digest sum"""
+    d1, d2 = digests(2)
+    assert Tree([d1, d2]).digest() == d1.sum(d2)
+    assert Tree([d2, d1]).id() == d1.sum(d2).id()
+
+
+@pytest.mark.parametrize("count", [1, 3, 7, 8, 100])
+def test_tree_matches_reference(count: int) -> None:
+    """Test tree roots against a pairwise Digest.sum reduction"""
+    items = digests(count)
+    tree = Tree(items)
+    assert len(tree) == count
+    assert tree.digest() == reference_root(items)
+    assert len(tree.levels()[-1]) == 64
+
+
+def test_tree_dedupes_and_accepts_ids() -> None:
+    """Test that duplicates are removed and IDs, digests and bytes mix"""
+    items = digests(5)
+    mixed = [items[0].id(), bytes(items[1])] + items[2:] + items
+    assert Tree(mixed).id() == Tree(items).id()
+    assert len(Tree(mixed)) == 5
+
+
+def test_tree_from_buffer() -> None:
+    """Test building a tree from a flat digest buffer"""
+    items = digests(9)
+    buf = b"".join(reversed(items))
+    tree = Tree.from_buffer(buf + bytes(items[3]))
+    assert tree.leaves() == b"".join(sorted(items))
+    assert Tree.from_buffer(memoryview(bytearray(buf))).id() == Tree(items).id()
+    assert tree.id() == Tree(items).id()
+
+    with pytest.raises(ErrInvalidTree):
+        Tree.from_buffer(buf[:-1])
+    with pytest.raises(ErrInvalidTree):
+        Tree([b"short"])
+
+
+def test_tree_empty() -> None:
+    """Test that an empty tree has no ID"""
+    assert Tree().id() is None
+    assert reduce_level(b"") == b""
+
+
+def test_tree_parallel_reduce(monkeypatch) -> None:
+    """Test that reducing levels on a process pool gives the same root"""
+    items = digests(37)
+    monkeypatch.setattr(c4py.tree, "PARALLEL_THRESHOLD", 4)
+    assert Tree(items).compute(jobs=2).id() == Tree(items).id()
@@ -0,0 +1,130 @@
+import os
+from typing import Callable, List
+
+import pytest
+from click.testing import CliRunner
+
+from c4py.cli import main
+from c4py.manifest import build_manifest
+from c4py.walk import PathFilter, walk
+
+
+def os_walk_files(root: str, depth: int = 0) -> List[str]:
+    """The original os.walk-based traversal, for comparison"""
+    paths = []
+    for directory, _, files in os.walk(root):
+        rel_depth = len(os.path.relpath(directory, root).split(os.sep))
+        if depth > 0 and rel_depth > depth:
+            continue
+        paths.extend(os.path.join(directory, name) for name in files)
+    return paths
+
+
+def paths(root: str, **kwargs) -> List[str]:  # type: ignore[no-untyped-def]
+    return [entry.path for entry in walk(root, **kwargs)]
+
+
+@pytest.mark.parametrize("depth", [0, 1, 2, 3])
+def test_walk_matches_os_walk(
+    temp_dir: str, depth: int, make_tree: Callable[[str], None]
+) -> None:
+    """Test that walk yields the same files in the same order as os.walk"""
+    make_tree(temp_dir)
+    assert paths(temp_dir, depth=depth) == os_walk_files(temp_dir, depth)
+
+
+def test_walk_prunes_at_depth(
+    temp_dir: str, monkeypatch: pytest.MonkeyPatch, make_tree: Callable[[str], None]
+) -> None:
+    """Test that directories below the depth limit are never listed"""
+    make_tree(temp_dir)
+    opened = []
+    scandir = os.scandir
+
+    def counting_scandir(path):  # type: ignore[no-untyped-def]
+        opened.append(os.path.relpath(path, temp_dir))
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", counting_scandir)
+    paths(temp_dir, depth=1)
+    assert sorted(opened) == [".", "a", "build", "d"]
+
+
+def test_walk_filters(temp_dir: str, make_tree: Callable[[str], None]) -> None:
+    """Test include/exclude globs on names and relative paths"""
+    make_tree(temp_dir)
+
+    def rel(**kwargs) -> List[str]:  # type: ignore[no-untyped-def]
+        found = paths(temp_dir, path_filter=PathFilter(**kwargs))
+        return sorted(os.path.relpath(p, temp_dir) for p in found)
+
+    assert rel(include=["*.exr"]) == sorted(
+        os.path.relpath(p, temp_dir)
+        for p in os_walk_files(temp_dir)
+        if p.endswith(".exr")
+    )
+    # A name pattern prunes every directory called build
+    assert not any("build" in p for p in rel(exclude=["build"]))
+    # A path pattern only matches relative to the root
+    kept = rel(exclude=["build/"])
+    assert "build/x.txt" not in kept and "d/build/x.txt" in kept
+    assert rel(include=["a/b/*.txt"], exclude=["c"]) == ["a/b/x.txt"]
+    assert not PathFilter() and PathFilter(exclude=["x"])
+
+
+def test_walk_links(tmp_path, make_tree: Callable[[str], None]) -> None:  # type: ignore[no-untyped-def]
+    """Test that directory links are skipped unless followed, and loops reported"""
+    root = str(tmp_path)
+    make_tree(os.path.join(root, "real"))
+    os.symlink(os.path.join(root, "real", "a"), os.path.join(root, "link"))
+    os.symlink(root, os.path.join(root, "real", "loop"))
+
+    assert not any(p.startswith(os.path.join(root, "link")) for p in paths(root))
+    errors = []
+    followed = paths(
+        root, follow_links=True, on_error=lambda p, e: errors.append((p, str(e)))
+    )
+    assert os.path.join(root, "link", "b", "x.txt") in followed
+    assert errors == [(os.path.join(root, "real", "loop"), "filesystem loop")]
+
+
+def test_walk_reports_unlistable(temp_dir: str) -> None:
+    """Test that a directory that cannot be listed is reported"""
+    errors = []
+    missing = os.path.join(temp_dir, "missing")
+    assert paths(missing, on_error=lambda p, e: errors.append(p)) == []
+    assert errors == [missing]
+
+
+def test_walk_on_dir_and_base(temp_dir: str, make_tree: Callable[[str], None]) -> None:
+    """Test the directory callback and globs relative to another base"""
+    make_tree(temp_dir)
+    sub = os.path.join(temp_dir, "a")
+    listed: List[str] = []
+    found = paths(
+        sub,
+        path_filter=PathFilter(exclude=["a/b"]),
+        on_dir=listed.append,
+        base=temp_dir,
+    )
+    assert sorted(found) == [os.path.join(sub, "x.txt"), os.path.join(sub, "y.exr")]
+    assert listed == [sub]
+
+
+def test_cli_include_exclude(temp_dir: str, make_tree: Callable[[str], None]) -> None:
+    """Test that --include/--exclude reach both walkers"""
+    make_tree(temp_dir)
+    runner = CliRunner()
+    args = ["-R", "-V", "-p", "--include", "*.exr", "--exclude", "build"]
+    serial = runner.invoke(main, args + [temp_dir])
+    assert serial.exit_code == 0
+    listed = sorted(line.split(": ")[0] for line in serial.output.splitlines())
+    assert listed == sorted(
+        p for p in os_walk_files(temp_dir) if p.endswith(".exr") and "build" not in p
+    )
+    workers = runner.invoke(main, args + ["-w", "2", "--sort", temp_dir])
+    assert workers.exit_code == 0
+    assert sorted(workers.output.splitlines()) == sorted(serial.output.splitlines())
+
+    filtered = build_manifest(temp_dir, 2, path_filter=PathFilter(["x.txt"]))
+    assert all(r.path.endswith("x.txt") for r in filtered)
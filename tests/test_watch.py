@@ -0,0 +1,189 @@
+import hashlib
+import os
+import random
+import time
+from typing import Callable, Iterator, List
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from c4py import Digest, Tree, identify_path
+from c4py.cli import main
+from c4py.diff import ADDED, MODIFIED, MOVED, REMOVED, Change
+from c4py.tree import IncrementalTree
+from c4py.walk import PathFilter, walk
+from c4py.watch import Watcher, inotify_available
+
+BACKENDS = [
+    pytest.param(
+        False, marks=pytest.mark.skipif(not inotify_available(), reason="no inotify")
+    ),
+    True,
+]
+
+
+def wait_for(watcher: Watcher, count: int = 1, timeout: float = 10.0) -> List[Change]:
+    """Collect changes until ``count`` have arrived"""
+    changes: List[Change] = []
+    deadline = time.monotonic() + timeout
+    while len(changes) < count and time.monotonic() < deadline:
+        changes.extend(watcher.poll(0.1))
+    return changes
+
+
+@pytest.fixture(params=BACKENDS, ids=["inotify", "poll"])
+def watcher(
+    request: pytest.FixtureRequest, tmp_path: str, write: Callable[[str, bytes], str]
+) -> Iterator[Watcher]:
+    write(os.path.join(tmp_path, "old"), b"old")
+    w = Watcher(str(tmp_path), debounce=0.05, poll_interval=0.1, polling=request.param)
+    w.scan()
+    yield w
+    w.close()
+
+
+def test_incremental_tree_matches_tree() -> None:
+    """Random adds and removes keep the same root as a fresh Tree"""
+    rng = random.Random(4)
+    pool = [Digest(hashlib.sha512(str(i).encode()).digest()) for i in range(50)]
+    tree = IncrementalTree()
+    leaves: List[Digest] = []
+    for _ in range(500):
+        if leaves and rng.random() < 0.45:
+            tree.remove(leaves.pop(rng.randrange(len(leaves))))
+        else:
+            leaves.append(rng.choice(pool))
+            tree.add(leaves[-1])
+        assert tree.id() == Tree(leaves).id()
+        assert len(tree) == len(set(leaves))
+    with pytest.raises(KeyError):
+        IncrementalTree().remove(pool[0])
+
+
+def test_scan(watcher: Watcher, tmp_path: str) -> None:
+    """The initial scan knows every file and the tree ID"""
+    path = os.path.join(tmp_path, "old")
+    file_id = identify_path(path)
+    assert file_id is not None
+    assert watcher.ids == {path: file_id}
+    assert watcher.tree_id() == Tree([file_id]).id()
+
+
+def test_changes(
+    watcher: Watcher, tmp_path: str, write: Callable[[str, bytes], str]
+) -> None:
+    """Adds, edits, moves and deletes are reported and the tree follows"""
+    new = os.path.join(tmp_path, "sub", "new")
+    os.mkdir(os.path.dirname(new))
+    write(new, b"new")
+    assert wait_for(watcher) == [Change(ADDED, new, identify_path(new))]
+
+    old = os.path.join(tmp_path, "old")
+    before = watcher.ids[old]
+    write(old, b"changed")
+    os.utime(old, ns=(0, 1))
+    assert wait_for(watcher) == [Change(MODIFIED, old, identify_path(old), before)]
+
+    moved = os.path.join(tmp_path, "moved")
+    os.rename(new, moved)
+    file_id = identify_path(moved)
+    assert wait_for(watcher) == [Change(MOVED, moved, file_id, file_id, new)]
+
+    os.unlink(moved)
+    assert wait_for(watcher) == [Change(REMOVED, moved, None, file_id)]
+    assert watcher.tree_id() == Tree(watcher.ids.values()).id()
+
+
+def test_directory_moved_out(
+    watcher: Watcher, tmp_path: str, write: Callable[[str, bytes], str]
+) -> None:
+    """Removing a directory removes every file under it"""
+    sub = os.path.join(tmp_path, "d")
+    os.mkdir(sub)
+    for name in ("a", "b"):
+        write(os.path.join(sub, name), name.encode())
+    assert len(wait_for(watcher, 2)) == 2
+    os.rename(sub, f"{tmp_path}-moved")
+    changes = wait_for(watcher, 2)
+    assert sorted(c.status for c in changes) == [REMOVED, REMOVED]
+    assert list(watcher.ids) == [os.path.join(tmp_path, "old")]
+
+
+def test_debounce(tmp_path: str) -> None:
+    """Rapid writes to one file are reported once, after they stop"""
+    if not inotify_available():
+        pytest.skip("no inotify")
+    with Watcher(str(tmp_path), debounce=0.3) as watcher:
+        watcher.scan()
+        path = os.path.join(tmp_path, "log")
+        with open(path, "wb") as f:
+            for i in range(10):
+                f.write(b"x" * 100)
+                f.flush()
+                time.sleep(0.02)
+        changes = wait_for(watcher)
+        assert changes == [Change(ADDED, path, identify_path(path))]
+        assert watcher.poll(0.5) == []
+
+
+def test_filter(tmp_path: str, write: Callable[[str, bytes], str]) -> None:
+    """Excluded files are neither scanned nor reported"""
+    write(os.path.join(tmp_path, "a.tmp"), b"a")
+    with Watcher(
+        str(tmp_path), PathFilter(exclude=["*.tmp"]), debounce=0.05, poll_interval=0.1
+    ) as watcher:
+        assert watcher.scan() == []
+        write(os.path.join(tmp_path, "b.tmp"), b"b")
+        write(os.path.join(tmp_path, "c"), b"c")
+        changes = wait_for(watcher)
+        assert [c.path for c in changes] == [os.path.join(tmp_path, "c")]
+
+
+@pytest.mark.parametrize("polling", [False, True])
+def test_lists_like_walk(
+    tmp_path: str, make_tree: Callable[[str], None], polling: bool
+) -> None:
+    """The watcher sees the files walk does, globs relative to its root"""
+    if not polling and not inotify_available():
+        pytest.skip("no inotify")
+    root = str(tmp_path)
+    make_tree(os.path.join(root, "t"))
+    os.symlink(os.path.join(root, "t"), os.path.join(root, "link"))
+    path_filter = PathFilter(exclude=["build", "t/a/b", "moved/a/b"])
+    with Watcher(
+        root, path_filter, debounce=0.05, poll_interval=0.1, polling=polling
+    ) as watcher:
+        watcher.scan()
+        expected = {e.path for e in walk(root, path_filter=path_filter)}
+        assert set(watcher.ids) == expected
+        # A directory moved in is listed with the same root-relative globs
+        outside = f"{tmp_path}-tree"
+        make_tree(outside)
+        os.rename(outside, os.path.join(root, "moved"))
+        added = {os.path.join(root, "moved", p) for p in ("x.txt", "y.exr")}
+        added |= {os.path.join(root, "moved", "a", p) for p in ("x.txt", "y.exr")}
+        added |= {os.path.join(root, "moved", "d", p) for p in ("x.txt", "y.exr")}
+        assert {c.path for c in wait_for(watcher, len(added))} == added
+
+
+def test_cli_watch(tmp_path: str, write: Callable[[str, bytes], str]) -> None:
+    """watch prints the initial scan, each change and the tree ID"""
+    path = os.path.join(tmp_path, "a")
+    write(path, b"a")
+    file_id = identify_path(path)
+    assert file_id is not None
+
+    def one_batch(self: Watcher) -> Iterator[List[Change]]:
+        os.unlink(path)
+        yield self._forget(path)
+
+    runner = CliRunner()
+    with patch.object(Watcher, "__iter__", one_batch):
+        result = runner.invoke(main, ["watch", "--initial", "--tree", str(tmp_path)])
+    assert result.exit_code == 0
+    assert result.output.splitlines() == [
+        f"A {file_id} {path}",
+        f"T {Tree([file_id]).id()} {tmp_path}",
+        f"D {file_id} {path}",
+    ]